@@ -0,0 +1,129 @@
+# benchmarks/bench_decode.py
+"""Decode stage: latency and peak memory of the old full-size decode vs decode_image.
+
+Each memory sample runs in a fresh forkserver child so ru_maxrss (the peak
+resident set) reflects a single decode. Linux/macOS only.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_decode.py [--repeat 5] [--json out.json]
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from utils.image_decode import decode_image
+
+MAX_SIZE = 1500
+SIZES = {
+    '1MP': (1280, 800),
+    '4MP': (2448, 1632),
+    '12MP': (4032, 3024),
+    '24MP': (6000, 4000),
+}
+
+
+def legacy_decode(image_bytes):
+    """The decode the /ocr handler used before decode_image"""
+    image = Image.open(io.BytesIO(image_bytes))
+    original_size = image.size
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image_array = np.array(image)
+    if max(original_size) > MAX_SIZE:
+        ratio = MAX_SIZE / max(original_size)
+        new_size = tuple(int(dim * ratio) for dim in original_size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+        image_array = np.array(image)
+    return image_array
+
+
+def fast_decode(image_bytes):
+    return decode_image(io.BytesIO(image_bytes), max_side=MAX_SIZE, max_pixels=0)[1]
+
+
+DECODERS = {'legacy': legacy_decode, 'decode_image': fast_decode}
+
+
+def make_photo(size, fmt):
+    """Deterministic photo-like image: smooth gradients plus dark text-like bars"""
+    width, height = size
+    rng = np.random.default_rng(1234)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([(x + y) / 2, x * 0 + y, 255 - (x + y) / 2], axis=-1)
+    base += rng.normal(0, 6, base.shape).astype(np.float32)
+    for row in range(height // 10, height, max(1, height // 12)):
+        base[row:row + max(2, height // 80), width // 10: width * 9 // 10] = 20
+    image = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=90) if fmt == 'JPEG' else image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def _peak_child(decoder_name, image_bytes, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    DECODERS[decoder_name](image_bytes)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == 'darwin' else 1024  # bytes on macOS, KiB on Linux
+    queue.put((after - before) * scale / 1024 / 1024)
+
+
+def peak_memory_mb(decoder_name, image_bytes):
+    ctx = multiprocessing.get_context('forkserver')
+    queue = ctx.Queue()
+    child = ctx.Process(target=_peak_child, args=(decoder_name, image_bytes, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    return result
+
+
+def median_latency(decoder, image_bytes, repeat):
+    decoder(image_bytes)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decoder(image_bytes)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for label, size in SIZES.items():
+        for fmt in ('JPEG', 'PNG'):
+            image_bytes = make_photo(size, fmt)
+            row = {'size': label, 'format': fmt, 'bytes': len(image_bytes)}
+            for name, decoder in DECODERS.items():
+                row[f'{name}_ms'] = round(median_latency(decoder, image_bytes, args.repeat) * 1000, 1)
+                row[f'{name}_peak_mb'] = round(peak_memory_mb(name, image_bytes), 1)
+            results.append(row)
+
+    print(f"{'size':>5} {'fmt':>5} {'legacy ms':>10} {'new ms':>8} {'legacy MB':>10} {'new MB':>8}")
+    for row in results:
+        print(f"{row['size']:>5} {row['format']:>5} {row['legacy_ms']:>10} {row['decode_image_ms']:>8} "
+              f"{row['legacy_peak_mb']:>10} {row['decode_image_peak_mb']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/bench_engine_modes.py
+"""EasyOCR engine modes: fp32 (accurate) vs int8 (fast) latency and accuracy.
+
+Builds one reader per --modes entry the way the service does (EasyOCR's own
+quantization off, then utils/inference.py) and runs readtext directly on
+every image, decoded and preprocessed as /ocr does (OCR_MAX_IMAGE_SIDE,
+--enhancement-level), once per torch intra-op thread count in --threads.
+
+Images are the synthetic corpus (benchmarks/corpus.py) or, with --images,
+every PNG/JPEG/TIFF in a directory; ground truth comes from a .txt file of
+the same name when there is one. Reported per mode and thread count: reader
+load time, estimated model size, p50/p95 latency per image, throughput,
+character accuracy against the truth (overall and per kind) and agreement
+with the first mode's text, which also covers images without a .txt.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_engine_modes.py [--modes accurate,fast] [--threads 1,4]
+        [--rounds 3] [--images DIR] [--kinds receipt,paragraph] [--per-kind 2]
+        [--seed 42] [--language en] [--enhancement-level medium] [--json out.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import easyocr
+
+from bench_ocr import char_accuracy, csv, git_commit, percentile
+from corpus import KINDS, build_corpus
+from utils.cpu_budget import configure_torch_threads
+from utils.image_decode import decode_image
+from utils.inference import ENGINE_MODES, apply_engine_mode
+from utils.preprocess import preprocess_image, NONE
+from utils.reader_pool import estimate_reader_bytes
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+# Same options as the service's EASYOCR_READTEXT_OPTIONS
+READTEXT_OPTIONS = {'paragraph': False, 'width_ths': 0.7, 'height_ths': 0.7, 'detail': 1}
+
+
+def load_images(directory):
+    """Samples like build_corpus's from a directory; truth is None without a .txt"""
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            data = f.read()
+        truth_path = os.path.join(directory, stem + '.txt')
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding='utf-8') as f:
+                truth = f.read()
+        samples.append({'name': stem, 'kind': 'local', 'bytes': data, 'truth': truth})
+    return samples
+
+
+def prepare(sample, max_side, level):
+    _, image_array, _, _ = decode_image(io.BytesIO(sample['bytes']), max_side=max_side)
+    processed, _ = preprocess_image(image_array, level) if level != NONE else (image_array, None)
+    if processed.ndim == 2:
+        processed = np.stack([processed] * 3, axis=-1)
+    return processed
+
+
+def build_reader(language, mode):
+    started = time.perf_counter()
+    reader = easyocr.Reader([language], gpu=False, quantize=False, verbose=False)
+    apply_engine_mode(reader, mode)
+    return reader, time.perf_counter() - started
+
+
+def read_text(reader, image):
+    regions = reader.readtext(image, **READTEXT_OPTIONS)
+    return ' '.join(text for _, text, confidence in regions if confidence > 0.3)
+
+
+def run_mode(reader, images, corpus, rounds):
+    """(latencies, texts by sample name); the first round's text is kept"""
+    read_text(reader, images[0])  # warm-up, not timed
+    latencies, texts = [], {}
+    for _ in range(rounds):
+        for sample, image in zip(corpus, images):
+            start = time.perf_counter()
+            text = read_text(reader, image)
+            latencies.append(time.perf_counter() - start)
+            texts.setdefault(sample['name'], text)
+    return latencies, texts
+
+
+def summarize(mode, threads, load_seconds, reader, latencies, texts, corpus, reference):
+    latencies = sorted(latencies)
+    by_kind = defaultdict(list)
+    for sample in corpus:
+        if sample['truth'] is not None:
+            by_kind[sample['kind']].append(char_accuracy(texts[sample['name']], sample['truth']))
+    scored = [value for values in by_kind.values() for value in values]
+    agreement = [char_accuracy(texts[name], text) for name, text in reference.items()]
+    return {
+        'mode': mode,
+        'threads': threads,
+        'load_s': round(load_seconds, 2),
+        'model_mb': round(estimate_reader_bytes(reader) / 1024 / 1024, 1),
+        'quantized_layers': reader.quantized_layers,
+        'images': len(corpus),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 1),
+        'images_per_s': round(len(latencies) / sum(latencies), 2),
+        'char_accuracy': round(float(np.mean(scored)), 4) if scored else None,
+        'char_accuracy_by_kind': {kind: round(float(np.mean(values)), 4) for kind, values in by_kind.items()},
+        'agreement': round(float(np.mean(agreement)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', type=csv(str), default=list(ENGINE_MODES))
+    parser.add_argument('--threads', type=csv(int), default=[1, os.cpu_count() or 1])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--images', help='directory of images (and .txt ground truth) instead of the corpus')
+    parser.add_argument('--kinds', type=csv(str), default=[kind for kind in KINDS if kind != 'no_text'])
+    parser.add_argument('--per-kind', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--enhancement-level', default=os.environ.get('OCR_ENHANCEMENT_LEVEL', 'medium'))
+    parser.add_argument('--max-side', type=int, default=int(os.environ.get('OCR_MAX_IMAGE_SIDE', '1500')))
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    corpus = load_images(args.images) if args.images else build_corpus(args.seed, args.per_kind, args.kinds)
+    if not corpus:
+        parser.error(f"no images in {args.images}")
+    images = [prepare(sample, args.max_side, args.enhancement_level) for sample in corpus]
+    print(f"📚 {len(corpus)} images, enhancement {args.enhancement_level}, {args.rounds} rounds")
+    print(f"{'mode':>9} {'thr':>4} {'load s':>7} {'MB':>6} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'img/s':>6} {'acc':>6} {'agree':>6}")
+
+    readers, results, reference = {}, [], None
+    for threads in args.threads:
+        # Same pinning as the service's pool workers; inter-op stays at 1
+        configure_torch_threads(threads)
+        for mode in args.modes:
+            if mode not in readers:
+                readers[mode] = build_reader(args.language, mode)
+            reader, load_seconds = readers[mode]
+            latencies, texts = run_mode(reader, images, corpus, args.rounds)
+            if reference is None:
+                reference = texts
+            row = summarize(mode, threads, load_seconds, reader, latencies, texts, corpus, reference)
+            results.append(row)
+            print(f"{mode:>9} {threads:>4} {row['load_s']:>7} {row['model_mb']:>6} {row['p50_ms']:>8} "
+                  f"{row['p95_ms']:>8} {row['images_per_s']:>6} {row['char_accuracy']!s:>6} "
+                  f"{row['agreement']:>6}")
+
+    if args.json:
+        meta = {
+            'commit': git_commit(),
+            'images': args.images or f"corpus seed {args.seed}, {args.per_kind} per kind",
+            'language': args.language,
+            'enhancement_level': args.enhancement_level,
+            'rounds': args.rounds,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        }
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# benchmarks/bench_language.py
+"""language=auto: detection accuracy and cost, and what it saves over 'multi'.
+
+Renders --per-language images of generated sentences in each Latin-script
+language utils/language_detect.py tells apart, then runs up to three stages:
+
+- text: langdetect on the ground truth, as is and with accents stripped
+  (what the English model reads), with accuracy and time per call. Needs
+  only langdetect.
+- detect: image_ocr.detect_image_language on every image (Tesseract OSD and
+  English pass, or EasyOCR's when Tesseract is missing), with accuracy and
+  time per image.
+- recognize: EasyOCR with the detected single-language reader vs the
+  three-language 'multi' reader, p50/p95 per image and character accuracy.
+
+Stages whose engines are not installed are skipped.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_language.py [--stages text,detect,recognize]
+        [--languages en,es,fr,de,it,pt] [--per-language 4] [--seed 42] [--json out.json]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from bench_ocr import char_accuracy, csv, git_commit, percentile
+from utils.language_detect import LANGDETECT_AVAILABLE, LATIN_LANGUAGES, language_from_text
+
+# Everyday business vocabulary per language, enough for varied sentences
+VOCABULARY = {
+    'en': "the invoice must be paid before the end of the month customer order delivery "
+          "address payment received thank you for your business please contact our office",
+    'es': "la factura debe pagarse antes del final del mes el cliente pedido entrega "
+          "dirección pago recibido gracias por su confianza por favor contacte nuestra oficina",
+    'fr': "la facture doit être payée avant la fin du mois le client commande livraison "
+          "adresse paiement reçu merci pour votre confiance veuillez contacter notre bureau",
+    'de': "die rechnung muss vor ende des monats bezahlt werden der kunde bestellung lieferung "
+          "adresse zahlung erhalten vielen dank für ihr vertrauen bitte kontaktieren sie unser büro",
+    'it': "la fattura deve essere pagata entro la fine del mese il cliente ordine consegna "
+          "indirizzo pagamento ricevuto grazie per la fiducia si prega di contattare il nostro ufficio",
+    'pt': "a fatura deve ser paga antes do final do mês o cliente pedido entrega "
+          "endereço pagamento recebido obrigado pela confiança por favor contacte o nosso escritório",
+}
+
+
+def strip_accents(text):
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def sample_text(rng, language, lines=6, words=9):
+    vocabulary = VOCABULARY[language].split()
+    return '\n'.join(' '.join(rng.choice(vocabulary) for _ in range(words)).capitalize() for _ in range(lines))
+
+
+def render(text, font_size=28, margin=40):
+    lines = text.split('\n')
+    image = Image.new('L', (1000, margin * 2 + int(font_size * 1.5) * len(lines)), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    for row, line in enumerate(lines):
+        draw.text((margin, margin + row * int(font_size * 1.5)), line, fill=0, font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def build_samples(languages, per_language, seed):
+    samples = []
+    for language in languages:
+        for index in range(per_language):
+            rng = random.Random(f"{seed}:{language}:{index}")
+            text = sample_text(rng, language)
+            samples.append({'name': f"{language}_{index}", 'language': language, 'truth': text})
+    return samples
+
+
+def stage_text(samples, languages):
+    rows = []
+    for variant, transform in (('truth', lambda text: text), ('no_accents', strip_accents)):
+        correct, seconds = 0, []
+        for sample in samples:
+            start = time.perf_counter()
+            language, _ = language_from_text(transform(sample['truth']), languages)
+            seconds.append(time.perf_counter() - start)
+            correct += language == sample['language']
+        seconds.sort()
+        rows.append({'stage': 'text', 'variant': variant, 'samples': len(samples),
+                     'accuracy': round(correct / len(samples), 3),
+                     'p50_ms': round(percentile(seconds, 50) * 1000, 2),
+                     'p95_ms': round(percentile(seconds, 95) * 1000, 2)})
+    return rows
+
+
+def stage_detect(image_ocr, samples, method):
+    by_language = defaultdict(lambda: [0, 0])
+    seconds, detected = [], {}
+    for sample in samples:
+        prepared = image_ocr.prepare_image(sample['bytes'], image_ocr.DEFAULT_ENHANCEMENT_LEVEL,
+                                           image_ocr.StageTimer())
+        sample['prepared'] = prepared
+        start = time.perf_counter()
+        detection = image_ocr.detect_image_language(prepared, method)
+        seconds.append(time.perf_counter() - start)
+        detected[sample['name']] = detection['language']
+        by_language[sample['language']][0] += detection['language'] == sample['language']
+        by_language[sample['language']][1] += 1
+    seconds.sort()
+    correct = sum(hits for hits, _ in by_language.values())
+    row = {'stage': 'detect', 'method': method, 'samples': len(samples),
+           'accuracy': round(correct / len(samples), 3),
+           'accuracy_by_language': {language: round(hits / total, 3)
+                                    for language, (hits, total) in by_language.items()},
+           'p50_ms': round(percentile(seconds, 50) * 1000, 1),
+           'p95_ms': round(percentile(seconds, 95) * 1000, 1)}
+    return [row], detected
+
+
+def stage_recognize(image_ocr, samples, detected):
+    rows = []
+    for reader, language_of in (('detected', lambda sample: detected[sample['name']]),
+                                ('multi', lambda sample: 'multi')):
+        seconds, scores = [], []
+        for sample in samples:
+            image = sample['prepared']['processed_image']
+            image_ocr.process_with_easyocr(image, language_of(sample))  # reader load, not timed
+            start = time.perf_counter()
+            result = image_ocr.process_with_easyocr(image, language_of(sample))
+            seconds.append(time.perf_counter() - start)
+            scores.append(char_accuracy(result.get('text', ''), sample['truth']))
+        seconds.sort()
+        rows.append({'stage': 'recognize', 'reader': reader, 'samples': len(samples),
+                     'p50_ms': round(percentile(seconds, 50) * 1000, 1),
+                     'p95_ms': round(percentile(seconds, 95) * 1000, 1),
+                     'char_accuracy': round(sum(scores) / len(scores), 4)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stages', type=csv(str), default=['text', 'detect', 'recognize'])
+    parser.add_argument('--languages', type=csv(str), default=list(LATIN_LANGUAGES))
+    parser.add_argument('--per-language', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    samples = build_samples(args.languages, args.per_language, args.seed)
+    print(f"🔤 {len(samples)} samples in {', '.join(args.languages)}")
+    results = []
+
+    if 'text' in args.stages:
+        if LANGDETECT_AVAILABLE:
+            results += stage_text(samples, args.languages)
+        else:
+            print("⚠️ langdetect not installed, skipping the text stage")
+
+    detected = None
+    if 'detect' in args.stages or 'recognize' in args.stages:
+        import image_ocr
+        method = image_ocr.resolve_ocr_method('auto')
+        if method == 'none':
+            print("⚠️ No OCR engine installed, skipping the detect and recognize stages")
+        else:
+            for sample in samples:
+                sample['bytes'] = render(sample['truth'])
+            rows, detected = stage_detect(image_ocr, samples, method)
+            results += rows
+            if 'recognize' in args.stages:
+                if method == 'easyocr':
+                    results += stage_recognize(image_ocr, samples, detected)
+                else:
+                    print("⚠️ EasyOCR not installed, skipping the recognize stage")
+
+    for row in results:
+        print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'commit': git_commit(), 'languages': args.languages,
+                       'per_language': args.per_language, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
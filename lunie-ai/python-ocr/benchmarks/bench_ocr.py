@@ -0,0 +1,295 @@
+# benchmarks/bench_ocr.py
+"""End-to-end /ocr benchmark on the synthetic corpus (benchmarks/corpus.py).
+
+For every combination of --methods x --enhance x --tiled and every
+--concurrency level, each corpus image is POSTed to /ocr --rounds times by
+that many concurrent clients. Reported per combination: p50/p95/p99
+latency, throughput, errors, engines actually used, method=auto routes
+(metadata.route), peak RSS and mean
+character accuracy (1 - edit distance / ground-truth length, whitespace
+collapsed), overall and per document kind.
+
+In-process mode (default) drives the ASGI app directly with the result
+cache and job workers disabled; peak RSS is this process's high-water
+mark, so it only grows across combinations. HTTP mode drives a running
+server (start it with OCR_CACHE_ENABLED=0, or repeated rounds measure the
+cache); pass --server-pid to read its peak RSS from /proc (Linux).
+
+Usage (from python-ocr/):
+    python benchmarks/bench_ocr.py [--mode inprocess|http] [--url http://localhost:8002]
+        [--concurrency 1,4] [--rounds 3] [--methods auto] [--enhance true,false]
+        [--tiled false] [--kinds receipt,poster] [--per-kind 2] [--seed 42]
+        [--json out.json] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import numpy as np
+
+from corpus import KINDS, build_corpus
+
+
+def edit_distance(a, b):
+    """Levenshtein distance, one numpy row per character of ``a``"""
+    if not a or not b:
+        return max(len(a), len(b))
+    b_codes = np.frombuffer(b.encode('utf-32-le'), dtype=np.uint32)
+    offsets = np.arange(len(b) + 1)
+    previous = offsets.copy()
+    for i, char in enumerate(a, 1):
+        substitute = previous[:-1] + (b_codes != ord(char))
+        current = np.empty_like(previous)
+        current[0] = i
+        current[1:] = np.minimum(previous[1:] + 1, substitute)
+        # Insertions run left to right: current[j] = min_k(current[k] + j - k)
+        current = np.minimum.accumulate(current - offsets) + offsets
+        previous = current
+    return int(previous[-1])
+
+
+def char_accuracy(predicted, truth):
+    predicted, truth = ' '.join(predicted.split()), ' '.join(truth.split())
+    if not truth:
+        return 1.0 if not predicted else 0.0
+    return max(0.0, 1 - edit_distance(predicted, truth) / len(truth))
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(np.ceil(p / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb(server_pid=None):
+    if server_pid:
+        try:
+            with open(f"/proc/{server_pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024  # bytes on macOS, KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024 / 1024, 1)
+
+
+async def post_ocr(client, sample, options):
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            '/ocr',
+            files={'file': (f"{sample['name']}.png", sample['bytes'], 'image/png')},
+            data={key: str(value).lower() for key, value in options.items()}
+        )
+        body = response.json()
+        ok = response.status_code == 200 and body.get('success')
+    except (httpx.HTTPError, ValueError) as e:
+        body, ok = {'error': str(e)}, False
+    return time.perf_counter() - start, ok, body
+
+
+async def run_combination(client, corpus, options, concurrency, rounds):
+    queue = asyncio.Queue()
+    for _ in range(rounds):
+        for sample in corpus:
+            queue.put_nowait(sample)
+
+    latencies, errors, engines, routes = [], Counter(), Counter(), Counter()
+    accuracy = {}  # sample name -> accuracy of its first successful answer
+
+    async def client_loop():
+        while not queue.empty():
+            sample = queue.get_nowait()
+            seconds, ok, body = await post_ocr(client, sample, options)
+            latencies.append(seconds)
+            if not ok:
+                errors[body.get('error', 'unknown')[:80]] += 1
+                continue
+            engines[body.get('method_used', 'unknown')] += 1
+            route = (body.get('metadata') or {}).get('route')
+            routes[route['route'] if route else 'none'] += 1
+            if sample['name'] not in accuracy:
+                accuracy[sample['name']] = char_accuracy(body.get('text', ''), sample['truth'])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    by_kind = defaultdict(list)
+    for sample in corpus:
+        by_kind[sample['kind']].append(accuracy.get(sample['name'], 0.0))
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        **options,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'error_messages': dict(errors),
+        'engines_used': dict(engines),
+        'routes': dict(routes),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'char_accuracy': round(float(np.mean([a for values in by_kind.values() for a in values])), 4),
+        'char_accuracy_by_kind': {kind: round(float(np.mean(values)), 4) for kind, values in by_kind.items()},
+    }
+
+
+def combinations(args):
+    for method in args.methods:
+        for enhance in args.enhance:
+            for tiled in args.tiled:
+                yield {'method': method, 'enhance': enhance, 'tiled': tiled}
+
+
+async def run_all(args, corpus):
+    if args.mode == 'http':
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        lifespan = None
+    else:
+        # Measure the pipeline, not the cache; no background job workers
+        os.environ['OCR_CACHE_ENABLED'] = '0'
+        os.environ['OCR_JOBS_ENABLED'] = '0'
+        import image_ocr
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=image_ocr.app),
+                                   base_url='http://bench', timeout=args.timeout)
+        lifespan = image_ocr.app.router.lifespan_context(image_ocr.app)
+
+    results = []
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            # One untimed pass so model loading isn't charged to the first combination
+            for options in combinations(args):
+                await post_ocr(client, corpus[0], {**options, 'language': args.language})
+            for options in combinations(args):
+                for concurrency in args.concurrency:
+                    row = await run_combination(client, corpus, {**options, 'language': args.language},
+                                                concurrency, args.rounds)
+                    row['peak_rss_mb'] = peak_rss_mb(args.server_pid if args.mode == 'http' else None)
+                    results.append(row)
+                    print_row(row)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results
+
+
+HEADER = (f"{'method':>9} {'enh':>5} {'tiled':>5} {'conc':>4} {'reqs':>5} {'err':>4} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'req/s':>7} {'RSS MB':>7} {'acc':>6}")
+
+
+def print_row(row):
+    print(f"{row['method']:>9} {str(row['enhance']):>5} {str(row['tiled']):>5} {row['concurrency']:>4} "
+          f"{row['requests']:>5} {row['errors']:>4} {row['p50_ms']!s:>8} {row['p95_ms']!s:>8} "
+          f"{row['p99_ms']!s:>8} {row['throughput_rps']!s:>7} {row['peak_rss_mb']!s:>7} "
+          f"{row['char_accuracy']:>6.3f}")
+
+
+def compare(results, meta, previous_path):
+    """Print p50/p95/throughput/accuracy changes against an earlier --json file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    key = lambda row: (row['method'], row['enhance'], row['tiled'], row['concurrency'])
+    before = {key(row): row for row in previous['results']}
+    print(f"\nvs {previous_path} ({previous['meta'].get('commit')}):")
+    for field in ('mode', 'seed', 'kinds', 'per_kind'):
+        if previous['meta'].get(field) != meta.get(field):
+            print(f"  ⚠️ {field} differs ({previous['meta'].get(field)} vs {meta.get(field)}), numbers are not comparable")
+    for row in results:
+        old = before.get(key(row))
+        if old is None:
+            continue
+        changes = []
+        for field in ('p50_ms', 'p95_ms', 'throughput_rps', 'char_accuracy'):
+            if old.get(field) and row.get(field) is not None:
+                changes.append(f"{field} {(row[field] - old[field]) / old[field] * 100:+.1f}%")
+        print(f"  {row['method']} enhance={row['enhance']} tiled={row['tiled']} "
+              f"c={row['concurrency']}: {', '.join(changes)}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def csv(cast):
+    return lambda value: [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def boolean(value):
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('inprocess', 'http'), default='inprocess')
+    parser.add_argument('--url', default='http://localhost:8002')
+    parser.add_argument('--server-pid', type=int, help='HTTP mode: read this process\'s peak RSS')
+    parser.add_argument('--concurrency', type=csv(int), default=[1, 4])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--methods', type=csv(str), default=['auto'])
+    parser.add_argument('--enhance', type=csv(boolean), default=[True, False])
+    parser.add_argument('--tiled', type=csv(boolean), default=[False])
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--kinds', type=csv(str), default=list(KINDS))
+    parser.add_argument('--per-kind', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='earlier --json output to compare against')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.seed, args.per_kind, args.kinds)
+    print(f"📚 {len(corpus)} images ({', '.join(args.kinds)}), seed {args.seed}, mode {args.mode}")
+    print(HEADER)
+    results = asyncio.run(run_all(args, corpus))
+
+    meta = {
+        'commit': git_commit(),
+        'mode': args.mode,
+        'url': args.url if args.mode == 'http' else None,
+        'seed': args.seed,
+        'kinds': args.kinds,
+        'per_kind': args.per_kind,
+        'rounds': args.rounds,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'env': {key: value for key, value in os.environ.items() if key.startswith('OCR_')}
+    }
+
+    if args.compare:
+        compare(results, meta, args.compare)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_postprocess.py
+"""Text post-processing: the original ten-pass post_process_text vs TextPostProcessor.
+
+Times both on generated multi-page OCR text at low and high confidence. The
+original lives on as the golden reference in tests/test_text_postprocess.py,
+which checks the outputs are identical on edge cases, generated pages and
+fuzz strings; here the timed document is only checked once, and the script
+exits non-zero if the outputs differ.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_postprocess.py [--pages 50] [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.test_text_postprocess import legacy_post_process_text, make_document
+from utils.text_postprocess import TextPostProcessor
+
+
+def median_seconds(fn, text, confidence, repeat):
+    fn(text, confidence)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text, confidence)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    processor = TextPostProcessor()
+    document = make_document(args.pages)
+
+    for confidence in (50, 95):
+        if processor(document, confidence) != legacy_post_process_text(document, confidence):
+            print(f"❌ Output differs from the original post_process_text at confidence {confidence}; "
+                  f"run python -m pytest tests/test_text_postprocess.py")
+            sys.exit(1)
+
+    results = []
+    for confidence in (50, 95):
+        row = {'pages': args.pages, 'chars': len(document), 'confidence': confidence}
+        row['legacy_ms'] = round(median_seconds(legacy_post_process_text, document, confidence, args.repeat) * 1000, 2)
+        row['compiled_ms'] = round(median_seconds(processor, document, confidence, args.repeat) * 1000, 2)
+        row['speedup'] = round(row['legacy_ms'] / row['compiled_ms'], 2)
+        results.append(row)
+
+    print(f"{'chars':>9} {'conf':>5} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for row in results:
+        print(f"{row['chars']:>9} {row['confidence']:>5} {row['legacy_ms']:>10} "
+              f"{row['compiled_ms']:>12} {row['speedup']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
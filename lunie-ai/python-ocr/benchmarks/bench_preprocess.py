@@ -0,0 +1,126 @@
+# benchmarks/bench_preprocess.py
+"""Preprocessing: latency and allocation of each enhancement level by image size.
+
+Compares the old float64 grayscale (``np.dot`` with float weights) with
+utils/preprocess.py at levels light, medium and heavy, on a skewed page of
+text at each size. Allocation is the tracemalloc peak of one warm call
+(NumPy reports its buffers to tracemalloc), i.e. what the call allocates on
+top of the reused per-thread scratch buffers; the output array is included.
+The first (cold) call's peak, which also allocates the scratch buffers, is
+reported separately.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_preprocess.py [--repeat 5] [--sizes 1MP,2MP] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from utils import preprocess
+
+# 1500 px is the default OCR_MAX_IMAGE_SIDE, 6000 the tiled maximum
+SIZES = {
+    '0.5MP': (900, 600),
+    '1MP': (1240, 826),
+    '2MP': (1500, 1125),
+    '8MP': (3464, 2309),
+    '24MP': (6000, 4000),
+}
+SKEW_DEGREES = 3.0
+
+
+def legacy_gray(image_array):
+    """The preprocessing image_ocr used before utils/preprocess.py"""
+    gray = np.dot(image_array[..., :3], [0.299, 0.587, 0.114])
+    return gray.astype(np.uint8)
+
+
+def level(name):
+    return lambda image_array: preprocess.preprocess_image(image_array, name)[0]
+
+
+VARIANTS = {
+    'legacy_gray': legacy_gray,
+    'light': level(preprocess.LIGHT),
+    'medium': level(preprocess.MEDIUM),
+    'heavy': level(preprocess.HEAVY),
+}
+
+
+def make_page(size):
+    """Greyish page of text lines, rotated by SKEW_DEGREES so deskew has work"""
+    width, height = size
+    image = Image.new('RGB', size, (236, 232, 225))
+    draw = ImageDraw.Draw(image)
+    font_size = max(12, height // 60)
+    font = ImageFont.load_default(size=font_size)
+    line = "Invoice total amount due within thirty days of the date shown above " * 4
+    for y in range(font_size * 2, height - font_size * 2, font_size * 2):
+        draw.text((font_size * 2, y), line, fill=(40, 40, 48), font=font)
+    image = image.rotate(SKEW_DEGREES, resample=Image.Resampling.BILINEAR, fillcolor=(236, 232, 225))
+    return np.asarray(image)
+
+
+def measure(fn, image_array, repeat):
+    tracemalloc.start()
+    fn(image_array)
+    cold_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(image_array)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(image_array)
+    warm_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples), warm_peak, cold_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=lambda value: value.split(','), default=list(SIZES))
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'size':>6} {'variant':>12} {'ms':>8} {'alloc MB':>9} {'cold MB':>8} {'B/px':>6}")
+    for label in args.sizes:
+        image_array = make_page(SIZES[label])
+        pixels = image_array.shape[0] * image_array.shape[1]
+        for name, fn in VARIANTS.items():
+            seconds, warm_peak, cold_peak = measure(fn, image_array, args.repeat)
+            row = {
+                'size': label,
+                'pixels': pixels,
+                'variant': name,
+                'ms': round(seconds * 1000, 1),
+                'alloc_mb': round(warm_peak / 1024 / 1024, 1),
+                'cold_alloc_mb': round(cold_peak / 1024 / 1024, 1),
+                'bytes_per_pixel': round(warm_peak / pixels, 1),
+            }
+            results.append(row)
+            print(f"{label:>6} {name:>12} {row['ms']:>8} {row['alloc_mb']:>9} "
+                  f"{row['cold_alloc_mb']:>8} {row['bytes_per_pixel']:>6}")
+        preprocess.release_buffers()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
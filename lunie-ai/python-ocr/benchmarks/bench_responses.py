@@ -0,0 +1,197 @@
+# benchmarks/bench_responses.py
+"""Response encoding: payload size and serialization/compression throughput.
+
+Builds a large multi-page OCR output (generated page text, chunked with
+utils/chunker.py, with the metadata build_ocr_response adds) in two forms:
+one /ocr response holding every page's text, and the NDJSON stream
+/ocr/document sends, one line per page. Then it times:
+
+- serialization of each shape (full, chunk_format=offsets, fields=text,
+  fields=chunks) with the previous encoders (FastAPI's jsonable_encoder +
+  json for /ocr, json.dumps per NDJSON line) and with utils/responses.py's
+  dumps (orjson when installed)
+- gzip and zstd (when installed) compression of the full payload at the
+  levels given, as CompressionMiddleware would send it
+
+Usage (from python-ocr/):
+    python benchmarks/bench_responses.py [--pages 200] [--chars-per-page 3000] [--chunk-size 800]
+        [--repeat 5] [--gzip-levels 1,5] [--zstd-levels 3] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from corpus import WORDS
+from utils import responses
+from utils.chunker import split_chunks
+from utils.responses import ResponseShape
+
+SHAPES = {
+    'full': ResponseShape(),
+    'offsets': ResponseShape(chunk_format='offsets'),
+    'text': ResponseShape('text'),
+    'chunks': ResponseShape('chunks'),
+}
+
+
+def page_text(rng, chars):
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.08:
+            word += rng.choice('.,;:')
+        words.append(word)
+        length += len(word) + 1
+    lines = [' '.join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return '\n'.join(lines)
+
+
+def ocr_response(text, chunk_size, page=None):
+    """A success response with build_ocr_response's fields"""
+    chunks, offsets = split_chunks(text, chunk_size, 0)
+    response = {
+        "success": True,
+        "text": text,
+        "confidence": 87.42,
+        "word_count": len(text.split()),
+        "language": "en",
+        "method_used": "easyocr",
+        "enhanced": True,
+        "enhancement_level": "medium",
+        "post_processed": True,
+        "chunks": chunks,
+        "chunk_offsets": offsets,
+        "chunk_count": len(chunks),
+        "processing_time": 1.234,
+        "metadata": {
+            "original_filename": "scan.pdf",
+            "file_size": 4_812_345,
+            "image_dimensions": (2480, 3508),
+            "processed_dimensions": (1061, 1500),
+            "raw_text_length": len(text),
+            "processed_text_length": len(text),
+            "regions_found": 212,
+            "regions_used": 198,
+            "tiles": None,
+            "engine_mode": "fast",
+            "chunk_size": chunk_size,
+            "chunk_overlap": 0,
+            "route": {"route": "hard", "engines": ["easyocr"], "escalated": False},
+            "enhancement": {"level": "medium", "skew_angle": -0.6},
+            "stage_timings_ms": {"decode": 31.2, "preprocess": 18.9, "recognize_easyocr": 1104.3}
+        },
+        "cache": "miss"
+    }
+    if page is not None:
+        response = {"page": page[0], "page_count": page[1], **response}
+    return response
+
+
+def legacy_single(response):
+    """/ocr before: jsonable_encoder, then Starlette's JSONResponse.render"""
+    return json.dumps(jsonable_encoder(response), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def legacy_lines(lines):
+    return b''.join((json.dumps(line, default=str) + "\n").encode() for line in lines)
+
+
+def fast_single(response):
+    return responses.dumps(response)
+
+
+def fast_lines(lines):
+    return b''.join(responses.ndjson_line(line) for line in lines)
+
+
+def timed(fn, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), out
+
+
+def compressors(args):
+    for level in args.gzip_levels:
+        yield f"gzip-{level}", lambda data, level=level: zlib.compress(data, level, 31)
+    if responses.ZSTD_AVAILABLE:
+        import zstandard
+        for level in args.zstd_levels:
+            yield f"zstd-{level}", zstandard.ZstdCompressor(level=level).compress
+
+
+def csv_ints(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--chars-per-page', type=int, default=3000)
+    parser.add_argument('--chunk-size', type=int, default=800)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--gzip-levels', type=csv_ints, default=[1, 5])
+    parser.add_argument('--zstd-levels', type=csv_ints, default=[3])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [page_text(rng, args.chars_per_page) for _ in range(args.pages)]
+    single = ocr_response('\n\n'.join(texts), args.chunk_size)
+    lines = [ocr_response(text, args.chunk_size, (i + 1, args.pages)) for i, text in enumerate(texts)]
+    print(f"📄 {args.pages} pages x {args.chars_per_page} chars, chunk size {args.chunk_size}, "
+          f"orjson {'on' if responses.ORJSON_AVAILABLE else 'off'}, "
+          f"zstd {'on' if responses.ZSTD_AVAILABLE else 'off'}")
+
+    results = []
+    print(f"\n{'output':>8} {'shape':>8} {'encoder':>8} {'bytes':>10} {'ms':>8} {'MB/s':>8}")
+    payloads = {}
+    for output, legacy, fast, payload in (('ocr', legacy_single, fast_single, single),
+                                          ('document', legacy_lines, fast_lines, lines)):
+        for shape_name, shape in SHAPES.items():
+            shaped = shape.apply(payload) if output == 'ocr' else [shape.apply(line) for line in payload]
+            for encoder, fn in (('legacy', legacy), ('fast', fast)):
+                seconds, data = timed(fn, shaped, args.repeat)
+                if shape_name == 'full' and encoder == 'fast':
+                    payloads[output] = data
+                row = {'stage': 'serialize', 'output': output, 'shape': shape_name, 'encoder': encoder,
+                       'bytes': len(data), 'ms': round(seconds * 1000, 2),
+                       'mb_per_s': round(len(data) / seconds / 1e6, 1)}
+                results.append(row)
+                print(f"{output:>8} {shape_name:>8} {encoder:>8} {row['bytes']:>10} {row['ms']:>8} "
+                      f"{row['mb_per_s']:>8}")
+
+    print(f"\n{'output':>8} {'coding':>8} {'bytes':>10} {'ratio':>6} {'ms':>8} {'MB/s in':>8}")
+    for output, data in payloads.items():
+        for coding, compress in compressors(args):
+            seconds, compressed = timed(compress, data, args.repeat)
+            row = {'stage': 'compress', 'output': output, 'coding': coding, 'bytes_in': len(data),
+                   'bytes': len(compressed), 'ratio': round(len(data) / len(compressed), 2),
+                   'ms': round(seconds * 1000, 2), 'mb_per_s': round(len(data) / seconds / 1e6, 1)}
+            results.append(row)
+            print(f"{output:>8} {coding:>8} {row['bytes']:>10} {row['ratio']:>6} {row['ms']:>8} "
+                  f"{row['mb_per_s']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'pages': args.pages, 'chars_per_page': args.chars_per_page,
+                       'orjson': responses.ORJSON_AVAILABLE, 'zstd': responses.ZSTD_AVAILABLE,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_scheduler.py
+"""Interactive latency under bulk load: FIFO pool vs the tenant scheduler.
+
+Simulates the service's OCR workers with an OCRWorkerPool of --workers
+threads whose jobs sleep --job-ms (the engines release the GIL the same
+way). For --duration seconds:
+
+- --bulk-tenants tenants each keep --bulk-outstanding bulk jobs in flight,
+  resubmitting as soon as one finishes, like a bulk import through
+  /ocr/batch or /jobs saturating the service
+- --interactive-tenants tenants each send one interactive job at a time,
+  pausing --think-ms between them, like a user uploading single images
+
+once in FIFO mode (jobs go straight to the pool, whose queue is first come
+first served; the pool's queue is sized to hold all the bulk work) and once
+through utils/scheduler.py's FairScheduler with the service's defaults.
+Reported per mode and priority: completed jobs, throughput and p50/p95/p99
+latency from submission to result (queue wait included), plus the
+scheduler's per-tenant stats.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_scheduler.py [--workers 4] [--job-ms 50] [--duration 10]
+        [--bulk-tenants 2] [--bulk-outstanding 32] [--interactive-tenants 3]
+        [--think-ms 100] [--modes fifo,fair] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ocr import csv, git_commit, percentile
+from utils.scheduler import FairScheduler, INTERACTIVE, BULK
+from utils.worker_pool import OCRWorkerPool
+
+
+def ocr_job(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+class Fifo:
+    """The pool on its own: one queue, in arrival order, for every tenant"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def run(self, tenant, priority, fn, *args):
+        return await self.pool.run(fn, *args)
+
+    def stats(self):
+        return None
+
+
+async def client(target, tenant, priority, job_seconds, think_seconds, deadline, latencies):
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        await target.run(tenant, priority, ocr_job, job_seconds)
+        latencies[priority].append(time.monotonic() - start)
+        if think_seconds:
+            await asyncio.sleep(think_seconds)
+
+
+async def run_mode(mode, args):
+    job_seconds = args.job_ms / 1000
+    bulk_jobs = args.bulk_tenants * args.bulk_outstanding
+    pool = OCRWorkerPool("thread", max_workers=args.workers, max_queue=bulk_jobs + args.interactive_tenants)
+    target = Fifo(pool) if mode == "fifo" else FairScheduler(
+        pool, tenant_max_queued=args.bulk_outstanding + 1, max_queued=bulk_jobs + 1
+    )
+    latencies = defaultdict(list)
+    deadline = time.monotonic() + args.duration
+    clients = [
+        client(target, f"bulk-{t}", BULK, job_seconds, 0, deadline, latencies)
+        for t in range(args.bulk_tenants) for _ in range(args.bulk_outstanding)
+    ] + [
+        client(target, f"user-{t}", INTERACTIVE, job_seconds, args.think_ms / 1000, deadline, latencies)
+        for t in range(args.interactive_tenants)
+    ]
+    started = time.monotonic()
+    await asyncio.gather(*clients)
+    elapsed = time.monotonic() - started
+    stats = target.stats()
+    pool.shutdown(wait=True)
+
+    rows = []
+    for priority in (INTERACTIVE, BULK):
+        values = sorted(latencies[priority])
+        rows.append({
+            'mode': mode,
+            'priority': priority,
+            'completed': len(values),
+            'jobs_per_s': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 50) * 1000, 1) if values else None,
+            'p95_ms': round(percentile(values, 95) * 1000, 1) if values else None,
+            'p99_ms': round(percentile(values, 99) * 1000, 1) if values else None,
+        })
+    return rows, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--job-ms', type=float, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--bulk-tenants', type=int, default=2)
+    parser.add_argument('--bulk-outstanding', type=int, default=32)
+    parser.add_argument('--interactive-tenants', type=int, default=3)
+    parser.add_argument('--think-ms', type=float, default=100)
+    parser.add_argument('--modes', type=csv(str), default=['fifo', 'fair'])
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    print(f"🏭 {args.workers} workers, {args.job_ms:g} ms jobs, {args.duration:g} s per mode: "
+          f"{args.bulk_tenants} bulk tenants x {args.bulk_outstanding} outstanding, "
+          f"{args.interactive_tenants} interactive tenants")
+    print(f"{'mode':>5} {'priority':>12} {'done':>6} {'jobs/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    results, scheduler_stats = [], {}
+    for mode in args.modes:
+        rows, stats = asyncio.run(run_mode(mode, args))
+        if stats is not None:
+            scheduler_stats[mode] = stats
+        for row in rows:
+            results.append(row)
+            print(f"{row['mode']:>5} {row['priority']:>12} {row['completed']:>6} {row['jobs_per_s']:>7} "
+                  f"{row['p50_ms']!s:>8} {row['p95_ms']!s:>8} {row['p99_ms']!s:>8}")
+
+    for mode, stats in scheduler_stats.items():
+        print(f"\n{mode}: per-tenant waits (ms)")
+        for tenant, view in stats['tenants'].items():
+            waits = ', '.join(f"{priority} p50 {wait['p50_ms']} p95 {wait['p95_ms']}"
+                              for priority, wait in view['wait'].items())
+            print(f"  {tenant:>8}: {sum(view['dispatched'].values())} jobs, {waits}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'commit': git_commit(), 'args': vars(args), 'results': results,
+                       'scheduler': scheduler_stats}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
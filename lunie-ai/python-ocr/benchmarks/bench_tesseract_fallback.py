@@ -0,0 +1,98 @@
+# benchmarks/bench_tesseract_fallback.py
+"""Tesseract fallback latency: old two-pass run vs the single image_to_data pass.
+
+Usage (from python-ocr/):
+    python benchmarks/bench_tesseract_fallback.py [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+import pytesseract
+
+import image_ocr
+
+SAMPLE_LINES = [
+    "Invoice 10482 - Lunie AI Consulting",
+    "Quantity   Description             Amount",
+    "2          Chatbot setup (standard)  $450.00",
+    "1          Knowledge base import      $120.00",
+    "Payment is due within 30 days of the invoice date.",
+    "Thank you for your business!",
+]
+
+
+def render_document(width, lines):
+    """Deterministic black-on-white text image with the given number of lines"""
+    font = ImageFont.load_default(size=max(14, width // 45))
+    line_height = int(font.size * 1.6)
+    image = Image.new('L', (width, line_height * (lines + 2)), 255)
+    draw = ImageDraw.Draw(image)
+    for i in range(lines):
+        draw.text((font.size, line_height * (i + 1)), SAMPLE_LINES[i % len(SAMPLE_LINES)],
+                  fill=0, font=font)
+    return image
+
+
+def two_pass(image):
+    """The previous fallback: image_to_string, then image_to_data for confidences"""
+    text = pytesseract.image_to_string(image, lang='eng', config=image_ocr.TESSERACT_CONFIG)
+    data = pytesseract.image_to_data(image, lang='eng', config=image_ocr.TESSERACT_CONFIG,
+                                     output_type=pytesseract.Output.DICT)
+    confidences = [float(conf) for conf in data['conf'] if float(conf) > 0]
+    return text.strip(), sum(confidences) / len(confidences) if confidences else 0
+
+
+def single_pass(image):
+    result = image_ocr.process_with_tesseract(image, 'eng')
+    return result['text'], result['confidence']
+
+
+def time_call(fn, image, repeat):
+    fn(image)  # warm the page cache / traineddata load
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(image)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for width, lines in [(600, 6), (1200, 24), (1500, 60)]:
+        image = render_document(width, lines)
+        before = time_call(two_pass, image, args.repeat)
+        after = time_call(single_pass, image, args.repeat)
+        results.append({
+            'image': f"{image.width}x{image.height}",
+            'lines': lines,
+            'two_pass_s': round(before, 4),
+            'single_pass_s': round(after, 4),
+            'speedup': round(before / after, 2) if after else None,
+            'same_words': two_pass(image)[0].split() == single_pass(image)[0].split()
+        })
+
+    print(f"{'image':>12} {'lines':>6} {'two-pass':>10} {'one-pass':>10} {'speedup':>8} {'same words':>11}")
+    for row in results:
+        print(f"{row['image']:>12} {row['lines']:>6} {row['two_pass_s']:>10.4f} "
+              f"{row['single_pass_s']:>10.4f} {row['speedup']:>7}x {str(row['same_words']):>11}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/corpus.py
+"""Deterministic synthetic OCR corpus rendered with PIL.
+
+Every sample is rebuilt from the seed, so two runs (or two commits) see
+byte-identical images. Each sample carries its ground-truth text, one line
+per rendered line.
+"""
+import io
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+KINDS = ('receipt', 'paragraph', 'poster', 'low_contrast', 'rotated', 'no_text')
+
+WORDS = ("the invoice total amount due customer order item quantity price tax subtotal "
+         "date paid account number reference payment shipping delivery address service "
+         "support contract annual monthly report summary project meeting schedule office "
+         "please contact within days thank you for your business terms conditions apply").split()
+ITEMS = ("Coffee", "Bagel", "Orange juice", "Sandwich", "Salad", "Muffin", "Tea", "Water",
+         "Croissant", "Soup of the day", "Cookie", "Yogurt")
+
+
+def _font(size):
+    return ImageFont.load_default(size=size)
+
+
+def _sentence(rng, words):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + rng.choice('...!?')
+
+
+def _render(lines, size, font_size, margin=40, line_spacing=1.5, fill=0, background=255):
+    image = Image.new('L', size, background)
+    draw = ImageDraw.Draw(image)
+    font = _font(font_size)
+    step = int(font_size * line_spacing)
+    y = margin
+    drawn = []
+    for line in lines:
+        if y + step > size[1] - margin:
+            break
+        draw.text((margin, y), line, fill=fill, font=font)
+        drawn.append(line)
+        y += step
+    return image, drawn
+
+
+def receipt(rng):
+    lines = ["LUNIE CAFE", f"Order #{rng.randint(1000, 9999)}", ""]
+    total = 0.0
+    for _ in range(rng.randint(5, 10)):
+        price = rng.randint(150, 1500) / 100
+        total += price
+        lines.append(f"{rng.choice(ITEMS):<18}{price:>8.2f}")
+    lines += ["", f"{'TOTAL':<18}{total:>8.2f}", "Thank you!"]
+    return _render(lines, (520, 80 + 36 * len(lines)), 22, line_spacing=1.6)
+
+
+def paragraph(rng):
+    lines = []
+    for _ in range(40):
+        lines.append(_sentence(rng, rng.randint(7, 11)))
+    return _render(lines, (1240, 1754), 20, margin=60, line_spacing=1.8)
+
+
+def poster(rng):
+    """Large image: a headline plus small print that only survives at full resolution"""
+    image = Image.new('L', (4200, 3000), 255)
+    draw = ImageDraw.Draw(image)
+    headline = ' '.join(rng.choice(WORDS) for _ in range(3)).upper()
+    draw.text((150, 150), headline, fill=0, font=_font(160))
+    drawn = [headline]
+    small = _font(28)
+    for row in range(30):
+        line = _sentence(rng, 9)
+        draw.text((150, 600 + row * 70), line, fill=0, font=small)
+        drawn.append(line)
+    return image, drawn
+
+
+def low_contrast(rng):
+    lines = [_sentence(rng, rng.randint(5, 8)) for _ in range(12)]
+    return _render(lines, (1000, 700), 24, fill=120, background=165)
+
+
+def rotated(rng):
+    lines = [_sentence(rng, rng.randint(5, 8)) for _ in range(12)]
+    image, drawn = _render(lines, (1000, 700), 24)
+    angle = rng.choice((-1, 1)) * rng.uniform(2, 7)
+    return image.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255), drawn
+
+
+def no_text(rng):
+    """Empty scanned page or a soft gradient 'photo': nothing to read"""
+    if rng.random() < 0.5:
+        image = Image.new('L', (1240, 1754), rng.randint(235, 250))
+        noise = Image.effect_noise(image.size, 6)
+        return Image.blend(image, noise, 0.05), []
+    image = rng.choice((Image.linear_gradient, Image.radial_gradient))('L').resize((1200, 900))
+    return Image.merge('RGB', (image, image.transpose(Image.Transpose.FLIP_LEFT_RIGHT), image)), []
+
+
+RENDERERS = {
+    'receipt': receipt,
+    'paragraph': paragraph,
+    'poster': poster,
+    'low_contrast': low_contrast,
+    'rotated': rotated,
+    'no_text': no_text,
+}
+
+
+def build_corpus(seed=42, per_kind=2, kinds=KINDS):
+    """List of {'name', 'kind', 'bytes' (PNG), 'size', 'truth'} samples"""
+    samples = []
+    for kind in kinds:
+        for index in range(per_kind):
+            rng = random.Random(f"{seed}:{kind}:{index}")
+            image, lines = RENDERERS[kind](rng)
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG')
+            samples.append({
+                'name': f"{kind}_{index}",
+                'kind': kind,
+                'bytes': buffer.getvalue(),
+                'size': image.size,
+                'truth': '\n'.join(lines)
+            })
+    return samples
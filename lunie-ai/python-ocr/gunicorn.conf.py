@@ -0,0 +1,46 @@
+# gunicorn.conf.py - multi-process OCR serving
+#
+#   cd python-ocr && gunicorn -c gunicorn.conf.py image_ocr:app
+#
+# The app is imported once in the master (preload_app) and the EasyOCR
+# readers listed in OCR_PREWARM_LANGUAGES are loaded there before forking, so
+# every worker shares the model weights copy-on-write. Each worker then pins
+# torch to its share of the cores (see utils/cpu_budget.py).
+#
+# Settings:
+#   OCR_PROCESSES       worker processes (default: cores / 4)
+#   OCR_POOL_WORKERS    concurrent OCR jobs per process (default: cores / (2 * processes))
+#   OCR_TORCH_THREADS   torch intra-op threads per job (default: cores / (processes * jobs))
+#   OCR_TORCH_INTEROP_THREADS  torch inter-op threads per worker (default: 1)
+#   OCR_BIND            listen address (default: 127.0.0.1:8002)
+#
+# Tenant scheduling (utils/scheduler.py) is per process: limits such as
+# OCR_TENANT_MAX_RUNNING apply in each worker, so a tenant can run that many
+# jobs in every process.
+import gc
+import os
+
+from utils.cpu_budget import available_cpus
+
+workers = int(os.environ.get("OCR_PROCESSES", max(1, available_cpus() // 4)))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.environ.get("OCR_BIND", "127.0.0.1:8002")
+preload_app = True
+timeout = int(os.environ.get("OCR_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+
+# Read by the app at import time, which happens after this file is loaded
+os.environ["OCR_PROCESSES"] = str(workers)
+os.environ.setdefault("OCR_PRELOAD_MODELS", "1")
+# OpenMP thread pools do not survive fork(): keep the master single threaded,
+# workers set their own thread counts on startup
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded import, before the first fork.
+    # Freezing moves the loaded objects out of the collector's reach so GC
+    # passes in the workers don't write to (and un-share) their pages.
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"OCR master ready, forking {workers} workers")
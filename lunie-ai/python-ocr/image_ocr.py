@@ -1,50 +1,114 @@
 # simple_service.py - FIXED VERSION
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware  
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from PIL import Image
+from typing import List, Optional
+from pydantic import ValidationError
 import uvicorn
+import asyncio
+import functools
 import io
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import socket
+import sqlite3
+import tempfile
 import time
 import os
-import re
 import numpy as np
 
+from utils.worker_pool import create_pool_from_env, PoolSaturatedError
+from utils.scheduler import create_scheduler_from_env, PRIORITIES, INTERACTIVE, BULK, DEFAULT_TENANT
+from utils.ocr_cache import create_cache_from_env, OCRResultCache
+from utils.job_queue import (
+    create_job_queue_from_env, webhook_hosts_from_env, validate_webhook_url, deliver_webhook
+)
+from utils.image_decode import decode_image, max_image_pixels_from_env, ImageTooLargeError
+from utils.reader_pool import create_reader_manager_from_env, prewarm_languages_from_env
+from utils.cpu_budget import (
+    configure_torch_threads, torch_threads_per_job, torch_interop_threads, server_processes, available_cpus
+)
+from utils.metrics import Registry, StageTimer
+from utils.self_test import create_self_test_from_env
+from utils.text_postprocess import create_postprocessors_from_env, TENANT_ID_PATTERN
+from utils.chunker import split_chunks
+from utils.tiling import plan_tiles, merge_tile_regions, reading_order
+from utils.image_classify import (
+    classify_image, routing_enabled_from_env, confidence_target_from_env, BLANK, EASY
+)
+from utils.documents import document_kind, count_pages, iter_document_pages, UnsupportedDocumentError
+from utils.ingest import (
+    hash_upload, spool_upload, spool_stream, open_spooled, remove_quietly, declared_too_large, too_large_message,
+    max_upload_bytes_from_env, max_batch_bytes_from_env, UploadLimitMiddleware, UploadTooLargeError
+)
+from utils.preprocess import (
+    preprocess_image, default_level_from_env, oversized, release_buffers, NONE as ENHANCE_NONE
+)
+from utils.inference import engine_mode_from_env, reader_key, split_reader_key, apply_engine_mode
+from utils.language_detect import (
+    AUTO as AUTO_LANGUAGE, TESSERACT_CODES, LANGDETECT_AVAILABLE, LanguageMemo, detect_language,
+    detection_enabled_from_env, auto_languages_from_env, check_language, UnsupportedLanguageError
+)
+from utils.responses import (
+    ResponseShape, FULL_RESPONSE, FastJSONResponse, CompressionMiddleware,
+    compression_middleware_options_from_env, ndjson_line, dumps, ORJSON_AVAILABLE
+)
+from models.ocr_models import OCRRequest, EnhancementLevel, EngineMode, Priority
+
+# Per-request and per-region detail is DEBUG; set OCR_LOG_LEVEL=DEBUG to see it
+logging.basicConfig(
+    level=os.environ.get("OCR_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("ocr")
+
 # Try to import EasyOCR with better error handling
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
-    print("✅ EasyOCR imported successfully")
-    
-    # Initialize readers with better error handling
-    EASYOCR_READERS = {}
-    try:
-        print("🔄 Initializing EasyOCR English reader...")
-        EASYOCR_READERS['en'] = easyocr.Reader(['en'], gpu=False)  # Use CPU first
-        print("✅ EasyOCR English reader initialized successfully")
-        EASYOCR_INIT_SUCCESS = True
-    except Exception as e:
-        print(f"❌ EasyOCR initialization failed: {e}")
-        EASYOCR_INIT_SUCCESS = False
-    
+    logger.info("✅ EasyOCR imported successfully")
 except ImportError as e:
     EASYOCR_AVAILABLE = False
-    EASYOCR_INIT_SUCCESS = False
-    print(f"⚠️ EasyOCR not available: {e}")
+    logger.warning("⚠️ EasyOCR not available: %s", e)
+
+def build_easyocr_reader(key):
+    """Construct a CPU EasyOCR reader for a reader_key ('multi' = English,
+    Spanish and French). EasyOCR's own quantization is off: it silently
+    ignores failures, apply_engine_mode quantizes for fast mode instead."""
+    language, engine_mode = split_reader_key(key)
+    languages = ['en', 'es', 'fr'] if language == 'multi' else [language]
+    reader = easyocr.Reader(languages, gpu=False, quantize=False)
+    return apply_engine_mode(reader, engine_mode)
+
+# Readers are built once per language and engine mode (even under concurrent
+# first requests), kept in a bounded LRU, and prewarmed in the background at startup
+EASYOCR_DEFAULT_LANGUAGE = 'en'
+DEFAULT_ENGINE_MODE = engine_mode_from_env()
+EASYOCR_DEFAULT_READER = reader_key(EASYOCR_DEFAULT_LANGUAGE, DEFAULT_ENGINE_MODE)
+READER_MANAGER = create_reader_manager_from_env(build_easyocr_reader)
+PREWARM_LANGUAGES = prewarm_languages_from_env(EASYOCR_DEFAULT_LANGUAGE)
+PREWARM_READERS = [reader_key(language, DEFAULT_ENGINE_MODE) for language in PREWARM_LANGUAGES]
+
+def easyocr_initialized():
+    """EasyOCR is installed and its default reader has not failed to load"""
+    return EASYOCR_AVAILABLE and READER_MANAGER.state(EASYOCR_DEFAULT_READER) != "failed"
 
 # Try to import OpenCV
 try:
     import cv2
     CV2_AVAILABLE = True
-    print("✅ OpenCV imported successfully")
+    logger.info("✅ OpenCV imported successfully")
 except ImportError:
     CV2_AVAILABLE = False
-    print("⚠️ OpenCV not available (image enhancement disabled)")
+    logger.warning("⚠️ OpenCV not available (image enhancement disabled)")
 
 # Tesseract fallback
 try:
     import pytesseract
     TESSERACT_AVAILABLE = True
-    print("✅ Tesseract imported successfully")
+    logger.info("✅ Tesseract imported successfully")
     
     # Configure Tesseract path for Windows
     if os.name == 'nt':  # Windows
@@ -56,18 +120,148 @@ try:
         for path in tesseract_paths:
             if os.path.exists(path):
                 pytesseract.pytesseract.tesseract_cmd = path
-                print(f"✅ Tesseract found at: {path}")
+                logger.info("✅ Tesseract found at: %s", path)
                 break
                 
 except ImportError:
     TESSERACT_AVAILABLE = False
-    print("❌ Tesseract not available")
+    logger.warning("❌ Tesseract not available")
 
 app = FastAPI(
     title="Fixed OCR Service",
     description="Fixed OCR service with better error handling",
-    version="3.1.0"
+    version="3.1.0",
+    default_response_class=FastJSONResponse
+)
+
+def configure_ocr_threads():
+    """Split this process's share of the cores between pool jobs and torch threads"""
+    threads = torch_threads_per_job(server_processes(), OCR_POOL.max_workers)
+    interop = torch_interop_threads()
+    if configure_torch_threads(threads, interop):
+        logger.info("🧵 torch threads per OCR job: %d intra-op, %d inter-op", threads, interop)
+
+# Blocking OCR work runs here, never on the event loop
+OCR_POOL = create_pool_from_env(initializer=configure_ocr_threads)
+logger.info("✅ OCR worker pool: %d %s workers, queue depth %d",
+            OCR_POOL.max_workers, OCR_POOL.mode, OCR_POOL.max_queue)
+
+# Every OCR job goes through the scheduler: per-tenant weighted fair queueing
+# between interactive and bulk work, handing the pool one job per free worker
+SCHEDULER = create_scheduler_from_env(
+    OCR_POOL, on_dispatch=lambda priority, wait: SCHEDULER_WAIT_SECONDS.observe(wait, priority=priority)
 )
+logger.info("✅ OCR scheduler: %d slots, bulk up to %d, %d per tenant",
+            SCHEDULER.slots, SCHEDULER.bulk_slots, SCHEDULER.tenant_max_running)
+
+# Images are downscaled to fit MAX_IMAGE_SIDE while decoding; anything whose
+# header declares more than MAX_IMAGE_PIXELS is refused (decompression bombs)
+MAX_IMAGE_SIDE = int(os.environ.get("OCR_MAX_IMAGE_SIDE", "1500"))
+MAX_IMAGE_PIXELS = max_image_pixels_from_env()
+
+# Uploads are spooled to disk while they are read, hashed on the way, and
+# cut off past MAX_UPLOAD_BYTES; the pool decodes them from a memory map
+MAX_UPLOAD_BYTES = max_upload_bytes_from_env()
+# /ocr/batch bodies hold many uploads and are capped as a whole
+MAX_BATCH_BYTES = max_batch_bytes_from_env(MAX_UPLOAD_BYTES)
+
+# Opt-in tiled mode (tiled=true) keeps much more resolution for small text on
+# posters and spreadsheets: the image is split into overlapping tiles that are
+# recognized in parallel. Tile threads are shared by all jobs in the process.
+TILED_MAX_IMAGE_SIDE = int(os.environ.get("OCR_TILED_MAX_IMAGE_SIDE", "6000"))
+TILE_SIZE = int(os.environ.get("OCR_TILE_SIZE", "1280"))
+TILE_OVERLAP = int(os.environ.get("OCR_TILE_OVERLAP", "160"))
+TILE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("OCR_TILE_WORKERS", "0")) or max(1, available_cpus() // server_processes()),
+    thread_name_prefix="ocr-tile"
+)
+
+# Multi-page documents (/ocr/document): PDF render resolution and how many
+# pages of one document may be in the pool at once (default: all workers)
+PDF_DPI = int(os.environ.get("OCR_PDF_DPI", "200"))
+DOCUMENT_CONCURRENCY = int(os.environ.get("OCR_DOCUMENT_CONCURRENCY", "0")) or OCR_POOL.max_workers
+
+# Images per engine call on /ocr/batch, and the size bucket used to pad
+# images to a common shape for EasyOCR's batched readtext
+OCR_BATCH_SIZE = max(1, int(os.environ.get("OCR_BATCH_SIZE", "8")))
+EASYOCR_BATCH_BUCKET = 128
+
+# Results keyed on image bytes + options, in memory and on disk
+OCR_CACHE = create_cache_from_env(os.path.dirname(os.path.abspath(__file__)))
+if OCR_CACHE is not None:
+    logger.info("✅ OCR result cache enabled (disk tier: %s)", OCR_CACHE.db_path or 'off')
+
+# Persistent queue behind /jobs, and the job workers each server process runs
+JOB_QUEUE = create_job_queue_from_env(os.path.dirname(os.path.abspath(__file__)))
+JOB_WORKERS = int(os.environ.get("OCR_JOB_WORKERS", "0")) or OCR_POOL.max_workers
+JOB_POLL_SECONDS = float(os.environ.get("OCR_JOB_POLL_SECONDS", "1.0"))
+JOB_WEBHOOK_HOSTS = webhook_hosts_from_env()
+JOB_WORKER_TASKS = []
+
+# Prometheus metrics for /metrics. They are per process: under gunicorn each
+# worker reports its own series.
+METRICS = Registry()
+STAGE_SECONDS = METRICS.histogram(
+    "ocr_stage_duration_seconds", "Time spent in each OCR pipeline stage", ("stage", "engine")
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "ocr_request_duration_seconds", "End-to-end OCR latency per image", ("endpoint", "engine", "outcome")
+)
+REQUESTS_TOTAL = METRICS.counter(
+    "ocr_requests_total", "OCR requests (one per image on /ocr/batch)", ("endpoint", "engine", "outcome")
+)
+METRICS.callback(
+    "ocr_pool_jobs", "Jobs in the OCR worker pool", ("state",),
+    lambda: [((state,), OCR_POOL.stats()[state]) for state in ("running", "queued")]
+)
+METRICS.callback(
+    "ocr_pool_rejected_total", "Jobs refused because the OCR worker pool was full", (),
+    lambda: [((), OCR_POOL.stats()["rejected"])], kind="counter"
+)
+SCHEDULER_WAIT_SECONDS = METRICS.histogram(
+    "ocr_scheduler_wait_seconds", "Time OCR jobs waited in the scheduler", ("priority",)
+)
+METRICS.callback(
+    "ocr_scheduler_jobs", "OCR jobs in the scheduler by priority and state", ("priority", "state"),
+    lambda: [((priority, state), SCHEDULER.stats(tenants=False)[state][priority])
+             for priority in PRIORITIES for state in ("running", "queued")]
+)
+METRICS.callback(
+    "ocr_easyocr_readers_loaded", "EasyOCR readers currently in memory", (),
+    lambda: [((), READER_MANAGER.status()["loaded"])]
+)
+if JOB_QUEUE is not None:
+    METRICS.callback(
+        "ocr_jobs", "Jobs in the persistent queue by status", ("status",),
+        lambda: [((status,), count) for status, count in JOB_QUEUE.stats().items()
+                 if status in ("queued", "running", "done", "failed")]
+    )
+if OCR_CACHE is not None:
+    METRICS.callback(
+        "ocr_cache_lookups_total", "OCR result cache lookups by result", ("result",),
+        lambda: [(("memory_hit",), OCR_CACHE.memory_hits), (("disk_hit",), OCR_CACHE.disk_hits),
+                 (("miss",), OCR_CACHE.misses)],
+        kind="counter"
+    )
+
+def engine_label(ocr_result):
+    """'easyocr' / 'tesseract' for a result, 'none' when nothing ran"""
+    method = (ocr_result or {}).get('method', '')
+    if method.startswith('easyocr'):
+        return 'easyocr'
+    if method.startswith('tesseract'):
+        return 'tesseract'
+    return 'none'
+
+def observe_request(endpoint, outcome, start_time, engine='none', timings=None):
+    """Record one image's stage timings, latency and outcome"""
+    for stage, seconds in (timings or {}).items():
+        stage_engine = engine
+        if stage.startswith('recognize_'):
+            stage, stage_engine = 'recognize', stage[len('recognize_'):]
+        STAGE_SECONDS.observe(seconds, stage=stage, engine=stage_engine)
+    REQUEST_SECONDS.observe(time.time() - start_time, endpoint=endpoint, engine=engine, outcome=outcome)
+    REQUESTS_TOTAL.inc(endpoint=endpoint, engine=engine, outcome=outcome)
 
 # Add CORS middleware
 app.add_middleware(
@@ -78,129 +272,310 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Upload form endpoints and their metrics label; their request bodies are
+# capped while they arrive, before the multipart form is parsed: at
+# MAX_UPLOAD_BYTES, or MAX_BATCH_BYTES for the whole of a batch. /ocr/raw
+# streams its body itself and enforces the limit there.
+UPLOAD_ENDPOINTS = {"/ocr": "ocr", "/ocr/document": "ocr_document", "/jobs": "jobs_submit",
+                    "/ocr/batch": "ocr_batch"}
+
+def upload_too_large_body(error):
+    return dumps({"success": False, "error": error, "text": "", "confidence": 0})
+
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=MAX_UPLOAD_BYTES,
+    paths=UPLOAD_ENDPOINTS,
+    path_max_bytes={"/ocr/batch": MAX_BATCH_BYTES},
+    body_factory=upload_too_large_body,
+    on_reject=lambda path: observe_request(UPLOAD_ENDPOINTS[path], 'too_large', time.time())
+)
+
+# With OCR_RESPONSE_COMPRESSION=zstd,gzip (off by default), JSON and NDJSON
+# responses are compressed for clients that accept it; worth it across a
+# network, not for the Node route on the same host
+app.add_middleware(CompressionMiddleware, **compression_middleware_options_from_env())
+if not ORJSON_AVAILABLE:
+    logger.warning("⚠️ orjson not available (responses encoded with the json module)")
+
+# Shared readtext options so single and batched runs give the same regions
+EASYOCR_READTEXT_OPTIONS = {
+    'paragraph': False,  # Don't group into paragraphs initially
+    'width_ths': 0.7,
+    'height_ths': 0.7,
+    'detail': 1
+}
+
+def get_easyocr_reader(language, engine_mode=DEFAULT_ENGINE_MODE):
+    """Return the EasyOCR reader for a language and engine mode, creating it on first use"""
+    return READER_MANAGER.get(reader_key(language, engine_mode))
+
+def summarize_easyocr_results(results, language, engine_mode=DEFAULT_ENGINE_MODE):
+    """Turn raw EasyOCR regions into the service's OCR result dict"""
+    logger.debug("📄 EasyOCR found %d text regions", len(results))
+    
+    # Process results
+    extracted_text = []
+    total_confidence = 0
+    valid_results = 0
+    log_regions = logger.isEnabledFor(logging.DEBUG)
+    
+    for (bbox, text, confidence) in results:
+        if log_regions:
+            logger.debug("   - Text: %r (confidence: %.3f)", text, confidence)
+        if confidence > 0.3:  # Lower threshold
+            extracted_text.append(text)
+            total_confidence += confidence
+            valid_results += 1
+    
+    # Join text with proper spacing
+    full_text = ' '.join(extracted_text)
+    
+    # Calculate average confidence
+    avg_confidence = (total_confidence / valid_results * 100) if valid_results > 0 else 0
+    
+    logger.debug("✅ EasyOCR completed: %r... (confidence: %.1f%%)", full_text[:50], avg_confidence)
+    
+    return {
+        'success': True,
+        'text': full_text,
+        'confidence': avg_confidence,
+        'method': 'easyocr',
+        'regions_found': len(results),
+        'regions_used': valid_results,
+        'language': language,
+        'engine_mode': engine_mode
+    }
+
+def ensure_rgb_array(image_array):
+    """EasyOCR is fed 3-channel arrays; expand grayscale input"""
+    if len(image_array.shape) == 2:
+        logger.debug("📷 Converting grayscale to RGB")
+        return np.stack([image_array] * 3, axis=-1)
+    return image_array
+
 # 🔧 FIXED: Better EasyOCR Processing Function
-def process_with_easyocr(image_array, language='en'):
+def process_with_easyocr(image_array, language='en', engine_mode=DEFAULT_ENGINE_MODE):
     """Process image with EasyOCR - FIXED VERSION"""
     try:
-        print(f"🎯 EasyOCR processing with language: {language}")
+        logger.debug("🎯 EasyOCR processing with language: %s (%s)", language, engine_mode)
         
         # Ensure we have a working reader
-        if language not in EASYOCR_READERS:
-            print(f"🔄 Creating reader for language: {language}")
-            if language == 'multi':
-                EASYOCR_READERS[language] = easyocr.Reader(['en', 'es', 'fr'], gpu=False)
-            else:
-                EASYOCR_READERS[language] = easyocr.Reader([language], gpu=False)
-        
-        reader = EASYOCR_READERS[language]
-        print("✅ Reader obtained, processing image...")
+        reader = get_easyocr_reader(language, engine_mode)
         
         # Ensure image is in the right format
-        if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-            # RGB format is good
-            print("📷 Image format: RGB")
-        elif len(image_array.shape) == 2:
-            # Grayscale - convert to RGB
-            print("📷 Converting grayscale to RGB")
-            image_array = np.stack([image_array] * 3, axis=-1)
-        
-        print(f"📐 Image shape: {image_array.shape}")
+        image_array = ensure_rgb_array(image_array)
+        logger.debug("🔍 Running EasyOCR text extraction on %s", image_array.shape)
         
         # Extract text with EasyOCR
-        print("🔍 Running EasyOCR text extraction...")
-        results = reader.readtext(
-            image_array,
-            paragraph=False,  # Don't group into paragraphs initially
-            width_ths=0.7,   
-            height_ths=0.7,  
-            detail=1         
-        )
-        
-        print(f"📄 EasyOCR found {len(results)} text regions")
-        
-        # Process results
-        extracted_text = []
-        total_confidence = 0
-        valid_results = 0
-        
-        for (bbox, text, confidence) in results:
-            print(f"   - Text: '{text}' (confidence: {confidence:.3f})")
-            if confidence > 0.3:  # Lower threshold
-                extracted_text.append(text)
-                total_confidence += confidence
-                valid_results += 1
-        
-        # Join text with proper spacing
-        full_text = ' '.join(extracted_text)
+        results = reader.readtext(image_array, **EASYOCR_READTEXT_OPTIONS)
         
-        # Calculate average confidence
-        avg_confidence = (total_confidence / valid_results * 100) if valid_results > 0 else 0
-        
-        print(f"✅ EasyOCR completed: '{full_text[:50]}...' (confidence: {avg_confidence:.1f}%)")
-        
-        return {
-            'success': True,
-            'text': full_text,
-            'confidence': avg_confidence,
-            'method': 'easyocr',
-            'regions_found': len(results),
-            'regions_used': valid_results,
-            'language': language
-        }
+        return summarize_easyocr_results(results, language, engine_mode)
         
     except Exception as e:
-        print(f"❌ EasyOCR processing failed: {str(e)}")
-        print(f"   Exception type: {type(e).__name__}")
+        logger.warning("❌ EasyOCR processing failed: %s (%s)", e, type(e).__name__)
         return {
             'success': False,
             'error': f"EasyOCR failed: {str(e)}",
             'method': 'easyocr_failed'
         }
 
-# 🔧 FIXED: Simpler image preprocessing
-def preprocess_image_simple(image_array):
-    """Simple image preprocessing without OpenCV dependencies"""
+def process_tiled_with_easyocr(image_array, language='en', engine_mode=DEFAULT_ENGINE_MODE):
+    """EasyOCR over overlapping tiles in parallel, merged in reading order.
+
+    Unlike the other paths this keeps every region's bounding box, which is
+    needed to drop seam duplicates and to order lines across tiles.
+    """
     try:
-        # Convert to grayscale if needed
-        if len(image_array.shape) == 3:
-            # Simple RGB to grayscale conversion
-            gray = np.dot(image_array[...,:3], [0.299, 0.587, 0.114])
-            gray = gray.astype(np.uint8)
-        else:
-            gray = image_array.copy()
+        reader = get_easyocr_reader(language, engine_mode)
+        image_array = ensure_rgb_array(image_array)
+        height, width = image_array.shape[:2]
+        tiles = plan_tiles(width, height, TILE_SIZE, TILE_OVERLAP)
+        logger.debug("🧩 EasyOCR on %d tiles of %dx%d", len(tiles), width, height)
         
-        return gray
+        def recognize(tile):
+            x0, y0, x1, y1 = tile
+            tile_array = np.ascontiguousarray(image_array[y0:y1, x0:x1])
+            return reader.readtext(tile_array, **EASYOCR_READTEXT_OPTIONS)
         
+        tile_results = list(TILE_EXECUTOR.map(recognize, tiles))
     except Exception as e:
-        print(f"Preprocessing failed: {e}")
-        return image_array
-
-# Keep your existing text post-processing function (unchanged)
-def post_process_text(text, confidence=0):
-    if not text or not text.strip():
-        return text
-    
-    cleaned = text.strip()
-    
-    if confidence < 90:
-        common_corrections = {
-            r'\brn\b': 'm',
-            r'\bvv\b': 'w',
-            r'\b0(?=[a-zA-Z])': 'O',
-            r'\b1(?=[a-zA-Z])': 'l',
-            r'(?<=[a-zA-Z])0\b': 'o',
-            r'(?<=[a-zA-Z])5(?=[a-zA-Z])': 's',
-            r'\|': 'l',
+        logger.warning("❌ Tiled EasyOCR failed: %s (%s)", e, type(e).__name__)
+        return {
+            'success': False,
+            'error': f"EasyOCR failed: {str(e)}",
+            'method': 'easyocr_failed'
         }
-        
-        for pattern, replacement in common_corrections.items():
-            cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
     
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    cleaned = re.sub(r'\s+([,.!?;:])', r'\1', cleaned)
-    cleaned = re.sub(r'([,.!?;:])\s*', r'\1 ', cleaned)
+    regions = merge_tile_regions(tiles, tile_results, width, height)
+    used = [region for region in regions if region['confidence'] > 0.3]
+    lines = reading_order(used)
+    full_text = '\n'.join(' '.join(region['text'] for region in line) for line in lines)
+    avg_confidence = sum(region['confidence'] for region in used) / len(used) * 100 if used else 0
+    
+    return {
+        'success': True,
+        'text': full_text,
+        'confidence': avg_confidence,
+        'method': 'easyocr_tiled',
+        'regions_found': len(regions),
+        'regions_used': len(used),
+        'regions': [region for line in lines for region in line],
+        'tiles': len(tiles),
+        'language': language,
+        'engine_mode': engine_mode
+    }
+
+def process_batch_with_easyocr(image_arrays, language='en', engine_mode=DEFAULT_ENGINE_MODE):
+    """Process several images with one batched EasyOCR call per size bucket.
+
+    readtext_batched needs equally sized inputs, so images are bucketed by
+    size and padded with white on the bottom/right to the bucket maximum.
+    Padding does not move any region, and the bucket granularity keeps the
+    extra detector area small. Returns one result dict per input image.
+    """
+    try:
+        reader = get_easyocr_reader(language, engine_mode)
+    except Exception as e:
+        logger.warning("❌ EasyOCR reader unavailable: %s", e)
+        return [{
+            'success': False,
+            'error': f"EasyOCR failed: {str(e)}",
+            'method': 'easyocr_failed'
+        } for _ in image_arrays]
+    
+    image_arrays = [ensure_rgb_array(arr) for arr in image_arrays]
+    
+    buckets = {}
+    for index, arr in enumerate(image_arrays):
+        height, width = arr.shape[:2]
+        key = (-(-height // EASYOCR_BATCH_BUCKET), -(-width // EASYOCR_BATCH_BUCKET))
+        buckets.setdefault(key, []).append(index)
+    
+    results = [None] * len(image_arrays)
+    for indices in buckets.values():
+        if len(indices) == 1:
+            results[indices[0]] = process_with_easyocr(image_arrays[indices[0]], language, engine_mode)
+            continue
+        
+        max_height = max(image_arrays[i].shape[0] for i in indices)
+        max_width = max(image_arrays[i].shape[1] for i in indices)
+        batch = np.full((len(indices), max_height, max_width, 3), 255, dtype=np.uint8)
+        for slot, i in enumerate(indices):
+            height, width = image_arrays[i].shape[:2]
+            batch[slot, :height, :width] = image_arrays[i]
+        
+        try:
+            logger.debug("🔍 Running batched EasyOCR on %d images (%dx%d)", len(indices), max_width, max_height)
+            batch_results = reader.readtext_batched(batch, **EASYOCR_READTEXT_OPTIONS)
+            for slot, i in enumerate(indices):
+                results[i] = summarize_easyocr_results(batch_results[slot], language, engine_mode)
+        except Exception as e:
+            logger.warning("❌ Batched EasyOCR failed: %s, processing images one by one", e)
+            for i in indices:
+                results[i] = process_with_easyocr(image_arrays[i], language, engine_mode)
     
-    return cleaned.strip()
+    return results
+
+# Compiled once; tenants can add rules in OCR_TENANT_RULES_DIR/<tenant_id>.json
+TEXT_POSTPROCESSORS = create_postprocessors_from_env(os.path.dirname(os.path.abspath(__file__)))
+
+def post_process_text(text, confidence=0, tenant_id=None):
+    """Fix common misreads (below 90% confidence) and normalize whitespace"""
+    return TEXT_POSTPROCESSORS.get(tenant_id)(text, confidence)
+
+# Preprocessing applied when a request sets enhance=true without a level
+DEFAULT_ENHANCEMENT_LEVEL = default_level_from_env()
+
+def enhancement_options(enhance=True, enhancement_level=None):
+    """Preprocessing level for a request: none when enhance is off, else the
+    requested EnhancementLevel or OCR_ENHANCEMENT_LEVEL (raises ValueError)"""
+    if not enhance:
+        return ENHANCE_NONE
+    if not enhancement_level:
+        return DEFAULT_ENHANCEMENT_LEVEL
+    try:
+        return EnhancementLevel(enhancement_level.lower()).value
+    except ValueError:
+        raise ValueError(f"enhancement_level must be one of: {', '.join(level.value for level in EnhancementLevel)}")
+
+def engine_mode_option(engine_mode=None):
+    """EasyOCR engine mode for a request: the requested EngineMode or
+    OCR_ENGINE_MODE (raises ValueError)"""
+    if not engine_mode:
+        return DEFAULT_ENGINE_MODE
+    try:
+        return EngineMode(engine_mode.lower()).value
+    except ValueError:
+        raise ValueError(f"engine_mode must be one of: {', '.join(mode.value for mode in EngineMode)}")
+
+def priority_option(priority=None, default=INTERACTIVE):
+    """Scheduling class for a request: the requested Priority or the
+    endpoint's ``default`` (raises ValueError)"""
+    if not priority:
+        return default
+    try:
+        return Priority(priority.lower()).value
+    except ValueError:
+        raise ValueError(f"priority must be one of: {', '.join(p.value for p in Priority)}")
+
+def tenant_option(tenant_id=None):
+    """The request's tenant_id, checked against TENANT_ID_PATTERN whether or
+    not tenant rules are configured: it keys scheduler state, job dedup and
+    language memos (raises ValueError)"""
+    if not tenant_id:
+        return None
+    if not TENANT_ID_PATTERN.fullmatch(tenant_id):
+        raise ValueError(f"Invalid tenant_id: {tenant_id!r} (1-64 letters, digits, '_' or '-')")
+    return tenant_id
+
+def chunking_options(chunk_text=True, chunk_size=800, chunk_overlap=0):
+    """Chunk settings validated against OCRRequest's limits (raises ValidationError)"""
+    return OCRRequest(chunk_text=chunk_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+DEFAULT_CHUNKING = chunking_options()
+
+def validation_error_message(error):
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'request'}: {e['msg']}" for e in error.errors())
+
+def invalid_request_response(error, status_code=400):
+    """400, or 422 for options outside OCRRequest's limits or an unsupported
+    language (as FastAPI answers for invalid parameters)"""
+    return JSONResponse(status_code=status_code, content={
+        "success": False,
+        "error": error,
+        "text": "",
+        "confidence": 0
+    })
+
+# Under gunicorn (gunicorn.conf.py sets OCR_PRELOAD_MODELS with preload_app)
+# the readers load here, in the master, before the workers are forked, so all
+# workers share the model weights copy-on-write instead of loading their own
+if EASYOCR_AVAILABLE and PREWARM_LANGUAGES and os.environ.get("OCR_PRELOAD_MODELS") == "1":
+    logger.info("📦 Preloading EasyOCR readers before fork: %s", ', '.join(PREWARM_READERS))
+    READER_MANAGER.prewarm(PREWARM_READERS, background=False)
+
+@app.on_event("startup")
+def configure_worker_threads():
+    if OCR_POOL.mode == "thread":
+        configure_ocr_threads()
+
+@app.on_event("startup")
+def prewarm_easyocr_readers():
+    # Don't block startup on model loading; /health reports per-language state
+    if EASYOCR_AVAILABLE and PREWARM_LANGUAGES:
+        logger.info("🔥 Prewarming EasyOCR readers in background: %s", ', '.join(PREWARM_READERS))
+        READER_MANAGER.prewarm(PREWARM_READERS)
+
+@app.on_event("startup")
+def start_self_test():
+    SELF_TEST.start()
+
+@app.on_event("shutdown")
+def shutdown_worker_pool():
+    SELF_TEST.stop()
+    OCR_POOL.shutdown()
+    TILE_EXECUTOR.shutdown(wait=False)
 
 @app.get("/")
 def read_root():
@@ -208,77 +583,893 @@ def read_root():
         "message": "Fixed OCR Service is running!", 
         "status": "healthy",
         "easyocr_available": EASYOCR_AVAILABLE,
-        "easyocr_initialized": EASYOCR_INIT_SUCCESS,
+        "easyocr_initialized": easyocr_initialized(),
+        "easyocr_readers": READER_MANAGER.status()["languages"],
         "tesseract_available": TESSERACT_AVAILABLE,
         "opencv_available": CV2_AVAILABLE,
         "version": "3.1.0-fixed"
     }
 
-@app.get("/health")
-def health_check():
-    """Comprehensive health check"""
+def easyocr_self_test():
+    """Run the default reader on a synthetic image; (None, state) if it isn't loaded"""
+    default_reader = READER_MANAGER.peek(EASYOCR_DEFAULT_READER)
+    if default_reader is None:
+        if not EASYOCR_AVAILABLE:
+            return None, "not_available"
+        state = READER_MANAGER.state(EASYOCR_DEFAULT_READER)
+        if state == "failed":
+            return False, "available but initialization failed"
+        return None, state
     
-    # Test EasyOCR
-    easyocr_status = "not_available"
-    if EASYOCR_AVAILABLE and EASYOCR_INIT_SUCCESS:
-        try:
-            # Create a simple test image with text
-            test_image = np.ones((100, 300, 3), dtype=np.uint8) * 255
-            # Add some simple text-like pattern
-            test_image[40:60, 50:250] = 0  # Black rectangle (simulated text)
-            
-            result = EASYOCR_READERS['en'].readtext(test_image)
-            easyocr_status = f"working ({len(result)} regions detected)"
-        except Exception as e:
-            easyocr_status = f"error: {str(e)}"
-    elif EASYOCR_AVAILABLE:
-        easyocr_status = "available but initialization failed"
+    # Create a simple test image with text
+    test_image = np.ones((100, 300, 3), dtype=np.uint8) * 255
+    # Add some simple text-like pattern
+    test_image[40:60, 50:250] = 0  # Black rectangle (simulated text)
     
-    # Test Tesseract
-    tesseract_status = "not_available"
+    result = default_reader.readtext(test_image)
+    return True, f"working ({len(result)} regions detected)"
+
+def tesseract_self_test():
+    if not TESSERACT_AVAILABLE:
+        return None, "not_available"
+    test_image = Image.new('RGB', (100, 30), color='white')
+    pytesseract.image_to_string(test_image)
+    return True, "working"
+
+# Engine self-tests run every OCR_SELF_TEST_INTERVAL seconds in the
+# background; probes read the cached outcome instead of running OCR
+SELF_TEST = create_self_test_from_env({
+    "easyocr": easyocr_self_test,
+    "tesseract": tesseract_self_test
+})
+
+def engine_readiness():
+    """Per-engine readiness from model-load state and the last self-test"""
+    results = SELF_TEST.results()
+    engines = {}
+    
+    def readiness(name, loaded, reason):
+        if not loaded:
+            return {"ready": False, "reason": reason}
+        if not SELF_TEST.running:
+            return {"ready": True, "reason": "self-test disabled"}
+        result = results.get(name)
+        if result is None or result["ok"] is None:
+            # Loaded since the last run; test it now rather than at the next interval
+            SELF_TEST.trigger()
+            return {"ready": False, "reason": "self-test pending"}
+        return {
+            "ready": result["ok"],
+            "reason": result["status"],
+            "checked_s_ago": round(time.time() - result["checked_at"], 1)
+        }
+    
+    if EASYOCR_AVAILABLE:
+        state = READER_MANAGER.state(EASYOCR_DEFAULT_READER)
+        if state == "evicted":
+            # Passed before it was evicted; the next request reloads it
+            engines["easyocr"] = {"ready": True, "reason": "evicted, reloads on demand"}
+        else:
+            engines["easyocr"] = readiness("easyocr", state == "ready", state)
     if TESSERACT_AVAILABLE:
-        try:
-            test_image = Image.new('RGB', (100, 30), color='white')
-            pytesseract.image_to_string(test_image)
-            tesseract_status = "working"
-        except Exception as e:
-            tesseract_status = f"error: {str(e)}"
+        engines["tesseract"] = readiness("tesseract", True, "available")
+    return engines
+
+@app.get("/livez")
+def liveness():
+    """Process is up and serving requests; never touches the engines"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readiness_check():
+    """Ready once at least one engine is loaded and passed its last self-test"""
+    engines = engine_readiness()
+    ready = any(engine["ready"] for engine in engines.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "engines": engines}
+    )
+
+@app.get("/health")
+def health_check(deep: bool = False):
+    """Comprehensive health check.
+    
+    Engine statuses come from the cached background self-test; pass
+    ?deep=true to run the self-test now (costs a real OCR call per engine).
+    """
+    results = SELF_TEST.run_now() if deep else SELF_TEST.results()
+    
+    def engine_status(name):
+        result = results.get(name)
+        return result["status"] if result is not None else "not_checked"
     
     return {
         "status": "healthy",
         "service": "Fixed OCR Service",
-        "easyocr_status": easyocr_status,
-        "tesseract_status": tesseract_status,
+        "easyocr_status": engine_status("easyocr"),
+        "tesseract_status": engine_status("tesseract"),
         "opencv_status": "available" if CV2_AVAILABLE else "not_available",
         "version": "3.1.0-fixed",
         "port": 8002,
+        "ready": any(engine["ready"] for engine in engine_readiness().values()),
+        "self_test": {
+            "interval_s": SELF_TEST.interval,
+            "deep": deep,
+            "results": results
+        },
+        "worker_pool": OCR_POOL.stats(),
+        "scheduler": SCHEDULER.stats(tenants=False),
+        "easyocr_readers": READER_MANAGER.status(),
+        "cache": OCR_CACHE.stats() if OCR_CACHE is not None else None,
+        "language_detection": {
+            "enabled": LANGUAGE_DETECTION,
+            "langdetect_available": LANGDETECT_AVAILABLE,
+            "languages": AUTO_LANGUAGES,
+            "memo": LANGUAGE_MEMO.stats()
+        },
         "recommendations": [
             "EasyOCR works better with clear, high-contrast text",
             "Try different enhancement levels if OCR fails",
-            "Use 'en' language for English text instead of 'auto'"
+            "Use language=auto with a document_id when the language is unknown, instead of 'multi'"
         ]
     }
 
+def prepare_image(image_source, enhancement_level, timer, max_side=MAX_IMAGE_SIDE):
+    """Decode, resize and preprocess an image: upload bytes, the path of a
+    spooled upload or an upload file object hashed in place (decoded from a
+    memory map, never read into a bytes copy), or a PIL image such as a
+    document page.
+
+    'processed_image' is what both engines read: the decoded RGB array for
+    level none, else the preprocessed grayscale (utils/preprocess.py).
+    """
+    if isinstance(image_source, (str, tempfile.SpooledTemporaryFile)):
+        with open_spooled(image_source) as view:
+            return prepare_image(view, enhancement_level, timer, max_side)
+    source = io.BytesIO(image_source) if isinstance(image_source, bytes) else image_source
+    # Downscale while decoding (EasyOCR works better with reasonable sizes)
+    image, image_array, original_size, decode_scale = decode_image(
+        source, max_side=max_side, max_pixels=MAX_IMAGE_PIXELS, timer=timer
+    )
+    if image.size != original_size:
+        logger.debug("📏 Decoded %s at 1/%d and resized to: %s", original_size, decode_scale, image.size)
+    
+    processed_image = image_array
+    enhancement = {'level': ENHANCE_NONE}
+    if enhancement_level != ENHANCE_NONE:
+        with timer.stage('preprocess'):
+            try:
+                processed_image, enhancement = preprocess_image(image_array, enhancement_level)
+            except Exception as e:
+                logger.warning("⚠️  Preprocessing failed: %s, using original", e)
+                enhancement = {'level': ENHANCE_NONE, 'error': str(e)}
+            finally:
+                # A tiled-mode page: don't keep what it grew this thread's scratch to
+                if oversized(image_array.shape):
+                    release_buffers()
+    
+    return {
+        'image': image,
+        'image_array': image_array,
+        'processed_image': processed_image,
+        'enhancement': enhancement,
+        'original_size': original_size,
+        'processed_size': image.size
+    }
+
+def resolve_ocr_method(method):
+    """Pick the engine for method='auto' from what is installed"""
+    if method != "auto":
+        return method
+    if easyocr_initialized():
+        return "easyocr"
+    if TESSERACT_AVAILABLE:
+        return "tesseract"
+    return "none"
+
+def tesseract_input(prepared):
+    """Image handed to Tesseract: the preprocessed grayscale when available"""
+    processed_image = prepared['processed_image']
+    if len(processed_image.shape) == 2:
+        return Image.fromarray(processed_image, 'L')
+    return prepared['image']
+
+# method=auto pre-pass: skip images without text, read clean ones with
+# Tesseract and only escalate to EasyOCR below the confidence target
+AUTO_ROUTING = routing_enabled_from_env()
+ROUTE_CONFIDENCE_TARGET = confidence_target_from_env()
+
+# language=auto: a cheap pass over a copy of at most LANGUAGE_DETECTION_SIDE
+# px picks one single-language reader; confident answers are remembered per
+# (tenant, document) so later pages of a document skip the pass
+LANGUAGE_DETECTION = detection_enabled_from_env()
+AUTO_LANGUAGES = auto_languages_from_env()
+LANGUAGE_DETECTION_SIDE = int(os.environ.get("OCR_LANGUAGE_DETECTION_SIDE", "1000"))
+LANGUAGE_MEMO = LanguageMemo(int(os.environ.get("OCR_LANGUAGE_MEMO_SIZE", "10000")))
+
+@functools.lru_cache(maxsize=1)
+def tesseract_languages():
+    """Traineddata installed for Tesseract (empty when it can't be listed)"""
+    try:
+        return frozenset(pytesseract.get_languages(config=''))
+    except Exception as e:
+        logger.warning("⚠️ Could not list Tesseract languages: %s", e)
+        return frozenset()
+
+def osd_script(sample):
+    """(script, confidence) from Tesseract OSD, or (None, 0) when it can't tell"""
+    try:
+        osd = pytesseract.image_to_osd(sample, output_type=pytesseract.Output.DICT)
+        return osd.get('script'), float(osd.get('script_conf', 0))
+    except Exception as e:
+        logger.debug("🔤 OSD found no script: %s", e)
+        return None, 0.0
+
+def detect_image_language(prepared, ocr_method):
+    """Language for language=auto from a cheap pass over a downscaled copy
+    of the image (utils/language_detect.py). Only languages the engine that
+    will read the image has models for are candidates."""
+    sample = Image.fromarray(prepared['processed_image'])
+    sample.thumbnail((LANGUAGE_DETECTION_SIDE, LANGUAGE_DETECTION_SIDE))
+    
+    installed = tesseract_languages() if TESSERACT_AVAILABLE else frozenset()
+    easyocr_ready = ocr_method == "easyocr" and easyocr_initialized()
+    if easyocr_ready:
+        candidates = AUTO_LANGUAGES
+    else:
+        candidates = [language for language in AUTO_LANGUAGES if TESSERACT_CODES[language] in installed]
+    
+    read_script = (lambda: osd_script(sample)) if 'osd' in installed else None
+    read_text = None
+    if TESSERACT_AVAILABLE:
+        read_text = lambda: process_with_tesseract(sample, 'en').get('text', '')
+    elif easyocr_ready:
+        read_text = lambda: process_with_easyocr(np.asarray(sample), 'en', DEFAULT_ENGINE_MODE).get('text', '')
+    
+    detection = detect_language(read_script, read_text, candidates, EASYOCR_DEFAULT_LANGUAGE)
+    logger.debug("🔤 Detected language %s (%s)", detection['language'], detection['source'])
+    return detection
+
+def group_by_language(indices, languages):
+    """{language: [index, ...]} keeping the order of ``indices``"""
+    groups = {}
+    for i in indices:
+        groups.setdefault(languages[i], []).append(i)
+    return groups
+
+def memo_language(language, tenant_id, document_id):
+    """language=auto replaced by the language already detected for this
+    tenant's document, when there is one"""
+    if language != AUTO_LANGUAGE or not LANGUAGE_DETECTION:
+        return language
+    return LANGUAGE_MEMO.get(tenant_id or DEFAULT_TENANT, document_id) or language
+
+def remember_language(pipeline, language, run_language, tenant_id, document_id):
+    """Record how language=auto was resolved for a finished pipeline: from
+    the memo (the run got a concrete language), or by its own detection,
+    which the memo keeps for the document's later pages"""
+    if language != AUTO_LANGUAGE:
+        return
+    if run_language != language:
+        pipeline['language_detection'] = {'language': run_language, 'source': 'document'}
+    else:
+        LANGUAGE_MEMO.put(tenant_id or DEFAULT_TENANT, document_id, pipeline.get('language_detection'))
+
+def classify_route(prepared, method, timer):
+    """Route info for method=auto ({'route', 'engines', 'escalated',
+    'features'}), or None when routing is off or the method is explicit"""
+    if method != "auto" or not AUTO_ROUTING:
+        return None
+    with timer.stage('classify'):
+        route, features = classify_image(prepared['image_array'])
+    return {'route': route, 'engines': [], 'escalated': False, 'features': features}
+
+def blank_result(language):
+    """Result for an image the pre-pass found no text in"""
+    return {
+        'success': True,
+        'text': '',
+        'confidence': 0,
+        'method': 'skipped_blank',
+        'regions_found': 0,
+        'regions_used': 0,
+        'language': language
+    }
+
+def meets_confidence_target(ocr_result):
+    return bool(ocr_result and ocr_result.get('success') and ocr_result.get('text', '').strip()
+                and ocr_result.get('confidence', 0) >= ROUTE_CONFIDENCE_TARGET)
+
+# 🔧 Blocking part of /ocr: decode, preprocess and recognize.
+# Runs on OCR_POOL so a slow image never stalls the event loop.
+def run_ocr_pipeline(image_source, language, enhancement_level, method, tiled=False,
+                     engine_mode=DEFAULT_ENGINE_MODE):
+    """Decode, preprocess and OCR one image (blocking, runs in the worker pool).
+
+    ``image_source`` is anything prepare_image takes; a spooled upload's path
+    keeps the bytes out of the request handler and, in process mode, out of
+    the pickled call.
+
+    Stage timings come back in the result's 'timings' dict (seconds) rather
+    than being recorded here, so they survive the process executor.
+    """
+    timer = StageTimer()
+    prepared = prepare_image(image_source, enhancement_level, timer,
+                             max_side=TILED_MAX_IMAGE_SIDE if tiled else MAX_IMAGE_SIDE)
+    
+    # Determine OCR method
+    ocr_method = resolve_ocr_method(method)
+    route = classify_route(prepared, method, timer)
+    logger.debug("🔍 Using OCR method: %s (route: %s)", ocr_method, route and route['route'])
+    
+    language_detection = None
+    if language == AUTO_LANGUAGE and LANGUAGE_DETECTION and not (route and route['route'] == BLANK):
+        with timer.stage('detect_language'):
+            language_detection = detect_image_language(prepared, ocr_method)
+        language = language_detection['language']
+    
+    ocr_result = None
+    tesseract_tried = False
+    easyocr_ready = ocr_method == "easyocr" and easyocr_initialized()
+    
+    if route and route['route'] == BLANK:
+        ocr_result = blank_result(language)
+    elif route and route['route'] == EASY and TESSERACT_AVAILABLE and not tiled:
+        # Clean text on a flat background: the fast engine first
+        with timer.stage('recognize_tesseract'):
+            ocr_result = process_with_tesseract(tesseract_input(prepared), language)
+        tesseract_tried = True
+        route['engines'].append('tesseract')
+        route['escalated'] = easyocr_ready and not meets_confidence_target(ocr_result)
+    
+    # Try EasyOCR
+    if easyocr_ready and (ocr_result is None or (route and route['escalated'])):
+        ocr_lang = 'en' if language in ['auto', 'eng'] else language
+        with timer.stage('recognize_easyocr'):
+            if tiled:
+                easyocr_result = process_tiled_with_easyocr(prepared['processed_image'], ocr_lang, engine_mode)
+            else:
+                easyocr_result = process_with_easyocr(prepared['processed_image'], ocr_lang, engine_mode)
+        if route:
+            route['engines'].append('easyocr')
+        # An escalation keeps the Tesseract reading if EasyOCR fails
+        if easyocr_result.get('success') or ocr_result is None:
+            ocr_result = easyocr_result
+        
+    # Fallback to Tesseract
+    if (not ocr_result or not ocr_result.get('success')) and TESSERACT_AVAILABLE and not tesseract_tried:
+        logger.debug("🔄 Falling back to Tesseract...")
+        with timer.stage('recognize_tesseract'):
+            ocr_result = process_with_tesseract(tesseract_input(prepared), language)
+        if route:
+            route['engines'].append('tesseract')
+    
+    return {
+        'ocr_result': ocr_result,
+        'original_size': prepared['original_size'],
+        'processed_size': prepared['processed_size'],
+        'enhancement': prepared['enhancement'],
+        'ocr_method': ocr_method,
+        'route': route,
+        'language_detection': language_detection,
+        'timings': timer.timings
+    }
+
+def run_ocr_batch(images, language, enhancement_level, method, engine_mode=DEFAULT_ENGINE_MODE):
+    """Batched run_ocr_pipeline: one EasyOCR batch and one Tesseract process
+    for all images that need them (per language with language=auto, which
+    is detected per image). Returns a pipeline dict (or an 'error' dict for
+    undecodable images) per input, in order. Batched recognition time is
+    split evenly across the images that took part in it."""
+    outputs = [None] * len(images)
+    prepared = {}
+    timers = {}
+    for index, image_source in enumerate(images):
+        timer = StageTimer()
+        try:
+            prepared[index] = prepare_image(image_source, enhancement_level, timer)
+            timers[index] = timer
+        except Exception as e:
+            logger.warning("❌ Could not decode batch image %d: %s", index, e)
+            outputs[index] = {'error': f"Could not decode image: {str(e)}"}
+    
+    ocr_method = resolve_ocr_method(method)
+    logger.debug("🔍 Using OCR method: %s for %d images", ocr_method, len(prepared))
+    
+    def share_time(stage, indices, started):
+        share = (time.perf_counter() - started) / len(indices)
+        for i in indices:
+            timers[i].timings[stage] = timers[i].timings.get(stage, 0.0) + share
+    
+    easyocr_ready = ocr_method == "easyocr" and easyocr_initialized()
+    routes = {i: classify_route(prepared[i], method, timers[i]) for i in prepared}
+    ocr_results = {}
+    tesseract_tried = set()
+    
+    languages = dict.fromkeys(prepared, language)
+    detections = {}
+    for i, route in routes.items():
+        if route and route['route'] == BLANK:
+            ocr_results[i] = blank_result(language)
+        elif language == AUTO_LANGUAGE and LANGUAGE_DETECTION:
+            with timers[i].stage('detect_language'):
+                detections[i] = detect_image_language(prepared[i], ocr_method)
+            languages[i] = detections[i]['language']
+    
+    # Clean images go to Tesseract first; below the target they are escalated
+    easy = [i for i, route in routes.items() if route and route['route'] == EASY]
+    if easy and TESSERACT_AVAILABLE:
+        for group_language, group in group_by_language(easy, languages).items():
+            started = time.perf_counter()
+            tesseract_results = process_batch_with_tesseract(
+                [tesseract_input(prepared[i]) for i in group], group_language
+            )
+            share_time('recognize_tesseract', group, started)
+            for i, result in zip(group, tesseract_results):
+                ocr_results[i] = result
+                tesseract_tried.add(i)
+                routes[i]['engines'].append('tesseract')
+                routes[i]['escalated'] = easyocr_ready and not meets_confidence_target(result)
+    
+    indices = [i for i in prepared if i not in ocr_results or (routes[i] and routes[i]['escalated'])]
+    if easyocr_ready and indices:
+        for group_language, group in group_by_language(indices, languages).items():
+            ocr_lang = 'en' if group_language in ['auto', 'eng'] else group_language
+            started = time.perf_counter()
+            batch_results = process_batch_with_easyocr(
+                [prepared[i]['processed_image'] for i in group], ocr_lang, engine_mode
+            )
+            share_time('recognize_easyocr', group, started)
+            for i, result in zip(group, batch_results):
+                if routes[i]:
+                    routes[i]['engines'].append('easyocr')
+                # An escalation keeps the Tesseract reading if EasyOCR fails
+                if result.get('success') or i not in ocr_results:
+                    ocr_results[i] = result
+    
+    fallback = [i for i in prepared
+                if not ocr_results.get(i, {}).get('success') and i not in tesseract_tried]
+    if fallback and TESSERACT_AVAILABLE:
+        logger.debug("🔄 Falling back to Tesseract for %d images...", len(fallback))
+        for group_language, group in group_by_language(fallback, languages).items():
+            started = time.perf_counter()
+            tesseract_results = process_batch_with_tesseract(
+                [tesseract_input(prepared[i]) for i in group], group_language
+            )
+            share_time('recognize_tesseract', group, started)
+            ocr_results.update(zip(group, tesseract_results))
+            for i in group:
+                if routes[i]:
+                    routes[i]['engines'].append('tesseract')
+    
+    for index, item in prepared.items():
+        outputs[index] = {
+            'ocr_result': ocr_results.get(index),
+            'original_size': item['original_size'],
+            'processed_size': item['processed_size'],
+            'enhancement': item['enhancement'],
+            'ocr_method': ocr_method,
+            'route': routes[index],
+            'language_detection': detections.get(index),
+            'timings': timers[index].timings
+        }
+    return outputs
+
+TESSERACT_CONFIG = r'--oem 3 --psm 6'
+
+def tesseract_language(language):
+    """Tesseract traineddata name for an EasyOCR-style code ('es' -> 'spa')"""
+    if language == AUTO_LANGUAGE:
+        return 'eng'
+    return TESSERACT_CODES.get(language, language)
+
+def tesseract_pages_from_data(data, page_count=1):
+    """Rebuild text and word confidences from one image_to_data pass.
+
+    Words (level 5) are joined with spaces, lines with newlines and
+    paragraphs with a blank line, matching image_to_string's layout, so a
+    single recognition run gives both the text and its confidences. Returns
+    one (text, word_confidences) pair per page.
+    """
+    pages = [[] for _ in range(page_count)]  # paragraphs -> lines -> words
+    page_confidences = [[] for _ in range(page_count)]
+    last_keys = [(None, None) for _ in range(page_count)]
+    
+    for i, word in enumerate(data['text']):
+        if int(data['level'][i]) != 5:
+            continue
+        word = word.strip() if isinstance(word, str) else str(word).strip()
+        if not word:
+            continue
+        page = int(data['page_num'][i]) - 1
+        if not 0 <= page < page_count:
+            continue
+        
+        paragraph_key = (data['block_num'][i], data['par_num'][i])
+        line_key = paragraph_key + (data['line_num'][i],)
+        last_paragraph, last_line = last_keys[page]
+        if paragraph_key != last_paragraph:
+            pages[page].append([[]])
+        elif line_key != last_line:
+            pages[page][-1].append([])
+        last_keys[page] = (paragraph_key, line_key)
+        
+        pages[page][-1][-1].append(word)
+        page_confidences[page].append(float(data['conf'][i]))
+    
+    return [(
+        '\n\n'.join('\n'.join(' '.join(line) for line in paragraph) for paragraph in paragraphs),
+        confidences
+    ) for paragraphs, confidences in zip(pages, page_confidences)]
+
+def tesseract_result(text, word_confidences, tesseract_lang):
+    """OCR result dict from rebuilt Tesseract text and per-word confidences"""
+    # Tesseract reports -1 for words it could not score
+    scored = [conf for conf in word_confidences if conf > 0]
+    avg_confidence = sum(scored) / len(scored) if scored else 0
+    return {
+        'success': True,
+        'text': text,
+        'confidence': avg_confidence,
+        'word_confidences': word_confidences,
+        'method': 'tesseract_fallback',
+        'regions_found': len(word_confidences),
+        'regions_used': len(scored),
+        'language': tesseract_lang
+    }
+
+def process_with_tesseract(pil_image, language='eng'):
+    """Process image with Tesseract (one recognition pass for text and confidence)"""
+    try:
+        tesseract_lang = tesseract_language(language)
+        
+        data = pytesseract.image_to_data(pil_image, lang=tesseract_lang, config=TESSERACT_CONFIG,
+                                       output_type=pytesseract.Output.DICT)
+        text, word_confidences = tesseract_pages_from_data(data)[0]
+        result = tesseract_result(text, word_confidences, tesseract_lang)
+        
+        logger.debug("✅ Tesseract completed: confidence %.1f%%", result['confidence'])
+        return result
+        
+    except Exception as e:
+        logger.warning("❌ Tesseract also failed: %s", e)
+        return {
+            'success': False,
+            'error': f"Tesseract failed: {str(e)}",
+            'method': 'tesseract_failed'
+        }
+
+def process_batch_with_tesseract(pil_images, language='eng'):
+    """Process several images in one Tesseract process.
+
+    Tesseract accepts a text file listing image paths and treats each image
+    as a page, so the engine, language data and config are set up once for
+    the whole batch instead of once per image. Pages are split back apart by
+    page_num.
+    """
+    if len(pil_images) == 1:
+        return [process_with_tesseract(pil_images[0], language)]
+    
+    tesseract_lang = tesseract_language(language)
+    try:
+        with tempfile.TemporaryDirectory(prefix='ocr_batch_') as batch_dir:
+            paths = []
+            for index, pil_image in enumerate(pil_images):
+                path = os.path.join(batch_dir, f"page_{index:04d}.png")
+                pil_image.save(path, format='PNG')
+                paths.append(path)
+            
+            list_path = os.path.join(batch_dir, 'pages.txt')
+            with open(list_path, 'w') as f:
+                f.write('\n'.join(paths) + '\n')
+            
+            data = pytesseract.image_to_data(list_path, lang=tesseract_lang, config=TESSERACT_CONFIG,
+                                           output_type=pytesseract.Output.DICT)
+        
+        pages = tesseract_pages_from_data(data, page_count=len(pil_images))
+        logger.debug("✅ Tesseract batch completed for %d images", len(pil_images))
+        return [tesseract_result(text, word_confidences, tesseract_lang)
+                for text, word_confidences in pages]
+    
+    except Exception as e:
+        logger.warning("❌ Tesseract batch failed: %s, processing images one by one", e)
+        return [process_with_tesseract(pil_image, language) for pil_image in pil_images]
+
+def busy_response(retry_after):
+    """Fast 503 telling the caller to back off instead of waiting on a full pool"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "success": False,
+            "error": "OCR service is busy, retry later",
+            "text": "",
+            "confidence": 0,
+            "retry_after": retry_after
+        }
+    )
+
+def build_failure_response(start_time, original_size, ocr_method):
+    """Response for an image no engine could read"""
+    error_msg = "All OCR methods failed"
+    if not EASYOCR_AVAILABLE:
+        error_msg += " (EasyOCR not installed)"
+    elif not easyocr_initialized():
+        error_msg += " (EasyOCR initialization failed)"
+    if not TESSERACT_AVAILABLE:
+        error_msg += " (Tesseract not installed)"
+    
+    logger.warning("❌ %s", error_msg)
+    return {
+        "success": False,
+        "error": error_msg,
+        "text": "",
+        "confidence": 0,
+        "processing_time": round(time.time() - start_time, 3),
+        "debug_info": {
+            "easyocr_available": EASYOCR_AVAILABLE,
+            "easyocr_initialized": easyocr_initialized(),
+            "tesseract_available": TESSERACT_AVAILABLE,
+            "image_size": original_size,
+            "method_attempted": ocr_method
+        }
+    }
+
+def build_ocr_response(pipeline, start_time, filename, file_size,
+                       language, enhance, post_process, post_processor=None,
+                       chunking=DEFAULT_CHUNKING):
+    """Post-process and chunk the OCR text into the /ocr response body.
+
+    The post_process and chunking stages are added to pipeline['timings'].
+    """
+    ocr_result = pipeline['ocr_result']
+    timer = StageTimer(pipeline.setdefault('timings', {}))
+    # Post-process text
+    raw_text = ocr_result.get('text', '')
+    with timer.stage('post_process'):
+        if post_process and raw_text:
+            post_processor = post_processor or TEXT_POSTPROCESSORS.default
+            processed_text = post_processor(raw_text, ocr_result.get('confidence', 0))
+        else:
+            processed_text = raw_text.strip()
+    
+    # Create chunks (slices of the text, with their [start, end) offsets)
+    chunks, chunk_offsets = [], []
+    if chunking.chunk_text and processed_text:
+        with timer.stage('chunking'):
+            chunks, chunk_offsets = split_chunks(processed_text, chunking.chunk_size, chunking.chunk_overlap)
+    
+    processing_time = round(time.time() - start_time, 3)
+    
+    logger.info("✅ OCR complete: %s via %s, %d chars, confidence %.1f%%, %.3fs",
+                filename, ocr_result.get('method', 'unknown'), len(processed_text),
+                ocr_result.get('confidence', 0), processing_time)
+    
+    return {
+        "success": True,
+        "text": processed_text,
+        "confidence": round(ocr_result.get('confidence', 0), 2),
+        "word_count": len(processed_text.split()) if processed_text else 0,
+        "language": ocr_result.get('language', language),
+        "method_used": ocr_result.get('method', 'unknown'),
+        "enhanced": enhance,
+        "enhancement_level": pipeline['enhancement']['level'],
+        "post_processed": post_process,
+        "chunks": chunks,
+        "chunk_offsets": chunk_offsets,
+        "chunk_count": len(chunks),
+        **({"regions": ocr_result['regions']} if 'regions' in ocr_result else {}),
+        "processing_time": processing_time,
+        "metadata": {
+            "original_filename": filename,
+            "file_size": file_size,
+            "image_dimensions": pipeline['original_size'],
+            "processed_dimensions": pipeline['processed_size'],
+            "raw_text_length": len(raw_text),
+            "processed_text_length": len(processed_text),
+            "regions_found": ocr_result.get('regions_found', 0),
+            "regions_used": ocr_result.get('regions_used', 0),
+            "tiles": ocr_result.get('tiles'),
+            "engine_mode": ocr_result.get('engine_mode'),
+            "chunk_size": chunking.chunk_size,
+            "chunk_overlap": chunking.chunk_overlap,
+            "route": pipeline.get('route'),
+            "language_detection": pipeline.get('language_detection'),
+            "enhancement": pipeline['enhancement'],
+            "stage_timings_ms": stage_timings_ms(pipeline['timings'])
+        }
+    }
+
+def stage_timings_ms(timings):
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+async def lookup_cached_response(digest, start_time, filename, timer, **params):
+    """Return (cache_key, cached_response_or_None) for an upload with this
+    SHA-256 hex digest"""
+    if OCR_CACHE is None:
+        return None, None
+    
+    with timer.stage('cache_lookup'):
+        cache_key = OCR_CACHE.key_for_digest(digest, **params)
+        cached, tier = await run_in_threadpool(OCR_CACHE.get, cache_key)
+    if cached is not None:
+        logger.debug("⚡ Cache hit (%s) for %s", tier, filename)
+        cached["cache"] = "hit"
+        cached["processing_time"] = round(time.time() - start_time, 3)
+        cached["metadata"]["original_filename"] = filename
+        cached["metadata"]["cache_tier"] = tier
+        cached["metadata"]["stage_timings_ms"] = stage_timings_ms(timer.timings)
+    return cache_key, cached
+
+async def store_cached_response(cache_key, response):
+    if cache_key is not None:
+        await run_in_threadpool(OCR_CACHE.put, cache_key, response)
+        response["cache"] = "miss"
+    return response
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Scheduler queue depth, running jobs and recent wait percentiles,
+    overall and per tenant and priority, for this process (read on the
+    event loop, which owns the scheduler)"""
+    return SCHEDULER.stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the OCR result cache"""
+    if OCR_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **OCR_CACHE.stats()}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of stage/request latencies and counters"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def too_large_response(error):
+    return JSONResponse(status_code=413, content={
+        "success": False,
+        "error": str(error),
+        "text": "",
+        "confidence": 0
+    })
+
+def is_image_upload(content_type):
+    return bool(content_type) and content_type.startswith('image/')
+
+async def ocr_spooled_upload(endpoint, upload, filename, start_time, timer, post_processor, chunking,
+                             language, enhance, enhancement_level, engine_mode, post_process, method, tiled,
+                             shape=FULL_RESPONSE, tenant_id=None, priority=INTERACTIVE, document_id=None):
+    """Cache lookup, OCR and response for one upload spooled to disk
+    (``upload`` is spool_upload's (path, digest, size), or hash_upload's
+    with the file object in place of the path); removes a spooled file.
+    The full response is cached, ``shape`` only trims what is sent. The OCR
+    run is scheduled as ``tenant_id``'s ``priority`` work; with
+    language=auto, ``document_id`` shares one detection across uploads."""
+    path, digest, file_size = upload
+    try:
+        if file_size == 0:
+            observe_request(endpoint, 'invalid_request', start_time, timings=timer.timings)
+            return invalid_request_response("Empty upload")
+        
+        # Same bytes + same options => same answer; skip the OCR run entirely
+        cache_key, cached = await lookup_cached_response(
+            digest, start_time, filename, timer,
+            language=language,
+            enhance=enhance,
+            enhancement_level=enhancement_level,
+            engine_mode=engine_mode,
+            post_process=post_process,
+            method=method,
+            text_rules=post_processor.version,
+            chunk_text=chunking.chunk_text,
+            chunk_size=chunking.chunk_size,
+            chunk_overlap=chunking.chunk_overlap,
+            tiled=tiled
+        )
+        if cached is not None:
+            observe_request(endpoint, 'cache_hit', start_time, timings=timer.timings)
+            return FastJSONResponse(shape.apply(cached))
+        
+        run_language = memo_language(language, tenant_id, document_id)
+        try:
+            pipeline = await SCHEDULER.run(
+                tenant_id, priority,
+                run_ocr_pipeline, path, run_language, enhancement_level, method, tiled, engine_mode
+            )
+        except PoolSaturatedError as e:
+            logger.warning("⏳ OCR scheduler full, rejecting %s (%s, %s)", filename, tenant_id, priority)
+            observe_request(endpoint, 'busy', start_time, timings=timer.timings)
+            return busy_response(e.retry_after)
+        except ImageTooLargeError as e:
+            logger.warning("🚫 %s: %s", filename, e)
+            observe_request(endpoint, 'too_large', start_time, timings=timer.timings)
+            return too_large_response(e)
+    finally:
+        remove_quietly(path)
+    
+    remember_language(pipeline, language, run_language, tenant_id, document_id)
+    ocr_result = pipeline['ocr_result']
+    pipeline['timings'] = {**timer.timings, **pipeline['timings']}
+    engine = engine_label(ocr_result)
+    
+    # Final check
+    if not ocr_result or not ocr_result.get('success'):
+        observe_request(endpoint, 'failed', start_time, engine, pipeline['timings'])
+        return build_failure_response(start_time, pipeline['original_size'], pipeline['ocr_method'])
+    
+    response = build_ocr_response(
+        pipeline, start_time, filename, file_size,
+        language, enhance, post_process, post_processor, chunking
+    )
+    observe_request(endpoint, 'success', start_time, engine, pipeline['timings'])
+    return FastJSONResponse(shape.apply(await store_cached_response(cache_key, response)))
+
+def fatal_ocr_error(endpoint, error, start_time, timer):
+    logger.exception("❌ FATAL OCR Error: %s", error)
+    observe_request(endpoint, 'error', start_time, timings=timer.timings)
+    return {
+        "success": False,
+        "error": f"OCR processing failed: {str(error)}",
+        "text": "",
+        "confidence": 0,
+        "processing_time": round(time.time() - start_time, 3)
+    }
+
 @app.post("/ocr")
 async def extract_text_from_image(
     file: UploadFile = File(...),
     language: str = Form("en"),  # Default to English instead of auto
     enhance: bool = Form(True),
+    enhancement_level: Optional[str] = Form(None),
+    engine_mode: Optional[str] = Form(None),
+    fields: Optional[str] = Form(None),
+    chunk_format: str = Form("text"),
     post_process: bool = Form(True),
-    method: str = Form("auto")
+    method: str = Form("auto"),
+    tenant_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    chunk_text: bool = Form(True),
+    chunk_size: int = Form(800),
+    chunk_overlap: int = Form(0),
+    tiled: bool = Form(False)
 ):
-    """FIXED OCR extraction with better error handling"""
+    """FIXED OCR extraction with better error handling.
+    
+    enhancement_level (none, light, medium, heavy; default
+    OCR_ENHANCEMENT_LEVEL) picks the preprocessing both engines read;
+    enhance=false is the same as none. engine_mode (accurate or fast;
+    default OCR_ENGINE_MODE) picks fp32 or int8 EasyOCR models.
+    
+    priority (interactive or bulk; default interactive) is the scheduling
+    class of tenant_id's work: see utils/scheduler.py.
+    
+    language=auto detects the language with a cheap first pass and reads the
+    image with that single-language model (utils/language_detect.py); give
+    the pages of one document the same document_id and only the first
+    confident detection is run, per tenant.
+    
+    fields (comma separated, e.g. "chunks" or "text,confidence") limits the
+    response to those top-level fields; success and error are always sent.
+    chunk_format=offsets leaves out the chunk copies: each chunk is
+    text[start:end] for its chunk_offsets entry (text is sent along).
+    
+    tiled=true recognizes large images at up to OCR_TILED_MAX_IMAGE_SIDE in
+    overlapping tiles instead of shrinking them to OCR_MAX_IMAGE_SIDE, and
+    returns the regions with their bounding boxes in reading order.
+    Uploads over OCR_MAX_UPLOAD_BYTES are refused with a 413.
+    """
     start_time = time.time()
+    timer = StageTimer()
     
     try:
-        print(f"\n📸 === OCR REQUEST START ===")
-        print(f"File: {file.filename} ({file.content_type})")
-        print(f"Method: {method}, Language: {language}, Enhance: {enhance}")
-        print(f"EasyOCR Available: {EASYOCR_AVAILABLE}, Initialized: {EASYOCR_INIT_SUCCESS}")
-        print(f"Tesseract Available: {TESSERACT_AVAILABLE}")
+        logger.debug("📸 OCR request: %s (%s), method=%s, language=%s, enhance=%s",
+                     file.filename, file.content_type, method, language, enhance)
         
         # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
+        if not is_image_upload(file.content_type):
+            observe_request('ocr', 'invalid_type', start_time)
             return {
                 "success": False,
                 "error": f"Invalid file type: {file.content_type}",
@@ -286,208 +1477,868 @@ async def extract_text_from_image(
                 "confidence": 0
             }
         
-        # Read image
-        image_bytes = await file.read()
-        print(f"📖 Read {len(image_bytes)} bytes")
-        
-        image = Image.open(io.BytesIO(image_bytes))
-        original_size = image.size
-        print(f"📐 Original image size: {original_size}")
-        
-        # Convert to RGB
-        if image.mode != 'RGB':
-            print(f"🔄 Converting from {image.mode} to RGB")
-            image = image.convert('RGB')
-        
-        image_array = np.array(image)
-        print(f"🖼️  Image array shape: {image_array.shape}")
-        
-        # Resize if too large (EasyOCR works better with reasonable sizes)
-        max_size = 1500  # Reduced from 2000
-        if max(original_size) > max_size:
-            ratio = max_size / max(original_size)
-            new_size = tuple(int(dim * ratio) for dim in original_size)
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-            image_array = np.array(image)
-            print(f"📏 Resized to: {new_size}")
-        
-        # Simple preprocessing
-        processed_image = image_array
-        if enhance:
-            try:
-                processed_image = preprocess_image_simple(image_array)
-                print("✅ Image preprocessing completed")
-            except Exception as e:
-                print(f"⚠️  Preprocessing failed: {e}, using original")
-                processed_image = image_array
-        
-        # Determine OCR method
-        ocr_method = method
-        if method == "auto":
-            if EASYOCR_AVAILABLE and EASYOCR_INIT_SUCCESS:
-                ocr_method = "easyocr"
-            elif TESSERACT_AVAILABLE:
-                ocr_method = "tesseract"
-            else:
-                ocr_method = "none"
+        try:
+            language = check_language(language)
+            tenant_id = tenant_option(tenant_id)
+            post_processor = TEXT_POSTPROCESSORS.get(tenant_id)
+            chunking = chunking_options(chunk_text, chunk_size, chunk_overlap)
+            level = enhancement_options(enhance, enhancement_level)
+            mode = engine_mode_option(engine_mode)
+            priority = priority_option(priority)
+            shape = ResponseShape(fields, chunk_format)
+        except ValidationError as e:
+            observe_request('ocr', 'invalid_request', start_time)
+            return invalid_request_response(validation_error_message(e), 422)
+        except UnsupportedLanguageError as e:
+            observe_request('ocr', 'invalid_request', start_time)
+            return invalid_request_response(str(e), 422)
+        except ValueError as e:
+            observe_request('ocr', 'invalid_request', start_time)
+            return invalid_request_response(str(e))
         
-        print(f"🔍 Using OCR method: {ocr_method}")
+        # Hash the upload where the form parser spooled it and OCR it from
+        # there; a process pool cannot be handed the file object, so it
+        # gets a copy on disk
+        ingest = hash_upload if OCR_POOL.mode == 'thread' else spool_upload
+        try:
+            with timer.stage('upload_read'):
+                upload = await run_in_threadpool(ingest, file.file, MAX_UPLOAD_BYTES)
+        except UploadTooLargeError as e:
+            logger.warning("🚫 %s: %s", file.filename, e)
+            observe_request('ocr', 'too_large', start_time, timings=timer.timings)
+            return too_large_response(e)
         
-        ocr_result = None
+        return await ocr_spooled_upload(
+            'ocr', upload, file.filename, start_time, timer, post_processor, chunking,
+            language, enhance, level, mode, post_process, method, tiled, shape, tenant_id, priority,
+            document_id
+        )
         
-        # Try EasyOCR
-        if ocr_method == "easyocr" and EASYOCR_AVAILABLE and EASYOCR_INIT_SUCCESS:
-            print("🎯 Attempting EasyOCR...")
-            ocr_lang = 'en' if language in ['auto', 'eng'] else language
-            ocr_result = process_with_easyocr(image_array, ocr_lang)  # Use original image
-            
-        # Fallback to Tesseract
-        if (not ocr_result or not ocr_result.get('success')) and TESSERACT_AVAILABLE:
-            print("🔄 Falling back to Tesseract...")
-            try:
-                tesseract_lang = 'eng' if language in ['auto', 'en'] else language
-                custom_config = r'--oem 3 --psm 6'
-                
-                # Use PIL image for Tesseract
-                if enhance and len(processed_image.shape) == 2:
-                    pil_image = Image.fromarray(processed_image, 'L')
-                else:
-                    pil_image = image
-                
-                raw_text = pytesseract.image_to_string(pil_image, lang=tesseract_lang, config=custom_config)
-                
-                # Get confidence
-                try:
-                    data = pytesseract.image_to_data(pil_image, lang=tesseract_lang, config=custom_config, 
-                                                   output_type=pytesseract.Output.DICT)
-                    confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                except:
-                    avg_confidence = 50
-                
-                ocr_result = {
-                    'success': True,
-                    'text': raw_text.strip(),
-                    'confidence': avg_confidence,
-                    'method': 'tesseract_fallback',
-                    'language': tesseract_lang
-                }
-                print(f"✅ Tesseract completed: confidence {avg_confidence:.1f}%")
-                
-            except Exception as e:
-                print(f"❌ Tesseract also failed: {e}")
-                ocr_result = {
-                    'success': False,
-                    'error': f"Tesseract failed: {str(e)}",
-                    'method': 'tesseract_failed'
-                }
-        
-        # Final check
-        if not ocr_result or not ocr_result.get('success'):
-            error_msg = "All OCR methods failed"
-            if not EASYOCR_AVAILABLE:
-                error_msg += " (EasyOCR not installed)"
-            elif not EASYOCR_INIT_SUCCESS:
-                error_msg += " (EasyOCR initialization failed)"
-            if not TESSERACT_AVAILABLE:
-                error_msg += " (Tesseract not installed)"
-            
-            print(f"❌ {error_msg}")
-            return {
+    except Exception as e:
+        return fatal_ocr_error('ocr', e, start_time, timer)
+
+@app.post("/ocr/raw")
+async def extract_text_from_raw_body(
+    request: Request,
+    filename: Optional[str] = None,
+    language: str = "en",
+    enhance: bool = True,
+    enhancement_level: Optional[str] = None,
+    engine_mode: Optional[str] = None,
+    fields: Optional[str] = None,
+    chunk_format: str = "text",
+    post_process: bool = True,
+    method: str = "auto",
+    tenant_id: Optional[str] = None,
+    priority: Optional[str] = None,
+    document_id: Optional[str] = None,
+    chunk_text: bool = True,
+    chunk_size: int = 800,
+    chunk_overlap: int = 0,
+    tiled: bool = False
+):
+    """/ocr for internal callers that skip multipart encoding: the request
+    body is the image itself (Content-Type application/octet-stream or
+    image/*) and the options are query parameters. The body is streamed to
+    disk as it arrives and never held in memory.
+    """
+    start_time = time.time()
+    timer = StageTimer()
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+    filename = filename or 'upload'
+    
+    try:
+        if content_type != 'application/octet-stream' and not is_image_upload(content_type):
+            observe_request('ocr_raw', 'invalid_type', start_time)
+            return JSONResponse(status_code=415, content={
+                "success": False,
+                "error": f"Invalid content type: {content_type or 'none'}",
+                "text": "",
+                "confidence": 0
+            })
+        
+        try:
+            language = check_language(language)
+            tenant_id = tenant_option(tenant_id)
+            post_processor = TEXT_POSTPROCESSORS.get(tenant_id)
+            chunking = chunking_options(chunk_text, chunk_size, chunk_overlap)
+            level = enhancement_options(enhance, enhancement_level)
+            mode = engine_mode_option(engine_mode)
+            priority = priority_option(priority)
+            shape = ResponseShape(fields, chunk_format)
+        except ValidationError as e:
+            observe_request('ocr_raw', 'invalid_request', start_time)
+            return invalid_request_response(validation_error_message(e), 422)
+        except UnsupportedLanguageError as e:
+            observe_request('ocr_raw', 'invalid_request', start_time)
+            return invalid_request_response(str(e), 422)
+        except ValueError as e:
+            observe_request('ocr_raw', 'invalid_request', start_time)
+            return invalid_request_response(str(e))
+        
+        try:
+            if declared_too_large(request.headers.get('content-length'), MAX_UPLOAD_BYTES):
+                raise UploadTooLargeError(too_large_message(request.headers['content-length'], MAX_UPLOAD_BYTES))
+            with timer.stage('upload_read'):
+                upload = await spool_stream(request.stream(), MAX_UPLOAD_BYTES)
+        except UploadTooLargeError as e:
+            logger.warning("🚫 %s: %s", filename, e)
+            observe_request('ocr_raw', 'too_large', start_time, timings=timer.timings)
+            return too_large_response(e)
+        
+        return await ocr_spooled_upload(
+            'ocr_raw', upload, filename, start_time, timer, post_processor, chunking,
+            language, enhance, level, mode, post_process, method, tiled, shape, tenant_id, priority,
+            document_id
+        )
+        
+    except Exception as e:
+        return fatal_ocr_error('ocr_raw', e, start_time, timer)
+
+@app.post("/ocr/batch")
+async def extract_text_from_images(
+    files: List[UploadFile] = File(...),
+    language: str = Form("en"),
+    enhance: bool = Form(True),
+    enhancement_level: Optional[str] = Form(None),
+    engine_mode: Optional[str] = Form(None),
+    fields: Optional[str] = Form(None),
+    chunk_format: str = Form("text"),
+    post_process: bool = Form(True),
+    method: str = Form("auto"),
+    tenant_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    chunk_text: bool = Form(True),
+    chunk_size: int = Form(800),
+    chunk_overlap: int = Form(0)
+):
+    """OCR many images in one request, streaming one NDJSON line per image.
+
+    Images go through the engines in micro-batches of OCR_BATCH_SIZE; each
+    line is written as soon as its micro-batch finishes, in completion order,
+    and carries the image's ``index`` in the upload. Each image is spooled to
+    disk and decoded from there when its micro-batch runs, and is refused on
+    its own line if it is over OCR_MAX_UPLOAD_BYTES; a request body over
+    OCR_MAX_BATCH_BYTES in all is refused with 413. With language=auto each
+    image is detected on its own, unless the images share a document_id.
+    """
+    start_time = time.time()
+    logger.info("📚 OCR batch request: %d files", len(files))
+    
+    try:
+        language = check_language(language)
+        tenant_id = tenant_option(tenant_id)
+        post_processor = TEXT_POSTPROCESSORS.get(tenant_id)
+        chunking = chunking_options(chunk_text, chunk_size, chunk_overlap)
+        level = enhancement_options(enhance, enhancement_level)
+        mode = engine_mode_option(engine_mode)
+        priority = priority_option(priority, BULK)
+        shape = ResponseShape(fields, chunk_format)
+    except ValidationError as e:
+        return invalid_request_response(validation_error_message(e), 422)
+    except UnsupportedLanguageError as e:
+        return invalid_request_response(str(e), 422)
+    except ValueError as e:
+        return invalid_request_response(str(e))
+    
+    ready_lines = []
+    pending = []
+    for index, file in enumerate(files):
+        if not file.content_type or not file.content_type.startswith('image/'):
+            observe_request('ocr_batch', 'invalid_type', start_time)
+            ready_lines.append({
+                "index": index,
                 "success": False,
-                "error": error_msg,
+                "error": f"Invalid file type: {file.content_type}",
                 "text": "",
                 "confidence": 0,
-                "processing_time": round(time.time() - start_time, 3),
-                "debug_info": {
-                    "easyocr_available": EASYOCR_AVAILABLE,
-                    "easyocr_initialized": EASYOCR_INIT_SUCCESS,
-                    "tesseract_available": TESSERACT_AVAILABLE,
-                    "image_size": original_size,
-                    "method_attempted": ocr_method
-                }
-            }
+                "metadata": {"original_filename": file.filename}
+            })
+            continue
         
-        # Post-process text
-        raw_text = ocr_result.get('text', '')
-        if post_process and raw_text:
-            processed_text = post_process_text(raw_text, ocr_result.get('confidence', 0))
+        timer = StageTimer()
+        try:
+            with timer.stage('upload_read'):
+                path, digest, file_size = await run_in_threadpool(spool_upload, file.file, MAX_UPLOAD_BYTES)
+        except UploadTooLargeError as e:
+            observe_request('ocr_batch', 'too_large', start_time, timings=timer.timings)
+            ready_lines.append({
+                "index": index,
+                "success": False,
+                "error": str(e),
+                "text": "",
+                "confidence": 0,
+                "metadata": {"original_filename": file.filename}
+            })
+            continue
+        cache_key, cached = await lookup_cached_response(
+            digest, start_time, file.filename, timer,
+            language=language,
+            enhance=enhance,
+            enhancement_level=level,
+            engine_mode=mode,
+            post_process=post_process,
+            method=method,
+            text_rules=post_processor.version,
+            chunk_text=chunking.chunk_text,
+            chunk_size=chunking.chunk_size,
+            chunk_overlap=chunking.chunk_overlap,
+            tiled=False
+        )
+        if cached is not None:
+            observe_request('ocr_batch', 'cache_hit', start_time, timings=timer.timings)
+            ready_lines.append({"index": index, **cached})
+            remove_quietly(path)
         else:
-            processed_text = raw_text.strip()
+            pending.append((index, file.filename, path, file_size, cache_key, timer.timings))
+    
+    micro_batches = [pending[i:i + OCR_BATCH_SIZE] for i in range(0, len(pending), OCR_BATCH_SIZE)]
+    
+    run_languages = {}  # future -> language it was submitted with
+    
+    def submit(batch):
+        run_language = memo_language(language, tenant_id, document_id)
+        future = SCHEDULER.submit(
+            tenant_id, priority,
+            run_ocr_batch, [item[2] for item in batch], run_language, level, method, mode,
+            cost=len(batch)
+        )
+        run_languages[future] = run_language
+        return future
+    
+    # Only refuse the whole request if not even the first micro-batch fits
+    in_flight = {}
+    if micro_batches:
+        try:
+            first = micro_batches.pop(0)
+            in_flight[submit(first)] = first
+        except PoolSaturatedError as e:
+            logger.warning("⏳ OCR scheduler full, rejecting batch (%s, %s)", tenant_id, priority)
+            for item in pending:
+                observe_request('ocr_batch', 'busy', start_time, timings=item[5])
+                remove_quietly(item[2])
+            return busy_response(e.retry_after)
+    
+    async def stream_results():
+        try:
+            for line in ready_lines:
+                yield ndjson_line(shape.apply(line))
         
-        # Create chunks
-        chunks = []
-        if processed_text:
-            chunk_size = 800
-            words = processed_text.split()
-            current_chunk = []
-            current_length = 0
+            while in_flight or micro_batches:
+                # Keep up to one micro-batch per scheduler slot in flight
+                while micro_batches and len(in_flight) < SCHEDULER.slots:
+                    batch = micro_batches.pop(0)
+                    try:
+                        in_flight[submit(batch)] = batch
+                    except PoolSaturatedError:
+                        micro_batches.insert(0, batch)
+                        break
             
-            for word in words:
-                if current_length + len(word) + 1 > chunk_size and current_chunk:
-                    chunks.append(' '.join(current_chunk))
-                    current_chunk = [word]
-                    current_length = len(word)
-                else:
-                    current_chunk.append(word)
-                    current_length += len(word) + 1
+                if not in_flight:
+                    await asyncio.sleep(0.25)
+                    continue
             
-            if current_chunk:
-                chunks.append(' '.join(current_chunk))
-        
-        processing_time = round(time.time() - start_time, 3)
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        pipelines = future.result()
+                    except Exception as e:
+                        pipelines = [{'error': f"OCR processing failed: {str(e)}"}] * len(batch)
+                    run_language = run_languages.pop(future)
+                
+                    for (index, filename, path, file_size, cache_key, timings), pipeline in zip(batch, pipelines):
+                        if 'error' not in pipeline:
+                            remember_language(pipeline, language, run_language, tenant_id, document_id)
+                        ocr_result = pipeline.get('ocr_result')
+                        engine = engine_label(ocr_result)
+                        if 'error' in pipeline:
+                            observe_request('ocr_batch', 'error', start_time, timings=timings)
+                            response = {
+                                "success": False,
+                                "error": pipeline['error'],
+                                "text": "",
+                                "confidence": 0,
+                                "processing_time": round(time.time() - start_time, 3)
+                            }
+                        elif not ocr_result or not ocr_result.get('success'):
+                            timings = {**timings, **pipeline['timings']}
+                            observe_request('ocr_batch', 'failed', start_time, engine, timings)
+                            response = build_failure_response(
+                                start_time, pipeline['original_size'], pipeline['ocr_method']
+                            )
+                        else:
+                            pipeline['timings'] = {**timings, **pipeline['timings']}
+                            response = build_ocr_response(
+                                pipeline, start_time, filename, file_size,
+                                language, enhance, post_process, post_processor, chunking
+                            )
+                            observe_request('ocr_batch', 'success', start_time, engine, pipeline['timings'])
+                            response = await store_cached_response(cache_key, response)
+                        yield ndjson_line(shape.apply({"index": index, **response}))
+        finally:
+            # Spooled uploads go with the response, even after a disconnect;
+            # a micro-batch already decoding keeps its open memory maps
+            for item in pending:
+                remove_quietly(item[2])
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+def document_page_error(page_number, page_count, error, start_time):
+    return {
+        "page": page_number,
+        "page_count": page_count,
+        "success": False,
+        "error": error,
+        "text": "",
+        "confidence": 0,
+        "processing_time": round(time.time() - start_time, 3)
+    }
+
+@app.post("/ocr/document")
+async def extract_text_from_document(
+    file: UploadFile = File(...),
+    language: str = Form("en"),
+    enhance: bool = Form(True),
+    enhancement_level: Optional[str] = Form(None),
+    engine_mode: Optional[str] = Form(None),
+    fields: Optional[str] = Form(None),
+    chunk_format: str = Form("text"),
+    post_process: bool = Form(True),
+    method: str = Form("auto"),
+    tenant_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    chunk_text: bool = Form(True),
+    chunk_size: int = Form(800),
+    chunk_overlap: int = Form(0),
+    tiled: bool = Form(False)
+):
+    """OCR a multi-page PDF or TIFF (or a single image), streaming one NDJSON
+    line per page and a final ``{"done": true, ...}`` line.
+
+    The upload is spooled to disk and pages are decoded (PDFs rendered at
+    OCR_PDF_DPI) one at a time as pool capacity frees up, so at most
+    OCR_DOCUMENT_CONCURRENCY pages are held in memory. Lines are written in
+    completion order; cached pages come first and are not decoded at all.
+    Documents over OCR_MAX_UPLOAD_BYTES are refused with a 413. With
+    language=auto, pages submitted after the first confident detection use
+    its language; document_id defaults to the upload's digest.
+    """
+    start_time = time.time()
+    timer = StageTimer()
+    
+    try:
+        language = check_language(language)
+        tenant_id = tenant_option(tenant_id)
+        post_processor = TEXT_POSTPROCESSORS.get(tenant_id)
+        chunking = chunking_options(chunk_text, chunk_size, chunk_overlap)
+        level = enhancement_options(enhance, enhancement_level)
+        mode = engine_mode_option(engine_mode)
+        priority = priority_option(priority)
+        shape = ResponseShape(fields, chunk_format)
+    except ValidationError as e:
+        observe_request('ocr_document', 'invalid_request', start_time)
+        return invalid_request_response(validation_error_message(e), 422)
+    except UnsupportedLanguageError as e:
+        observe_request('ocr_document', 'invalid_request', start_time)
+        return invalid_request_response(str(e), 422)
+    except ValueError as e:
+        observe_request('ocr_document', 'invalid_request', start_time)
+        return invalid_request_response(str(e))
+    
+    # The upload is closed once this handler returns, before the stream runs
+    try:
+        with timer.stage('upload_read'):
+            path, digest, file_size = await run_in_threadpool(
+                spool_upload, file.file, MAX_UPLOAD_BYTES, 'ocr_doc_'
+            )
+    except UploadTooLargeError as e:
+        logger.warning("🚫 %s: %s", file.filename, e)
+        observe_request('ocr_document', 'too_large', start_time, timings=timer.timings)
+        return too_large_response(e)
+    
+    try:
+        kind = await run_in_threadpool(document_kind, path)
+        page_count = await run_in_threadpool(count_pages, path, kind)
+    except UnsupportedDocumentError as e:
+        remove_quietly(path)
+        logger.warning("🚫 %s: %s", file.filename, e)
+        observe_request('ocr_document', 'invalid_type', start_time, timings=timer.timings)
+        return JSONResponse(status_code=415, content={
+            "success": False,
+            "error": str(e),
+            "text": "",
+            "confidence": 0
+        })
+    except Exception:
+        remove_quietly(path)
+        raise
+    
+    filename = file.filename
+    document_id = document_id or digest
+    logger.info("📑 OCR document request: %s (%s, %d pages)", filename, kind, page_count)
+    
+    ready_lines = []
+    cache_keys = {}
+    for page_number in range(1, page_count + 1):
+        page_timer = StageTimer(dict(timer.timings))
+        cache_key, cached = await lookup_cached_response(
+            digest, start_time, filename, page_timer,
+            page=page_number,
+            language=language,
+            enhance=enhance,
+            enhancement_level=level,
+            engine_mode=mode,
+            post_process=post_process,
+            method=method,
+            text_rules=post_processor.version,
+            chunk_text=chunking.chunk_text,
+            chunk_size=chunking.chunk_size,
+            chunk_overlap=chunking.chunk_overlap,
+            tiled=tiled,
+            pdf_dpi=PDF_DPI if kind == 'pdf' else None
+        )
+        if cached is not None:
+            observe_request('ocr_document', 'cache_hit', start_time, timings=page_timer.timings)
+            ready_lines.append({"page": page_number, "page_count": page_count, **cached})
+        else:
+            cache_keys[page_number] = (cache_key, page_timer.timings)
+    
+    pages = iter_document_pages(
+        path, kind,
+        max_side=TILED_MAX_IMAGE_SIDE if tiled else MAX_IMAGE_SIDE,
+        max_pixels=MAX_IMAGE_PIXELS,
+        dpi=PDF_DPI,
+        skip={line["page"] for line in ready_lines}
+    )
+    
+    run_languages = {}  # page number -> language it was submitted with
+    
+    def page_line(page_number, pipeline):
+        cache_key, timings = cache_keys[page_number]
+        remember_language(pipeline, language, run_languages.pop(page_number), tenant_id, document_id)
+        ocr_result = pipeline['ocr_result']
+        engine = engine_label(ocr_result)
+        pipeline['timings'] = {**timings, **pipeline['timings']}
+        if not ocr_result or not ocr_result.get('success'):
+            observe_request('ocr_document', 'failed', start_time, engine, pipeline['timings'])
+            return None, build_failure_response(start_time, pipeline['original_size'], pipeline['ocr_method'])
+        response = build_ocr_response(
+            pipeline, start_time, filename, file_size,
+            language, enhance, post_process, post_processor, chunking
+        )
+        observe_request('ocr_document', 'success', start_time, engine, pipeline['timings'])
+        return cache_key, response
+    
+    async def stream_pages():
+        succeeded = sum(1 for line in ready_lines if line.get("success"))
+        failed = 0
+        in_flight = {}  # future -> page number
+        held = None  # decoded page waiting for room in the pool
+        exhausted = False
+        try:
+            for line in ready_lines:
+                yield ndjson_line(shape.apply(line))
+            
+            while True:
+                # Decode the next page only when it can go straight to the pool
+                while not exhausted and len(in_flight) < DOCUMENT_CONCURRENCY:
+                    if held is None:
+                        try:
+                            held = await run_in_threadpool(next, pages, None)
+                        except Exception as e:
+                            logger.warning("❌ Could not read the rest of %s: %s", filename, e)
+                            held = None
+                            exhausted = True
+                            failed += 1
+                            yield ndjson_line(document_page_error(
+                                None, page_count, f"Could not decode document: {str(e)}", start_time
+                            ))
+                            break
+                        if held is None:
+                            exhausted = True
+                            break
+                    page_number, page = held
+                    if isinstance(page, Exception):
+                        held = None
+                        failed += 1
+                        observe_request('ocr_document', 'too_large', start_time,
+                                        timings=cache_keys[page_number][1])
+                        yield ndjson_line(document_page_error(
+                            page_number, page_count, str(page), start_time
+                        ))
+                        continue
+                    run_language = memo_language(language, tenant_id, document_id)
+                    try:
+                        future = SCHEDULER.submit(
+                            tenant_id, priority,
+                            run_ocr_pipeline, page, run_language, level, method, tiled, mode
+                        )
+                    except PoolSaturatedError:
+                        break
+                    in_flight[future] = page_number
+                    run_languages[page_number] = run_language
+                    held = None
+                
+                if not in_flight:
+                    if exhausted:
+                        break
+                    await asyncio.sleep(0.25)
+                    continue
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    page_number = in_flight.pop(future)
+                    try:
+                        cache_key, response = page_line(page_number, future.result())
+                    except Exception as e:
+                        logger.warning("❌ Page %d of %s failed: %s", page_number, filename, e)
+                        observe_request('ocr_document', 'error', start_time,
+                                        timings=cache_keys[page_number][1])
+                        cache_key, response = None, document_page_error(
+                            page_number, page_count, f"OCR processing failed: {str(e)}", start_time
+                        )
+                    if response.get("success"):
+                        succeeded += 1
+                        response = await store_cached_response(cache_key, response)
+                    else:
+                        failed += 1
+                    yield ndjson_line(shape.apply({"page": page_number, "page_count": page_count, **response}))
+            
+            yield ndjson_line({
+                "done": True,
+                "page_count": page_count,
+                "pages_succeeded": succeeded,
+                "pages_failed": failed,
+                "processing_time": round(time.time() - start_time, 3)
+            })
+        finally:
+            for future in in_flight:
+                future.cancel()
+            try:
+                pages.close()
+            except ValueError:
+                pass  # still running in a thread after a disconnect; it stops at EOF
+            remove_quietly(path)
+    
+    return StreamingResponse(stream_pages(), media_type="application/x-ndjson")
+
+# 📮 Asynchronous jobs: POST /jobs stores the upload in the persistent queue
+# and returns at once; job workers in every server process lease jobs from
+# it, so a dropped client connection no longer loses or repeats the work
+def job_view(job):
+    """Public view of a queue row for GET /jobs/{id}"""
+    view = {
+        "job_id": job['id'],
+        "status": job['status'],
+        "attempts": job['attempts'],
+        "created_at": job['created_at'],
+        "updated_at": job['updated_at'],
+        "finished_at": job['finished_at'],
+        "filename": job['params'].get('filename')
+    }
+    if job['result'] is not None:
+        view["result"] = job['result']
+    if job['error']:
+        view["error"] = job['error']
+    if job['webhook_url']:
+        view["webhook_status"] = job['webhook_status'] or "pending"
+    return view
+
+async def notify_job_webhook(job_id):
+    """POST the finished job to its webhook and to those of the submissions
+    deduplicated onto it"""
+    job = await run_in_threadpool(JOB_QUEUE.get, job_id)
+    if job is None:
+        return
+    view = job_view(job)
+    view.pop("webhook_status", None)
+    if job['webhook_url']:
+        status = await run_in_threadpool(deliver_webhook, job['webhook_url'], view,
+                                        allowed_hosts=JOB_WEBHOOK_HOSTS)
+        await run_in_threadpool(JOB_QUEUE.set_webhook_status, job_id, status)
+    for subscriber in await run_in_threadpool(JOB_QUEUE.subscribers, job_id):
+        status = await run_in_threadpool(deliver_webhook, subscriber['url'], view,
+                                        allowed_hosts=JOB_WEBHOOK_HOSTS)
+        await run_in_threadpool(JOB_QUEUE.set_subscriber_status, subscriber['id'], status)
+
+async def notify_finished_job(job_id, url):
+    """POST an already finished job to the webhook of a later submission"""
+    job = await run_in_threadpool(JOB_QUEUE.get, job_id)
+    if job is not None:
+        view = job_view(job)
+        view.pop("webhook_status", None)
+        await run_in_threadpool(deliver_webhook, url, view, allowed_hosts=JOB_WEBHOOK_HOSTS)
+
+async def keep_job_lease(job_id, owner):
+    """Renew the lease while the job runs so it isn't handed to another worker"""
+    while True:
+        await asyncio.sleep(JOB_QUEUE.lease_seconds / 3)
+        if not await run_in_threadpool(JOB_QUEUE.heartbeat, job_id, owner):
+            logger.warning("⚠️ Lost the lease on job %s", job_id)
+            return
+
+async def process_job(job, owner):
+    """Run one leased job to completion, failure, or back into the queue"""
+    start_time = time.time()
+    params = job['params']
+    job_id = job['id']
+    heartbeat = asyncio.create_task(keep_job_lease(job_id, owner))
+    finished = False
+    try:
+        post_processor = TEXT_POSTPROCESSORS.get(params['tenant_id'])
+        chunking = chunking_options(params['chunk_text'], params['chunk_size'], params['chunk_overlap'])
+        run_language = memo_language(params['language'], params['tenant_id'], params.get('document_id'))
+        try:
+            pipeline = await SCHEDULER.run(
+                params['tenant_id'], params.get('priority') or BULK,
+                run_ocr_pipeline, job['input_path'], run_language,
+                params.get('enhancement_level') or enhancement_options(params['enhance']),
+                params['method'], params['tiled'], params.get('engine_mode') or DEFAULT_ENGINE_MODE
+            )
+        except PoolSaturatedError as e:
+            # The scheduler's queues are full; try again shortly
+            await run_in_threadpool(JOB_QUEUE.release, job_id, owner)
+            await asyncio.sleep(min(e.retry_after, JOB_POLL_SECONDS))
+            return
         
-        print(f"✅ === OCR COMPLETE ===")
-        print(f"Method: {ocr_result.get('method', 'unknown')}")
-        print(f"Text: '{processed_text[:50]}{'...' if len(processed_text) > 50 else ''}'")
-        print(f"Confidence: {ocr_result.get('confidence', 0):.1f}%")
-        print(f"Processing time: {processing_time}s")
-        print(f"=========================\n")
+        remember_language(pipeline, params['language'], run_language, params['tenant_id'], params.get('document_id'))
+        ocr_result = pipeline['ocr_result']
+        engine = engine_label(ocr_result)
+        if not ocr_result or not ocr_result.get('success'):
+            response = build_failure_response(start_time, pipeline['original_size'], pipeline['ocr_method'])
+            observe_request('jobs', 'failed', start_time, engine, pipeline['timings'])
+            finished = await run_in_threadpool(JOB_QUEUE.fail, job_id, owner, response['error'])
+            return
         
-        return {
-            "success": True,
-            "text": processed_text,
-            "confidence": round(ocr_result.get('confidence', 0), 2),
-            "word_count": len(processed_text.split()) if processed_text else 0,
-            "language": ocr_result.get('language', language),
-            "method_used": ocr_result.get('method', 'unknown'),
-            "enhanced": enhance,
-            "post_processed": post_process,
-            "chunks": chunks,
-            "chunk_count": len(chunks),
-            "processing_time": processing_time,
-            "metadata": {
-                "original_filename": file.filename,
-                "file_size": len(image_bytes),
-                "image_dimensions": original_size,
-                "raw_text_length": len(raw_text),
-                "processed_text_length": len(processed_text),
-                "regions_found": ocr_result.get('regions_found', 0),
-                "regions_used": ocr_result.get('regions_used', 0)
-            }
-        }
+        response = build_ocr_response(
+            pipeline, start_time, params['filename'], params['file_size'],
+            params['language'], params['enhance'], params['post_process'], post_processor, chunking
+        )
+        observe_request('jobs', 'success', start_time, engine, pipeline['timings'])
+        if OCR_CACHE is not None:
+            response = await store_cached_response(job['dedup_key'], response)
+        finished = await run_in_threadpool(JOB_QUEUE.complete, job_id, owner, response)
         
+    except asyncio.CancelledError:
+        # Shutting down: hand the job straight back instead of waiting for the lease
+        await asyncio.shield(run_in_threadpool(JOB_QUEUE.release, job_id, owner))
+        raise
+    except ImageTooLargeError as e:
+        observe_request('jobs', 'too_large', start_time)
+        finished = await run_in_threadpool(JOB_QUEUE.fail, job_id, owner, str(e))
     except Exception as e:
-        processing_time = round(time.time() - start_time, 3)
-        print(f"❌ FATAL OCR Error: {str(e)}")
-        
-        return {
-            "success": False,
-            "error": f"OCR processing failed: {str(e)}",
-            "text": "",
-            "confidence": 0,
-            "processing_time": processing_time
-        }
+        logger.exception("❌ Job %s attempt %d failed: %s", job_id, job['attempts'], e)
+        observe_request('jobs', 'error', start_time)
+        if job['attempts'] >= JOB_QUEUE.max_attempts:
+            finished = await run_in_threadpool(
+                JOB_QUEUE.fail, job_id, owner, f"OCR processing failed: {str(e)}"
+            )
+        else:
+            await run_in_threadpool(JOB_QUEUE.release, job_id, owner, True)
+    finally:
+        heartbeat.cancel()
+    
+    if finished:
+        await notify_job_webhook(job_id)
+
+async def run_job_worker(index):
+    owner = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    while True:
+        try:
+            job = await run_in_threadpool(JOB_QUEUE.lease, owner)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Could not lease a job: %s", e)
+            job = None
+        if job is None:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            continue
+        logger.debug("📮 %s leased job %s (attempt %d)", owner, job['id'], job['attempts'])
+        await process_job(job, owner)
+
+@app.on_event("startup")
+async def start_job_workers():
+    # One set per server process, started after fork like the self-test
+    if JOB_QUEUE is not None:
+        JOB_WORKER_TASKS.extend(asyncio.create_task(run_job_worker(i)) for i in range(JOB_WORKERS))
+        logger.info("📮 %d job workers polling %s", JOB_WORKERS, JOB_QUEUE.db_path)
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in JOB_WORKER_TASKS:
+        task.cancel()
+    await asyncio.gather(*JOB_WORKER_TASKS, return_exceptions=True)
+    JOB_WORKER_TASKS.clear()
+
+def jobs_disabled_response():
+    return JSONResponse(status_code=503, content={
+        "success": False,
+        "error": "Job queue is disabled (OCR_JOBS_ENABLED=0)"
+    })
+
+@app.post("/jobs", status_code=202)
+async def submit_ocr_job(
+    file: UploadFile = File(...),
+    language: str = Form("en"),
+    enhance: bool = Form(True),
+    enhancement_level: Optional[str] = Form(None),
+    engine_mode: Optional[str] = Form(None),
+    post_process: bool = Form(True),
+    method: str = Form("auto"),
+    tenant_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form(None),
+    document_id: Optional[str] = Form(None),
+    chunk_text: bool = Form(True),
+    chunk_size: int = Form(800),
+    chunk_overlap: int = Form(0),
+    tiled: bool = Form(False),
+    webhook_url: Optional[str] = Form(None)
+):
+    """Queue an image for OCR and return its job id right away.
+
+    Poll GET /jobs/{job_id}, or pass webhook_url to have the finished job
+    POSTed there. Submitting the same image with the same options and
+    tenant_id while a job for it is queued, running or done returns that job
+    (``deduplicated: true``) and POSTs it to this webhook_url too, when it
+    finishes or right away if it already has; a cached result completes the
+    job at once.
+    """
+    start_time = time.time()
+    if JOB_QUEUE is None:
+        return jobs_disabled_response()
+    
+    if not file.content_type or not file.content_type.startswith('image/'):
+        observe_request('jobs_submit', 'invalid_type', start_time)
+        return invalid_request_response(f"Invalid file type: {file.content_type}")
+    
+    try:
+        language = check_language(language)
+        tenant_id = tenant_option(tenant_id)
+        post_processor = TEXT_POSTPROCESSORS.get(tenant_id)
+        chunking = chunking_options(chunk_text, chunk_size, chunk_overlap)
+        level = enhancement_options(enhance, enhancement_level)
+        mode = engine_mode_option(engine_mode)
+        priority = priority_option(priority, BULK)
+        if webhook_url:
+            await run_in_threadpool(validate_webhook_url, webhook_url, JOB_WEBHOOK_HOSTS)
+    except ValidationError as e:
+        observe_request('jobs_submit', 'invalid_request', start_time)
+        return invalid_request_response(validation_error_message(e), 422)
+    except UnsupportedLanguageError as e:
+        observe_request('jobs_submit', 'invalid_request', start_time)
+        return invalid_request_response(str(e), 422)
+    except ValueError as e:
+        observe_request('jobs_submit', 'invalid_request', start_time)
+        return invalid_request_response(str(e))
+    
+    # Spooled straight into the queue's inputs directory, so queueing it is a rename
+    try:
+        path, digest, file_size = await run_in_threadpool(
+            spool_upload, file.file, MAX_UPLOAD_BYTES, 'upload_', JOB_QUEUE.inputs_dir
+        )
+    except UploadTooLargeError as e:
+        observe_request('jobs_submit', 'too_large', start_time)
+        return too_large_response(e)
+    
+    # Same key as /ocr, so jobs and direct requests share cached results
+    cache_key = OCRResultCache.key_for_digest(
+        digest,
+        language=language,
+        enhance=enhance,
+        enhancement_level=level,
+        engine_mode=mode,
+        post_process=post_process,
+        method=method,
+        text_rules=post_processor.version,
+        chunk_text=chunking.chunk_text,
+        chunk_size=chunking.chunk_size,
+        chunk_overlap=chunking.chunk_overlap,
+        tiled=tiled
+    )
+    cached = None
+    if OCR_CACHE is not None:
+        cached, _ = await run_in_threadpool(OCR_CACHE.get, cache_key)
+    
+    params = {
+        "filename": file.filename,
+        "file_size": file_size,
+        "language": language,
+        "enhance": enhance,
+        "enhancement_level": level,
+        "engine_mode": mode,
+        "post_process": post_process,
+        "method": method,
+        "tenant_id": tenant_id,
+        "priority": priority,
+        "document_id": document_id,
+        "chunk_text": chunking.chunk_text,
+        "chunk_size": chunking.chunk_size,
+        "chunk_overlap": chunking.chunk_overlap,
+        "tiled": tiled
+    }
+    job_id, deduplicated = await run_in_threadpool(
+        JOB_QUEUE.submit, cache_key, params, None, webhook_url, cached, path, tenant_id
+    )
+    if deduplicated and webhook_url:
+        if not await run_in_threadpool(JOB_QUEUE.subscribe, job_id, webhook_url):
+            asyncio.create_task(notify_finished_job(job_id, webhook_url))
+    job = await run_in_threadpool(JOB_QUEUE.get, job_id)
+    outcome = 'deduplicated' if deduplicated else ('cache_hit' if cached is not None else 'queued')
+    observe_request('jobs_submit', outcome, start_time)
+    logger.info("📮 Job %s for %s: %s", job_id, file.filename, outcome)
+    
+    if cached is not None and not deduplicated and webhook_url:
+        asyncio.create_task(notify_job_webhook(job_id))
+    
+    return {
+        "job_id": job_id,
+        "status": job['status'],
+        "deduplicated": deduplicated,
+        "status_url": f"/jobs/{job_id}"
+    }
+
+@app.get("/jobs/stats")
+def job_stats():
+    """Jobs per status in the persistent queue"""
+    if JOB_QUEUE is None:
+        return {"enabled": False}
+    return {"enabled": True, "workers_per_process": JOB_WORKERS, **JOB_QUEUE.stats()}
+
+@app.get("/jobs/{job_id}")
+def get_ocr_job(job_id: str, fields: Optional[str] = None, chunk_format: str = "text"):
+    """Status of a job; includes ``result`` once it is done, trimmed to
+    ``fields`` / ``chunk_format`` as on /ocr"""
+    if JOB_QUEUE is None:
+        return jobs_disabled_response()
+    try:
+        shape = ResponseShape(fields, chunk_format)
+    except ValueError as e:
+        return invalid_request_response(str(e))
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"success": False, "error": f"Unknown job: {job_id}"})
+    view = job_view(job)
+    if "result" in view:
+        view["result"] = shape.apply(view["result"])
+    return FastJSONResponse(view)
 
 if __name__ == "__main__":
     print("🚀 Starting FIXED OCR Service...")
     print("📖 API Documentation: http://localhost:8002/docs")
-    print("🏥 Health Check: http://localhost:8002/health")
+    print("🏥 Health Check: http://localhost:8002/health (probes: /livez, /readyz)")
     print("🔍 OCR Endpoint: http://localhost:8002/ocr")
+    print("📑 Multi-page PDF/TIFF: http://localhost:8002/ocr/document")
+    print("📦 Raw body (application/octet-stream): http://localhost:8002/ocr/raw?language=en")
+    print("📮 Async jobs: POST http://localhost:8002/jobs, GET /jobs/{job_id}")
+    print("📊 Metrics: http://localhost:8002/metrics")
+    print("🧩 Multi-process mode: gunicorn -c gunicorn.conf.py image_ocr:app")
     
     print("\n🔧 Service Status:")
     print(f"   EasyOCR Available: {EASYOCR_AVAILABLE}")
-    print(f"   EasyOCR Initialized: {EASYOCR_INIT_SUCCESS}")
+    print(f"   EasyOCR Initialized: {easyocr_initialized()}")
+    print(f"   EasyOCR Engine Mode: {DEFAULT_ENGINE_MODE}")
     print(f"   Tesseract Available: {TESSERACT_AVAILABLE}")
     print(f"   OpenCV Available: {CV2_AVAILABLE}")
     
@@ -0,0 +1,13 @@
+# tests/conftest.py
+import os
+import sys
+
+# Tests import the service's modules the way benchmarks/ does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# image_ocr reads its settings once, at import, and whichever test imports it
+# first decides them for the whole session: a single worker with a one-job
+# queue (the backpressure tests rely on it), no result cache, no job workers
+for name, value in (("OCR_POOL_WORKERS", "1"), ("OCR_MAX_QUEUE", "1"), ("OCR_RETRY_AFTER", "9"),
+                    ("OCR_CACHE_ENABLED", "0"), ("OCR_JOBS_ENABLED", "0")):
+    os.environ.setdefault(name, value)
@@ -0,0 +1,64 @@
+# tests/test_documents.py
+"""PDFium is only ever entered by one thread at a time, however many
+documents and pages are read concurrently."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import documents
+
+pdfium = pytest.importorskip("pypdfium2")
+
+
+def make_pdf(path, pages=4):
+    pdf = pdfium.PdfDocument.new()
+    for _ in range(pages):
+        pdf.new_page(612, 792)
+    pdf.save(str(path))
+    pdf.close()
+    return str(path)
+
+
+def test_concurrent_documents_take_turns_in_pdfium(tmp_path, monkeypatch):
+    paths = [make_pdf(tmp_path / f"doc{index}.pdf") for index in range(6)]
+    inside = []  # threads in a pypdfium2 call (calls nest, e.g. close)
+    overlaps = []
+    guard = threading.Lock()
+
+    def exclusive(method):
+        def wrapper(*args, **kwargs):
+            with guard:
+                others = {thread for thread in inside if thread != threading.get_ident()}
+                overlaps.append(bool(others) or not documents.PDFIUM_LOCK.locked())
+                inside.append(threading.get_ident())
+            try:
+                return method(*args, **kwargs)
+            finally:
+                with guard:
+                    inside.remove(threading.get_ident())
+        return wrapper
+
+    monkeypatch.setattr(pdfium.PdfDocument, "__len__", exclusive(pdfium.PdfDocument.__len__))
+    monkeypatch.setattr(pdfium.PdfPage, "render", exclusive(pdfium.PdfPage.render))
+    monkeypatch.setattr(pdfium.PdfPage, "close", exclusive(pdfium.PdfPage.close))
+    monkeypatch.setattr(pdfium.PdfDocument, "close", exclusive(pdfium.PdfDocument.close))
+
+    def read(path):
+        # Pages are advanced one next() per task, like stream_pages does
+        pages = documents.iter_document_pages(path, "pdf", max_side=400, max_pixels=0)
+        with ThreadPoolExecutor(max_workers=2) as step:
+            numbers = []
+            while True:
+                item = step.submit(next, pages, None).result()
+                if item is None:
+                    break
+                numbers.append(item[0])
+                assert max(item[1].size) <= 400
+        return documents.count_pages(path, "pdf"), numbers
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(read, paths * 3))
+
+    assert results == [(4, [1, 2, 3, 4])] * len(results)
+    assert overlaps and not any(overlaps)
@@ -0,0 +1,133 @@
+# tests/test_ingest.py
+"""UploadLimitMiddleware caps every upload endpoint, batch bodies as a whole;
+uploads are hashed in place and raw bodies spooled off the event loop."""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+
+from utils import ingest
+from utils.ingest import (
+    FORM_OVERHEAD_BYTES, UploadLimitMiddleware, UploadTooLargeError, hash_upload,
+    max_batch_bytes_from_env, open_spooled, spool_stream, spool_upload
+)
+
+httpx = pytest.importorskip("httpx")
+
+
+async def echo_size(scope, receive, send):
+    size, more = 0, True
+    while more:
+        message = await receive()
+        size += len(message.get("body", b""))
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(size).encode()})
+
+
+def post_all(app, requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.post(path, content=body) for path, body in requests]
+
+    return asyncio.run(scenario())
+
+
+def chunked(size, chunk=64 * 1024):
+    async def body():
+        for start in range(0, size, chunk):
+            yield b"x" * min(chunk, size - start)
+    return body()
+
+
+def test_batch_bodies_have_their_own_cap():
+    rejected = []
+    app = UploadLimitMiddleware(
+        echo_size, max_bytes=1000, paths={"/ocr": "ocr", "/ocr/batch": "ocr_batch"},
+        path_max_bytes={"/ocr/batch": 10 * 1000},
+        body_factory=lambda error: json.dumps({"error": error}).encode(), on_reject=rejected.append
+    )
+    over_single = 1000 + FORM_OVERHEAD_BYTES + 1
+    over_batch = 10 * 1000 + FORM_OVERHEAD_BYTES + 1
+    responses = post_all(app, [
+        ("/ocr", b"x" * over_single),
+        ("/ocr/batch", b"x" * over_single),
+        ("/ocr/batch", b"x" * over_batch),
+        ("/ocr/batch", chunked(over_batch)),
+        ("/other", b"x" * over_batch),
+    ])
+    assert [response.status_code for response in responses] == [413, 200, 413, 413, 200]
+    assert "limit is 10000" in responses[2].json()["error"]
+    assert rejected == ["/ocr", "/ocr/batch", "/ocr/batch"]
+
+
+def test_batch_limit_defaults_to_a_multiple_of_the_upload_limit(monkeypatch):
+    monkeypatch.delenv("OCR_MAX_BATCH_BYTES", raising=False)
+    assert max_batch_bytes_from_env(1000) == 10 * 1000
+    assert max_batch_bytes_from_env(0) == 0
+    monkeypatch.setenv("OCR_MAX_BATCH_BYTES", "5000")
+    assert max_batch_bytes_from_env(1000) == 5000
+
+
+def form_upload(data, max_size=1024):
+    """An upload as starlette's multipart parser leaves it"""
+    upload = tempfile.SpooledTemporaryFile(max_size=max_size)
+    upload.write(data)
+    upload.seek(0)
+    return upload
+
+
+@pytest.mark.parametrize("size", [10, 5000])  # in memory, rolled to disk
+def test_uploads_are_hashed_in_place(tmp_path, monkeypatch, size):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    data = os.urandom(size)
+    upload = form_upload(data)
+    spooled = list(tmp_path.iterdir())
+
+    fileobj, digest, file_size = hash_upload(upload, max_bytes=size)
+    assert fileobj is upload and upload.tell() == 0
+    assert (digest, file_size) == (hashlib.sha256(data).hexdigest(), size)
+    assert list(tmp_path.iterdir()) == spooled  # no copy was made
+    with open_spooled(upload) as view:
+        assert view.read() == data
+
+
+def test_oversized_uploads_are_refused_before_copying(tmp_path):
+    upload = form_upload(b"x" * 5000)
+    with pytest.raises(UploadTooLargeError):
+        hash_upload(upload, max_bytes=4999)
+    upload.read = lambda size=-1: pytest.fail("read an oversized upload")
+    with pytest.raises(UploadTooLargeError):
+        spool_upload(upload, max_bytes=4999, dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_raw_bodies_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    writers = []
+    write = ingest._Spool.write
+
+    def recording_write(self, chunk):
+        writers.append(threading.get_ident())
+        write(self, chunk)
+
+    monkeypatch.setattr(ingest._Spool, "write", recording_write)
+
+    async def scenario():
+        path, digest, size = await spool_stream(chunked(3 * 1024 * 1024), dir=str(tmp_path))
+        return threading.get_ident(), path, digest, size
+
+    loop_thread, path, digest, size = asyncio.run(scenario())
+    with open(path, "rb") as f:
+        data = f.read()
+    assert size == len(data) == 3 * 1024 * 1024
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert writers and loop_thread not in writers
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(spool_stream(chunked(3 * 1024 * 1024), max_bytes=1000, dir=str(tmp_path)))
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
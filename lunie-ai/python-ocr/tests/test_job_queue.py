@@ -0,0 +1,119 @@
+# tests/test_job_queue.py
+"""JobQueue deduplication is scoped per tenant, every deduplicated
+submission's webhook is notified, whether the job is still live or done, and
+webhooks only reach public hosts unless allowlisted."""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from utils.job_queue import JobQueue, DONE, QUEUED, deliver_webhook, validate_webhook_url
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs"))
+
+
+def test_dedup_is_scoped_per_tenant(queue):
+    first, deduplicated = queue.submit("key", {}, b"image", tenant_id="a")
+    assert not deduplicated
+    again, deduplicated = queue.submit("key", {}, b"image", tenant_id="a")
+    assert (again, deduplicated) == (first, True)
+
+    other, deduplicated = queue.submit("key", {}, b"image", tenant_id="b")
+    assert not deduplicated and other != first
+    anonymous, deduplicated = queue.submit("key", {}, b"image")
+    assert not deduplicated and anonymous not in (first, other)
+
+
+def test_deduplicated_submission_keeps_its_webhook(queue):
+    job_id, _ = queue.submit("key", {}, b"image", webhook_url="http://hooks.example/a")
+    same, deduplicated = queue.submit("key", {}, b"image", webhook_url="http://hooks.example/b")
+    assert same == job_id and deduplicated
+
+    assert queue.subscribe(job_id, "http://hooks.example/b")
+    assert [subscriber["url"] for subscriber in queue.subscribers(job_id)] == ["http://hooks.example/b"]
+    assert queue.get(job_id)["webhook_url"] == "http://hooks.example/a"
+
+
+def test_subscribe_refuses_finished_jobs(queue):
+    job_id, _ = queue.submit("key", {}, result={"success": True})
+    assert queue.get(job_id)["status"] == DONE
+    assert not queue.subscribe(job_id, "http://hooks.example/late")
+    assert queue.subscribers(job_id) == []
+    assert not queue.subscribe("missing", "http://hooks.example/late")
+
+
+def test_notify_reaches_every_subscriber(queue, monkeypatch):
+    import image_ocr
+
+    delivered = []
+    monkeypatch.setattr(image_ocr, "JOB_QUEUE", queue)
+    monkeypatch.setattr(image_ocr, "deliver_webhook",
+                        lambda url, payload, allowed_hosts=(): delivered.append((url, payload["status"]))
+                        or "delivered (200)")
+
+    job_id, _ = queue.submit("key", {}, b"image", webhook_url="http://hooks.example/a")
+    assert queue.get(job_id)["status"] == QUEUED
+    queue.subscribe(job_id, "http://hooks.example/b")
+    job = queue.lease("worker")
+    queue.complete(job["id"], "worker", {"success": True})
+
+    asyncio.run(image_ocr.notify_job_webhook(job_id))
+    assert delivered == [("http://hooks.example/a", DONE), ("http://hooks.example/b", DONE)]
+    assert queue.get(job_id)["webhook_status"] == "delivered (200)"
+    assert queue.subscribers(job_id)[0]["status"] == "delivered (200)"
+
+    # A submission deduplicated after the job finished is notified at once
+    delivered.clear()
+    asyncio.run(image_ocr.notify_finished_job(job_id, "http://hooks.example/c"))
+    assert delivered == [("http://hooks.example/c", DONE)]
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/hook",
+    "http://localhost:8000/hook",
+    "http://[::1]/hook",
+    "http://10.0.0.5/hook",
+    "http://192.168.1.1/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://0.0.0.0/hook",
+])
+def test_webhooks_to_internal_addresses_are_refused(url):
+    with pytest.raises(ValueError):
+        validate_webhook_url(url)
+
+
+def test_allowlisted_hosts_may_be_internal():
+    validate_webhook_url("http://127.0.0.1:9000/hook", ("127.0.0.1",))
+    validate_webhook_url("https://93.184.216.34/hook")
+    with pytest.raises(ValueError):
+        validate_webhook_url("https://93.184.216.34/hook", ("127.0.0.1",))
+
+
+def test_delivery_does_not_follow_redirects():
+    requests = []
+
+    class Redirecting(BaseHTTPRequestHandler):
+        def do_POST(self):
+            requests.append(self.path)
+            self.send_response(307)
+            self.send_header("Location", "http://169.254.169.254/latest/meta-data/")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Redirecting)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/hook"
+        assert deliver_webhook(url, {}, allowed_hosts=("127.0.0.1",)) == "failed (307)"
+        assert requests == ["/hook"]
+        assert deliver_webhook(url, {}).startswith("refused")
+        assert requests == ["/hook"]
+    finally:
+        server.shutdown()
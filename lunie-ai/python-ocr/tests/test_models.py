@@ -0,0 +1,36 @@
+# tests/test_models.py
+"""Chunk overlap is capped at half the chunk size, so chunking cannot blow a
+response up to many copies of the text."""
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from models.ocr_models import OCRRequest
+
+
+def test_overlap_up_to_half_the_chunk_size_is_accepted():
+    assert OCRRequest(chunk_size=1000, chunk_overlap=500).chunk_overlap == 500
+    assert OCRRequest(chunk_size=1001, chunk_overlap=500).chunk_overlap == 500
+    assert OCRRequest(chunk_size=100, chunk_overlap=0).chunk_overlap == 0
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(1000, 501), (1001, 501), (1001, 1000), (100, 100)])
+def test_overlap_past_half_the_chunk_size_is_refused(chunk_size, chunk_overlap):
+    with pytest.raises(ValidationError):
+        OCRRequest(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def test_ocr_endpoint_answers_422_for_a_large_overlap():
+    httpx = pytest.importorskip("httpx")
+    import image_ocr
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=image_ocr.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/ocr", files={"file": ("a.png", b"x", "image/png")},
+                                     data={"chunk_size": "1001", "chunk_overlap": "1000"})
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 422
+    assert "at most half of chunk_size" in response.json()["error"]
@@ -0,0 +1,42 @@
+# tests/test_preprocess.py
+"""Per-thread scratch buffers stay under SCRATCH_MAX_BYTES whatever the
+image size, without changing the preprocessed output."""
+import numpy as np
+
+from utils import preprocess
+
+
+def make_page(height, width, seed=3):
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 3), 235, dtype=np.uint8)
+    for top in range(20, height - 20, 24):
+        page[top:top + 10, 30:width - 30] = rng.integers(0, 80, size=(10, width - 60, 1), dtype=np.uint8)
+    return page
+
+
+def test_retained_scratch_stays_under_the_cap(monkeypatch):
+    page = make_page(900, 700)
+    preprocess.release_buffers()
+    expected, _ = preprocess.preprocess_image(page, preprocess.HEAVY)
+    assert preprocess.retained_bytes() > 1024 * 1024
+
+    cap = 1024 * 1024
+    monkeypatch.setattr(preprocess, "SCRATCH_MAX_BYTES", cap)
+    preprocess.release_buffers()
+    for _ in range(2):
+        processed, _ = preprocess.preprocess_image(page, preprocess.HEAVY)
+        assert np.array_equal(processed, expected)
+        assert preprocess.retained_bytes() <= cap
+
+    small = make_page(120, 100)
+    preprocess.preprocess_image(small, preprocess.HEAVY)
+    assert 0 < preprocess.retained_bytes() <= cap
+
+
+def test_oversized_pages_are_flagged_for_release(monkeypatch):
+    monkeypatch.setattr(preprocess, "SCRATCH_MAX_BYTES", 64 * 1024 * 1024)
+    assert not preprocess.oversized((1500, 1500))
+    assert preprocess.oversized((6000, 4500))
+    preprocess.preprocess_image(make_page(200, 200), preprocess.HEAVY)
+    preprocess.release_buffers()
+    assert preprocess.retained_bytes() == 0
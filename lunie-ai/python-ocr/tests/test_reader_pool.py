@@ -0,0 +1,58 @@
+# tests/test_reader_pool.py
+"""Unsupported languages are refused before a reader is built, and failed
+builds are remembered only up to ReaderManager's bound."""
+import asyncio
+
+import pytest
+
+from utils.language_detect import UnsupportedLanguageError, check_language
+from utils.reader_pool import ReaderManager
+
+
+def failing_factory(language):
+    raise RuntimeError(f"no model for {language}")
+
+
+def test_failed_builds_are_bounded():
+    manager = ReaderManager(failing_factory, max_failed=3, size_fn=None)
+    for index in range(10):
+        with pytest.raises(RuntimeError):
+            manager.get(f"lang{index}")
+
+    languages = manager.status()["languages"]
+    assert sorted(languages) == ["lang7", "lang8", "lang9"]
+    assert languages["lang9"] == {"state": "failed", "error": "no model for lang9"}
+    assert manager.state("lang9") == "failed"
+    assert manager.state("lang0") == "not_loaded"
+
+
+@pytest.mark.parametrize("language", ["en", "ch_sim", "eng", "spa", "auto", "multi"])
+def test_supported_languages_pass(language):
+    assert check_language(language) == language
+
+
+@pytest.mark.parametrize("language", ["", "EN", "xx", "en,fr", "a" * 1000])
+def test_unsupported_languages_are_refused(language):
+    with pytest.raises(UnsupportedLanguageError):
+        check_language(language)
+
+
+def test_ocr_endpoint_refuses_unsupported_languages_with_422(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    import image_ocr
+
+    monkeypatch.setattr(image_ocr.READER_MANAGER, "get", lambda language: pytest.fail("reader requested"))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=image_ocr.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                await client.post("/ocr", files={"file": ("a.png", b"x", "image/png")},
+                                  data={"language": language})
+                for language in ("xx-random-1", "xx-random-2")
+            ]
+
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [422, 422]
+    assert "Unsupported language" in responses[0].json()["error"]
+    assert "xx-random-1" not in image_ocr.READER_MANAGER.status()["languages"]
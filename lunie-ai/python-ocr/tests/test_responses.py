@@ -0,0 +1,31 @@
+# tests/test_responses.py
+"""ResponseShape keeps what a caller needs to rebuild the fields it asked for."""
+import pytest
+
+from utils.responses import ResponseShape
+
+RESPONSE = {
+    "success": True, "text": "alpha beta", "confidence": 90.0,
+    "chunks": ["alpha", "beta"], "chunk_offsets": [[0, 5], [6, 10]], "chunk_count": 2
+}
+
+
+def test_offsets_for_selected_chunks_come_with_their_text():
+    shaped = ResponseShape("chunks", "offsets").apply(RESPONSE)
+    assert shaped == {"success": True, "text": "alpha beta", "chunk_offsets": [[0, 5], [6, 10]]}
+    assert [shaped["text"][start:end] for start, end in shaped["chunk_offsets"]] == RESPONSE["chunks"]
+
+
+def test_offsets_without_a_selection_drop_only_the_chunk_copies():
+    shaped = ResponseShape(None, "offsets").apply(RESPONSE)
+    assert "chunks" not in shaped
+    assert shaped["text"] == "alpha beta" and shaped["chunk_count"] == 2
+
+
+def test_fields_are_trimmed_and_validated():
+    assert ResponseShape("confidence").apply(RESPONSE) == {"success": True, "confidence": 90.0}
+    assert ResponseShape().apply(RESPONSE) is RESPONSE
+    with pytest.raises(ValueError):
+        ResponseShape("nope")
+    with pytest.raises(ValueError):
+        ResponseShape(None, "ranges")
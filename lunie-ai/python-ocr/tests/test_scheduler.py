@@ -0,0 +1,218 @@
+# tests/test_scheduler.py
+"""FairScheduler keeps the worker pool's fast-fail backpressure: jobs that
+cannot start and find the queue full are refused with PoolSaturatedError,
+which the endpoints answer with 503 + Retry-After."""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from utils.scheduler import FairScheduler, INTERACTIVE, BULK, RECENT_TENANTS
+from utils.worker_pool import OCRWorkerPool, PoolSaturatedError
+
+
+def blocking_job(release):
+    release.wait(5)
+    return "done"
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_interactive_queue_is_bounded_by_pool_max_queue():
+    async def scenario():
+        release = threading.Event()
+        pool = OCRWorkerPool("thread", max_workers=1, max_queue=1, retry_after=7)
+        scheduler = FairScheduler(pool)
+        try:
+            running = scheduler.submit("a", INTERACTIVE, blocking_job, release)
+            queued = scheduler.submit("b", INTERACTIVE, blocking_job, release)
+            with pytest.raises(PoolSaturatedError) as refused:
+                scheduler.submit("c", INTERACTIVE, blocking_job, release)
+            assert refused.value.retry_after == 7
+            stats = scheduler.stats()
+            assert stats["queued"][INTERACTIVE] == 1
+            assert stats["tenants"]["c"]["rejected"] == 1
+            release.set()
+            assert await asyncio.gather(running, queued) == ["done", "done"]
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+    run(scenario())
+
+
+def test_job_with_a_free_worker_is_admitted_with_zero_queue():
+    async def scenario():
+        release = threading.Event()
+        pool = OCRWorkerPool("thread", max_workers=1, max_queue=0)
+        scheduler = FairScheduler(pool)
+        try:
+            first = scheduler.submit("a", INTERACTIVE, blocking_job, release)
+            with pytest.raises(PoolSaturatedError):
+                scheduler.submit("a", INTERACTIVE, blocking_job, release)
+            release.set()
+            assert await first == "done"
+            # The refused job left no trace in the fair-queueing state
+            assert scheduler.stats()["queued"] == {INTERACTIVE: 0, BULK: 0}
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+    run(scenario())
+
+
+def test_bulk_backlog_does_not_refuse_interactive_work():
+    async def scenario():
+        release = threading.Event()
+        pool = OCRWorkerPool("thread", max_workers=2, max_queue=1)
+        scheduler = FairScheduler(pool, max_queued=20)
+        try:
+            bulk = [scheduler.submit("importer", BULK, blocking_job, release) for _ in range(10)]
+            interactive = scheduler.submit("user", INTERACTIVE, blocking_job, release)
+            release.set()
+            await asyncio.gather(interactive, *bulk)
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+    run(scenario())
+
+
+def test_cancelled_job_frees_its_queue_place():
+    async def scenario():
+        release = threading.Event()
+        pool = OCRWorkerPool("thread", max_workers=1, max_queue=1)
+        scheduler = FairScheduler(pool)
+        try:
+            running = scheduler.submit("a", INTERACTIVE, blocking_job, release)
+            waiting = scheduler.submit("b", INTERACTIVE, blocking_job, release)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            replacement = scheduler.submit("c", INTERACTIVE, blocking_job, release)
+            release.set()
+            assert await asyncio.gather(running, replacement) == ["done", "done"]
+            assert scheduler.stats()["tenants"]["b"]["cancelled"] == 1
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+    run(scenario())
+
+
+def test_idle_tenants_are_not_kept():
+    """State for client-supplied tenant ids goes away once they are idle;
+    stats() keeps the most recent ones"""
+    async def scenario():
+        pool = OCRWorkerPool("thread", max_workers=2, max_queue=4)
+        scheduler = FairScheduler(pool)
+        try:
+            for batch in range(10):
+                await asyncio.gather(*(
+                    scheduler.submit(f"tenant-{batch}-{index}", priority, str, index)
+                    for index in range(100) for priority in (INTERACTIVE, BULK)
+                    if index < 4 or priority == BULK
+                ))
+            again = await scheduler.submit("tenant-9-99", BULK, str, 1)
+        finally:
+            pool.shutdown(wait=True)
+        stats = scheduler.stats()
+        assert again == "1"
+        assert stats["active_tenants"] == 0 and len(scheduler._tenants) == 0
+        assert len(stats["tenants"]) == RECENT_TENANTS
+        assert stats["tenants"]["tenant-9-99"]["dispatched"][BULK] == 2
+        assert len(scheduler._finish_tags) <= max(64, 2 * RECENT_TENANTS)
+
+    run(scenario())
+
+
+def test_ocr_endpoint_answers_503_with_retry_after_when_full(monkeypatch):
+    """/ocr with 1 worker and OCR_MAX_QUEUE=1: of 4 concurrent requests one
+    runs, one waits and the other two are refused at once"""
+    monkeypatch.setenv("OCR_POOL_WORKERS", "1")
+    monkeypatch.setenv("OCR_MAX_QUEUE", "1")
+    monkeypatch.setenv("OCR_RETRY_AFTER", "9")
+    monkeypatch.setenv("OCR_CACHE_ENABLED", "0")
+    monkeypatch.setenv("OCR_JOBS_ENABLED", "0")
+    httpx = pytest.importorskip("httpx")
+    import image_ocr
+
+    if image_ocr.OCR_POOL.max_workers != 1 or image_ocr.OCR_POOL.max_queue != 1:
+        pytest.skip("image_ocr was already imported with other settings")
+
+    def slow_pipeline(*args):
+        time.sleep(0.5)
+        return {'ocr_result': None, 'original_size': (1, 1), 'ocr_method': 'none', 'timings': {}}
+
+    monkeypatch.setattr(image_ocr, "run_ocr_pipeline", slow_pipeline)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=image_ocr.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            def post():
+                return client.post("/ocr", files={"file": ("a.png", b"x", "image/png")})
+            return await asyncio.gather(*(post() for _ in range(4)))
+
+    responses = run(scenario())
+    refused = [response for response in responses if response.status_code == 503]
+    assert len(refused) == 2
+    assert all(response.headers["retry-after"] == "9" for response in refused)
+    assert sorted(response.status_code for response in responses) == [200, 200, 503, 503]
+
+
+def test_ocr_endpoint_refuses_invalid_tenant_ids():
+    httpx = pytest.importorskip("httpx")
+    import image_ocr
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=image_ocr.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                await client.post("/ocr", files={"file": ("a.png", b"x", "image/png")},
+                                  data={"tenant_id": tenant_id})
+                for tenant_id in ("../acme", "a" * 65, "acme\n")
+            ]
+
+    responses = run(scenario())
+    assert [response.status_code for response in responses] == [400, 400, 400]
+    assert "Invalid tenant_id" in responses[0].json()["error"]
+
+
+def test_bulk_never_takes_every_slot():
+    pool = OCRWorkerPool("thread", max_workers=1, max_queue=0)
+    try:
+        assert FairScheduler(pool, slots=2, bulk_max_share=1.0).bulk_slots == 1
+        assert FairScheduler(pool, slots=4, bulk_max_share=0.75).bulk_slots == 3
+        assert FairScheduler(pool, slots=8, bulk_max_share=0.1).bulk_slots == 1
+        # A single slot is shared: bulk may use it
+        assert FairScheduler(pool, slots=1).bulk_slots == 1
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_single_slot_runs_interactive_right_after_the_running_bulk_job():
+    async def scenario():
+        release = threading.Event()
+        pool = OCRWorkerPool("thread", max_workers=1, max_queue=1)
+        scheduler = FairScheduler(pool, max_queued=20)
+        order = []
+
+        def job(name):
+            release.wait(5)
+            order.append(name)
+
+        try:
+            bulk = [scheduler.submit("importer", BULK, job, f"bulk-{index}") for index in range(5)]
+            interactive = scheduler.submit("user", INTERACTIVE, job, "interactive")
+            release.set()
+            await asyncio.gather(interactive, *bulk)
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+        return order
+
+    order = run(scenario())
+    assert order[:2] == ["bulk-0", "interactive"]
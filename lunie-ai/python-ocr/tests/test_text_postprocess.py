@@ -0,0 +1,159 @@
+# tests/test_text_postprocess.py
+"""TextPostProcessor gives exactly the original post_process_text output, and
+tenant rules files are applied, reloaded and confined to their directory."""
+import json
+import os
+import random
+import re
+
+import pytest
+
+from utils.text_postprocess import TextPostProcessor, TenantPostProcessors
+
+
+def legacy_post_process_text(text, confidence=0):
+    """post_process_text as it was in image_ocr.py (the golden reference)"""
+    if not text or not text.strip():
+        return text
+
+    cleaned = text.strip()
+
+    if confidence < 90:
+        common_corrections = {
+            r'\brn\b': 'm',
+            r'\bvv\b': 'w',
+            r'\b0(?=[a-zA-Z])': 'O',
+            r'\b1(?=[a-zA-Z])': 'l',
+            r'(?<=[a-zA-Z])0\b': 'o',
+            r'(?<=[a-zA-Z])5(?=[a-zA-Z])': 's',
+            r'\|': 'l',
+        }
+
+        for pattern, replacement in common_corrections.items():
+            cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
+
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = re.sub(r'\s+([,.!?;:])', r'\1', cleaned)
+    cleaned = re.sub(r'([,.!?;:])\s*', r'\1 ', cleaned)
+
+    return cleaned.strip()
+
+
+EDGE_CASES = [
+    "", " ", "\n\t ", "a", "rn", "RN", "Rn rn vv VV", "|rn|", "||", "0a 1b a0 a5b",
+    "05a", "150ok", "a00", "x0 0x", "O0 0O", "a5b5c", "5a5", "h3ll0 w0rld", "1nvoice 0rder",
+    "rn.", ".rn", "rn,rn", "a . , b", "a .,b", "Hello , world !How are you ?", "end.",
+    "  leading and trailing  ", "tab\tsep\nnew\r\nline", "a b c", "Straße 5tr", "ſ5a",
+    "K0 K0", "x|y", "word|", "| word", "...", "a...b", "?!", " , ", ":;", "3.14 is pi",
+    "e-mail: test@example.com, url: http://x.y/z?q=1", "rń", "数字0a", "über0",
+]
+# Both sides of the confidence threshold
+CONFIDENCES = (0, 89.9, 90, 99)
+
+WORDS = ("invoice total amount due customer rn vv order 0rder 1tem item quantity price "
+         "tax subtotal date paid a0 b5c | account number reference payment shipping").split()
+PUNCT = [".", ",", "!", "?", ";", ":", "", "", "", ""]
+
+
+def make_page(rng, lines=60):
+    page = []
+    for _ in range(lines):
+        words = [rng.choice(WORDS) + rng.choice(PUNCT) for _ in range(rng.randint(4, 14))]
+        page.append(rng.choice([" ", "  ", " \t"]).join(words))
+    return "\n".join(page)
+
+
+def make_document(pages, seed=7):
+    """Generated multi-page OCR text, pages separated by form feeds"""
+    rng = random.Random(seed)
+    return "\n\n\f".join(make_page(rng) for _ in range(pages))
+
+
+FUZZ_ALPHABET = "rnvwRNVW0156|ab Oo.,!?;:\t\n\r x\u017f\u212a\xe9 \x0b\x0c\x1c\x85\xa0\u2028\u3000"
+
+
+def fuzz_inputs(count, seed=11):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 24)))
+
+
+def assert_same_as_legacy(processor, inputs):
+    for text in inputs:
+        for confidence in CONFIDENCES:
+            assert processor(text, confidence) == legacy_post_process_text(text, confidence), \
+                f"confidence {confidence}: {text!r}"
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return TextPostProcessor()
+
+
+def test_edge_cases_match_legacy(processor):
+    assert_same_as_legacy(processor, EDGE_CASES)
+
+
+def test_generated_pages_match_legacy(processor):
+    document = make_document(3)
+    assert_same_as_legacy(processor, document.split("\f") + [document])
+
+
+def test_fuzz_matches_legacy(processor):
+    assert_same_as_legacy(processor, fuzz_inputs(20000))
+
+
+def write_rules(rules_dir, tenant_id, rules, mtime_ns=None):
+    path = os.path.join(rules_dir, f"{tenant_id}.json")
+    with open(path, "w") as f:
+        json.dump(rules, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_tenant_replace_and_ordered_patterns(tmp_path):
+    write_rules(tmp_path, "acme", {
+        "replace": {"Lunie Al": "Lunie AI", "Al": "AL", "ab": "x", "abc": "y"},
+        "patterns": [
+            {"pattern": r"\binv0ice\b", "replacement": "invoice", "ignore_case": True},
+            # Sees the first pattern's output: patterns apply in file order
+            {"pattern": r"\binvoice\b", "replacement": "INVOICE"},
+        ]
+    })
+    processor = TenantPostProcessors(str(tmp_path)).get("acme")
+
+    # Longest literal wins, in one pass, after the built-in clean-up
+    assert processor("Lunie  Al abc ab , Al", 99) == "Lunie AI y x, AL"
+    assert processor("INV0ICE inv0ice invoice", 99) == "INVOICE INVOICE INVOICE"
+    # The default corrections still run first at low confidence
+    assert processor("rn inv0ice", 50) == "m INVOICE"
+
+
+def test_tenant_rules_reload_when_the_file_changes(tmp_path):
+    tenants = TenantPostProcessors(str(tmp_path))
+    write_rules(tmp_path, "acme", {"replace": {"a": "b"}}, mtime_ns=1_000_000_000)
+    first = tenants.get("acme")
+    assert first("a", 99) == "b"
+    assert tenants.get("acme") is first
+
+    write_rules(tmp_path, "acme", {"replace": {"a": "c"}}, mtime_ns=2_000_000_000)
+    second = tenants.get("acme")
+    assert second is not first and second.version != first.version
+    assert second("a", 99) == "c"
+
+
+def test_missing_or_broken_rules_get_the_default(tmp_path):
+    tenants = TenantPostProcessors(str(tmp_path))
+    assert tenants.get("nobody") is tenants.default
+    assert tenants.get(None) is tenants.default
+    write_rules(tmp_path, "broken", {"patterns": [{"pattern": "(", "replacement": ""}]})
+    assert tenants.get("broken") is tenants.default
+    without_rules = TenantPostProcessors(None)
+    assert without_rules.get("acme") is without_rules.default
+
+
+@pytest.mark.parametrize("tenant_id", ["../acme", "acme/../../etc", "a b", "acme.json", "x" * 65])
+def test_invalid_tenant_ids_are_refused(tmp_path, tenant_id):
+    with pytest.raises(ValueError):
+        TenantPostProcessors(str(tmp_path)).get(tenant_id)
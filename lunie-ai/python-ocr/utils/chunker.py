@@ -0,0 +1,91 @@
+# utils/chunker.py
+import re
+
+# Break preferences, best first: (separator, characters of it kept in the
+# chunk). Paragraph, line and sentence breaks are only taken when the chunk
+# would still be at least half full; otherwise the next preference is tried.
+PARAGRAPH_BREAKS = (('\n\n', 0),)
+LINE_BREAKS = (('\n', 0),)
+SENTENCE_BREAKS = (('. ', 1), ('! ', 1), ('? ', 1), ('; ', 1))
+WORD_BREAKS = ((' ', 0), ('\t', 0), ('\n', 0))
+
+_WHITESPACE = re.compile(r'\s')
+_NON_WHITESPACE = re.compile(r'\S')
+
+
+def _last_break(text, breaks, lo, hi):
+    """End offset of the last break in text[lo:hi] (separator may run past hi)"""
+    best = -1
+    for separator, kept in breaks:
+        index = text.rfind(separator, lo, hi + len(separator) - kept)
+        if index != -1:
+            best = max(best, index + kept)
+    return best
+
+
+def _skip_whitespace(text, pos, end):
+    match = _NON_WHITESPACE.search(text, pos, end)
+    return match.start() if match else end
+
+
+def _trim_end(text, start, end):
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def iter_chunks(text, chunk_size=800, overlap=0):
+    """Yield (start, end) offsets of chunks of ``text``, each at most
+    ``chunk_size`` characters, without copying the text.
+
+    Chunks end at the last paragraph break, line break, sentence end or
+    whitespace in the window, in that order of preference, and only fall
+    back to a hard cut inside a word with no whitespace at all. Leading and
+    trailing whitespace is excluded from each chunk. With ``overlap`` > 0 the
+    next chunk starts at the first word beginning at most ``overlap``
+    characters before the previous end. Every search is bounded to the
+    current window, so the whole pass is linear in len(text).
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+
+    length = _trim_end(text, 0, len(text))
+    start = _skip_whitespace(text, 0, length)
+    while start < length:
+        hi = start + chunk_size
+        if hi >= length:
+            end = length
+        else:
+            half = start + chunk_size // 2
+            end = -1
+            for breaks, lo in ((PARAGRAPH_BREAKS, half), (LINE_BREAKS, half),
+                               (SENTENCE_BREAKS, half), (WORD_BREAKS, start + 1)):
+                end = _last_break(text, breaks, lo, hi)
+                if end > start:
+                    break
+            if end <= start:
+                end = hi
+
+        end = _trim_end(text, start, end)
+        if end > start:
+            yield start, end
+        if end >= length:
+            return
+
+        next_start = end
+        if overlap:
+            # Begin the overlap on a word boundary, never mid-word
+            pos = max(end - overlap, start + 1)
+            if not text[pos - 1].isspace():
+                match = _WHITESPACE.search(text, pos, end)
+                pos = match.end() if match else end
+            next_start = pos
+        start = _skip_whitespace(text, next_start, length)
+
+
+def split_chunks(text, chunk_size=800, overlap=0):
+    """Return (chunks, offsets) lists for ``text``"""
+    offsets = list(iter_chunks(text, chunk_size, overlap))
+    return [text[start:end] for start, end in offsets], offsets
@@ -0,0 +1,54 @@
+# utils/cpu_budget.py
+import os
+
+
+def available_cpus():
+    """CPUs this process may run on (respects taskset/cgroup affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def server_processes():
+    """Number of server processes sharing this machine (set by gunicorn.conf.py)"""
+    return max(1, int(os.environ.get("OCR_PROCESSES", "1")))
+
+
+def torch_threads_per_job(processes, pool_workers):
+    """Intra-op threads for one OCR job so processes x jobs x threads ~= cores.
+
+    OCR_TORCH_THREADS overrides the computed value.
+    """
+    explicit = os.environ.get("OCR_TORCH_THREADS")
+    if explicit:
+        return max(1, int(explicit))
+    return max(1, available_cpus() // (max(1, processes) * max(1, pool_workers)))
+
+
+def torch_interop_threads():
+    """Inter-op threads per process (OCR_TORCH_INTEROP_THREADS, default 1).
+
+    EasyOCR runs its models one op after another, so extra inter-op threads
+    only add contention with the other jobs' intra-op pools.
+    """
+    return max(1, int(os.environ.get("OCR_TORCH_INTEROP_THREADS", "1")))
+
+
+def configure_torch_threads(intra_op, inter_op=1):
+    """Pin torch/OpenMP thread pools for this process; no-op without torch"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(intra_op)
+
+    try:
+        import torch
+    except ImportError:
+        return False
+
+    torch.set_num_threads(intra_op)
+    try:
+        torch.set_num_interop_threads(inter_op)
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work in a process
+        pass
+    return True
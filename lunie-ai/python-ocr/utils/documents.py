@@ -0,0 +1,125 @@
+# utils/documents.py
+"""Multi-page documents (PDF, multi-frame TIFF, single images) decoded one page at a time."""
+import math
+import threading
+
+from PIL import Image, ImageSequence
+
+from utils.image_decode import ImageTooLargeError
+
+# PDF rasterizing is optional (pip install pypdfium2)
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# PDFium is not thread-safe: every pypdfium2 call (open, page count, render,
+# close) holds this lock, so concurrent documents and pages take turns in it
+PDFIUM_LOCK = threading.Lock()
+
+PDF_MAGIC = b'%PDF-'
+
+
+class UnsupportedDocumentError(ValueError):
+    """Upload is not a document this service can read"""
+
+
+def document_kind(path):
+    """'pdf' or 'image', from the file's magic bytes"""
+    with open(path, 'rb') as f:
+        return 'pdf' if f.read(len(PDF_MAGIC)) == PDF_MAGIC else 'image'
+
+
+def count_pages(path, kind):
+    if kind == 'pdf':
+        _require_pdfium()
+        with PDFIUM_LOCK:
+            try:
+                pdf = pdfium.PdfDocument(path)
+            except pdfium.PdfiumError as e:
+                raise UnsupportedDocumentError(f"Not a readable PDF: {e}")
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    try:
+        with Image.open(path) as image:
+            return getattr(image, 'n_frames', 1)
+    except (OSError, SyntaxError):
+        raise UnsupportedDocumentError("Not a readable image or PDF")
+
+
+def _require_pdfium():
+    if not PDFIUM_AVAILABLE:
+        raise UnsupportedDocumentError("PDF support needs pypdfium2 (pip install pypdfium2)")
+
+
+def iter_pdf_pages(path, max_side, max_pixels, dpi=200, skip=()):
+    """Yield (page_number, PIL image) rendered straight at OCR size.
+
+    Pages are rendered at ``dpi``, or smaller when that would exceed
+    ``max_side`` or ``max_pixels``, so no page is rasterized larger than it
+    will be used. Only one page is open at a time; page numbers in ``skip``
+    are not rendered or yielded. PDFIUM_LOCK is held while a page renders,
+    never across a yield, so the caller may advance this from any thread.
+    """
+    _require_pdfium()
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(path)
+        page_count = len(pdf)
+    try:
+        for index in range(page_count):
+            if index + 1 in skip:
+                continue
+            with PDFIUM_LOCK:
+                image = _render_pdf_page(pdf, index, max_side, max_pixels, dpi)
+            yield index + 1, image
+    finally:
+        with PDFIUM_LOCK:
+            pdf.close()
+
+
+def _render_pdf_page(pdf, index, max_side, max_pixels, dpi):
+    """RGB PIL copy of one page (caller holds PDFIUM_LOCK)"""
+    page = pdf[index]
+    try:
+        width, height = page.get_size()  # points, 1/72 inch
+        scale = dpi / 72
+        if max_side:
+            scale = min(scale, max_side / max(width, height))
+        if max_pixels:
+            scale = min(scale, math.sqrt(max_pixels / (width * height)))
+        bitmap = page.render(scale=scale)
+        try:
+            return bitmap.to_pil().convert('RGB')  # own copy, independent of the bitmap
+        finally:
+            bitmap.close()
+    finally:
+        page.close()
+
+
+def iter_image_pages(path, max_pixels, skip=()):
+    """Yield (page_number, PIL image or ImageTooLargeError) per TIFF/GIF frame.
+
+    Each frame is decoded only when reached and its size checked from the
+    header first; frames in ``skip`` are never decoded.
+    """
+    with Image.open(path) as image:
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            if index + 1 in skip:
+                continue
+            width, height = frame.size
+            if max_pixels and width * height > max_pixels:
+                yield index + 1, ImageTooLargeError(
+                    f"Page {index + 1} is {width}x{height} ({width * height} pixels), limit is {max_pixels}"
+                )
+                continue
+            yield index + 1, frame.copy()
+
+
+def iter_document_pages(path, kind, max_side, max_pixels, dpi=200, skip=()):
+    if kind == 'pdf':
+        return iter_pdf_pages(path, max_side, max_pixels, dpi, skip)
+    return iter_image_pages(path, max_pixels, skip)
+
@@ -0,0 +1,146 @@
+# utils/image_classify.py
+"""Cheap NumPy pre-pass that estimates whether an image has text and how hard it is.
+
+Runs on a block-reduced copy of at most SAMPLE_SIDE px per side, so it
+costs a few milliseconds even for large images:
+
+- contrast: distance from the dominant (background) level to the darkest
+  or brightest level with at least a few pixels; text can cover well under
+  1% of an image, so percentiles would miss the ink
+- edge_density: share of pixels with a strong horizontal or vertical step
+- background_ratio: share of pixels within BACKGROUND_TOLERANCE of the
+  dominant luminance (flat paper/screenshot backgrounds score high)
+- text_lines: runs of rows dense in edges, i.e. probable lines of text
+"""
+import os
+
+import numpy as np
+
+SAMPLE_SIDE = 512
+EDGE_THRESHOLD = 40
+BACKGROUND_TOLERANCE = 24
+# Rows with at least this share (and LINE_ROW_MIN_EDGES) of edge pixels
+# belong to a text line; low, so a single short word still counts
+LINE_ROW_DENSITY = 0.005
+LINE_ROW_MIN_EDGES = 3
+
+# Below this contrast, or with fewer edge pixels than this, there is nothing
+# to read. Kept deliberately low: a wrong skip loses text, a wrong "hard"
+# only costs time.
+BLANK_CONTRAST = 24
+BLANK_MAX_EDGES = 6
+# Darkest/brightest level with at least this many pixels counts as ink
+INK_MIN_PIXELS = 3
+# Above all of these the image is clean text on a flat background
+EASY_CONTRAST = 100
+EASY_BACKGROUND_RATIO = 0.6
+EASY_MAX_EDGE_DENSITY = 0.25
+
+BLANK = "blank"
+EASY = "easy"
+HARD = "hard"
+
+
+def _luminance(sample):
+    if sample.ndim == 3:
+        # Integer BT.601 weights; exact enough for statistics
+        rgb = sample[..., :3].astype(np.uint16)
+        sample = ((77 * rgb[..., 0] + 150 * rgb[..., 1] + 29 * rgb[..., 2]) >> 8).astype(np.uint8)
+    return sample
+
+
+def _block_reduce(image, step, op):
+    """Reduce each step x step block with ``op`` (np.minimum/np.maximum)"""
+    g = image[:image.shape[0] // step * step, :image.shape[1] // step * step]
+    rows = g[0::step]
+    for k in range(1, step):
+        rows = op(rows, g[k::step])
+    reduced = rows[:, 0::step]
+    for k in range(1, step):
+        reduced = op(reduced, rows[:, k::step])
+    return reduced
+
+
+def _gray_sample(image_array):
+    """Single-channel image of at most SAMPLE_SIDE px per side.
+
+    Plain striding would step over thin strokes, so each step x step block
+    (and, for colour images, each pixel's channels) is reduced to its
+    darkest value, or brightest on a dark background: ink survives the
+    reduction however small or colourful the text is.
+    """
+    height, width = image_array.shape[:2]
+    step = max(1, -(-max(height, width) // SAMPLE_SIDE))
+    stride = max(1, step, -(-max(height, width) // 128))
+    dark_background = np.median(_luminance(image_array[::stride, ::stride])) < 128
+    op = np.maximum if dark_background else np.minimum
+
+    reduced = image_array
+    if step > 1 and height >= step and width >= step:
+        reduced = _block_reduce(image_array, step, op)
+    if reduced.ndim == 3:
+        reduced = op(op(reduced[..., 0], reduced[..., 1]), reduced[..., 2])
+    return reduced
+
+
+def _count_runs(mask, min_length):
+    """Number of runs of True at least ``min_length`` long"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    changes = np.flatnonzero(np.diff(padded))
+    lengths = changes[1::2] - changes[::2]
+    return int(np.count_nonzero(lengths >= min_length))
+
+
+def image_features(image_array):
+    gray = _gray_sample(image_array)
+    if gray.size == 0 or min(gray.shape) < 2:
+        return {'contrast': 0, 'edge_pixels': 0, 'edge_density': 0.0, 'background_ratio': 1.0, 'text_lines': 0}
+
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    cumulative = np.cumsum(histogram)
+    total = cumulative[-1]
+    low = int(np.searchsorted(cumulative, INK_MIN_PIXELS))
+    high = int(np.searchsorted(cumulative, total - INK_MIN_PIXELS))
+    mode = int(np.argmax(histogram))
+    background = cumulative[min(255, mode + BACKGROUND_TOLERANCE)] - (
+        cumulative[mode - BACKGROUND_TOLERANCE - 1] if mode > BACKGROUND_TOLERANCE else 0)
+
+    signed = gray.astype(np.int16)
+    edges = np.zeros(gray.shape, dtype=bool)
+    edges[:, 1:] |= np.abs(np.diff(signed, axis=1)) > EDGE_THRESHOLD
+    edges[1:, :] |= np.abs(np.diff(signed, axis=0)) > EDGE_THRESHOLD
+
+    row_edges = edges.sum(axis=1)
+    line_rows = row_edges >= max(LINE_ROW_MIN_EDGES, LINE_ROW_DENSITY * gray.shape[1])
+    text_lines = _count_runs(line_rows, min_length=2)
+
+    return {
+        'contrast': max(mode - low, high - mode),
+        'edge_pixels': int(edges.sum()),
+        'edge_density': round(float(edges.mean()), 4),
+        'background_ratio': round(float(background / total), 3),
+        'text_lines': text_lines,
+    }
+
+
+def classify_image(image_array):
+    """Return (route, features): route is BLANK, EASY or HARD"""
+    features = image_features(image_array)
+    if features['contrast'] < BLANK_CONTRAST or features['edge_pixels'] < BLANK_MAX_EDGES:
+        return BLANK, features
+    if (features['text_lines'] > 0
+            and features['contrast'] >= EASY_CONTRAST
+            and features['background_ratio'] >= EASY_BACKGROUND_RATIO
+            and features['edge_density'] <= EASY_MAX_EDGE_DENSITY):
+        return EASY, features
+    return HARD, features
+
+
+def routing_enabled_from_env():
+    """OCR_AUTO_ROUTING=0 turns the pre-pass off for method=auto"""
+    return os.environ.get("OCR_AUTO_ROUTING", "1").lower() not in ("0", "false", "no")
+
+
+def confidence_target_from_env():
+    """Tesseract confidence an easy image must reach before EasyOCR is skipped"""
+    return float(os.environ.get("OCR_ROUTE_CONFIDENCE_TARGET", "80"))
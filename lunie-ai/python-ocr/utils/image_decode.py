@@ -0,0 +1,85 @@
+# utils/image_decode.py
+import os
+
+import numpy as np
+from PIL import Image
+
+from utils.metrics import NO_TIMER
+
+DEFAULT_MAX_IMAGE_PIXELS = 50_000_000
+
+
+class ImageTooLargeError(ValueError):
+    """Image header declares more pixels than the configured limit"""
+
+
+def max_image_pixels_from_env():
+    """Pixel limit from OCR_MAX_IMAGE_PIXELS (decompression-bomb guard)"""
+    return int(os.environ.get("OCR_MAX_IMAGE_PIXELS", str(DEFAULT_MAX_IMAGE_PIXELS)))
+
+
+def target_size(size, max_side):
+    """Size after fitting ``size`` inside ``max_side`` (same rounding as before)"""
+    if not max_side or max(size) <= max_side:
+        return size
+    ratio = max_side / max(size)
+    return tuple(int(dim * ratio) for dim in size)
+
+
+def decode_image(source, max_side=1500, max_pixels=DEFAULT_MAX_IMAGE_PIXELS, timer=NO_TIMER):
+    """Decode an image straight to an RGB array no larger than ``max_side``.
+
+    ``source`` is a path or file object, or an already decoded PIL image
+    (e.g. a document page), which skips straight to the reduction.
+
+    The pixel limit is checked from the header before any pixel data is
+    decoded. JPEGs are downscaled by the decoder itself (draft mode, 1/2 to
+    1/8); other formats are box-reduced by an integer factor before the final
+    LANCZOS resize, so the expensive filter and the RGB conversion only run
+    at close to the target size. Exactly one array is built.
+
+    Returns (pil_image, image_array, original_size, decode_scale). The array
+    is read-only; callers that need to modify pixels must copy. ``timer``
+    (a metrics.StageTimer) gets 'decode' and 'resize' stage timings.
+    """
+    with timer.stage('decode'):
+        image, original_size, target, decode_scale = _decode_reduced(source, max_side, max_pixels)
+
+    with timer.stage('resize'):
+        if image.size != target:
+            image = image.resize(target, Image.Resampling.LANCZOS)
+        image_array = np.asarray(image)
+
+    return image, image_array, original_size, decode_scale
+
+
+def _decode_reduced(source, max_side, max_pixels):
+    """Open, check, and decode at the cheapest scale still >= the target size"""
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+    original_size = image.size
+    width, height = original_size
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height} pixels), limit is {max_pixels}"
+        )
+
+    target = target_size(original_size, max_side)
+    decode_scale = 1
+
+    if target != original_size:
+        if image.format == 'JPEG':
+            # Decoder picks the largest 1/N scale that stays >= target
+            image.draft('RGB', target)
+            decode_scale = original_size[0] // image.size[0] or 1
+        else:
+            factor = min(width // target[0], height // target[1])
+            if factor >= 2:
+                if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                    image = image.convert('RGB')  # reduce() can't handle palette/bilevel
+                image = image.reduce(factor)
+                decode_scale = factor
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    return image, original_size, target, decode_scale
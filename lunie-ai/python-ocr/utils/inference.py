@@ -0,0 +1,100 @@
+# utils/inference.py
+"""EasyOCR engine modes for CPU serving.
+
+    accurate  fp32 detector and recognizer
+    fast      recognizer LSTM/Linear layers dynamically quantized to int8,
+              readtext and readtext_batched run under torch.inference_mode()
+
+Dynamic quantization only has int8 kernels for Linear and recurrent layers;
+CRAFT, the detector, is all convolutions (those would need static
+quantization with calibration data), so it is quantized only where it has
+such layers, which in practice leaves it fp32.
+
+Readers are cached per (language, mode): ``reader_key`` builds the key the
+ReaderManager stores them under.
+"""
+import functools
+import logging
+import os
+
+logger = logging.getLogger("ocr.inference")
+
+ACCURATE = "accurate"
+FAST = "fast"
+ENGINE_MODES = (ACCURATE, FAST)
+
+
+def engine_mode_from_env():
+    """Engine mode used when a request doesn't ask for one (OCR_ENGINE_MODE).
+
+    Defaults to fast: EasyOCR's own Reader default (quantize=True) already
+    ran the recognizer in int8, so this keeps existing deployments' numbers.
+    """
+    mode = os.environ.get("OCR_ENGINE_MODE", FAST).lower()
+    if mode not in ENGINE_MODES:
+        logger.warning("⚠️ Unknown OCR_ENGINE_MODE %r, using %s", mode, FAST)
+        return FAST
+    return mode
+
+
+def reader_key(language, mode):
+    """ReaderManager key of the reader for ``language`` in ``mode``, e.g. 'en:fast'"""
+    return f"{language}:{mode}"
+
+
+def split_reader_key(key):
+    language, _, mode = key.rpartition(":")
+    return language, mode
+
+
+def _quantizable_types(torch):
+    return {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}
+
+
+def quantize_module(torch, module):
+    """Dynamic int8 quantization of ``module``'s Linear/LSTM/GRU layers in
+    place; returns how many layers were converted (0 leaves it untouched)"""
+    types = _quantizable_types(torch)
+    count = sum(1 for layer in module.modules() if type(layer) in types)
+    if count:
+        quantization = getattr(getattr(torch, "ao", None), "quantization", None) or torch.quantization
+        quantization.quantize_dynamic(module, types, dtype=torch.qint8, inplace=True)
+    return count
+
+
+def _in_inference_mode(torch, method):
+    @functools.wraps(method)
+    def run(*args, **kwargs):
+        # Thread-local, so entered on whichever thread (e.g. a tile worker) calls it
+        with torch.inference_mode():
+            return method(*args, **kwargs)
+    return run
+
+
+def apply_engine_mode(reader, mode):
+    """Prepare a reader built with ``quantize=False`` for ``mode``.
+
+    Sets ``reader.engine_mode`` and ``reader.quantized_layers`` ({'detector':
+    n, 'recognizer': n}). A failed quantization is logged and leaves the
+    reader in fp32 rather than failing the load.
+    """
+    reader.engine_mode = mode
+    reader.quantized_layers = {"detector": 0, "recognizer": 0}
+    if mode != FAST:
+        return reader
+
+    import torch
+
+    for name in ("recognizer", "detector"):
+        module = getattr(reader, name, None)
+        if module is None:
+            continue
+        try:
+            reader.quantized_layers[name] = quantize_module(torch, module)
+        except Exception as e:
+            logger.warning("⚠️ int8 quantization of the EasyOCR %s failed, keeping fp32: %s", name, e)
+    logger.info("⚡ EasyOCR fast mode: int8 layers %s", reader.quantized_layers)
+
+    reader.readtext = _in_inference_mode(torch, reader.readtext)
+    reader.readtext_batched = _in_inference_mode(torch, reader.readtext_batched)
+    return reader
@@ -0,0 +1,278 @@
+# utils/ingest.py
+"""Upload ingestion: spool request bodies to disk under a size limit,
+hashing them on the way, and map them back for decoding without a copy."""
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+from starlette.concurrency import run_in_threadpool
+
+COPY_CHUNK = 1024 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# A batch request body may hold this many uploads at the per-upload limit
+DEFAULT_BATCH_UPLOADS = 10
+# Multipart boundaries and form fields on top of the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Upload is larger than the configured limit"""
+
+
+def max_upload_bytes_from_env():
+    """Per-upload byte limit from OCR_MAX_UPLOAD_BYTES (0 disables it)"""
+    return int(os.environ.get("OCR_MAX_UPLOAD_BYTES", str(DEFAULT_MAX_UPLOAD_BYTES)))
+
+
+def max_batch_bytes_from_env(max_upload_bytes):
+    """Whole-request byte limit for batch uploads from OCR_MAX_BATCH_BYTES
+    (0 disables it); defaults to DEFAULT_BATCH_UPLOADS per-upload limits"""
+    default = max_upload_bytes * DEFAULT_BATCH_UPLOADS
+    return int(os.environ.get("OCR_MAX_BATCH_BYTES", str(default)))
+
+
+def too_large_message(size, max_bytes):
+    return f"Upload is {size} bytes or more, limit is {max_bytes}"
+
+
+class _Spool:
+    """Temp file being written, with the running digest and size"""
+
+    def __init__(self, max_bytes, prefix, dir):
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.file = tempfile.NamedTemporaryFile(prefix=prefix, dir=dir, delete=False)
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadTooLargeError(too_large_message(self.size, self.max_bytes))
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def finish(self):
+        self.file.close()
+        return self.file.name, self.digest.hexdigest(), self.size
+
+    def discard(self):
+        self.file.close()
+        remove_quietly(self.file.name)
+
+
+def upload_size(fileobj):
+    """Size of a seekable file object, left positioned at its start"""
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(0)
+    return size
+
+
+def _check_size(size, max_bytes):
+    if max_bytes and size > max_bytes:
+        raise UploadTooLargeError(too_large_message(size, max_bytes))
+
+
+def hash_upload(fileobj, max_bytes=0):
+    """Hash a seekable upload where it already is, without copying it.
+
+    starlette's multipart parser has spooled the file to a
+    SpooledTemporaryFile; its size is checked against ``max_bytes`` before
+    a byte is read, then it is hashed in place and rewound. Returns
+    (fileobj, sha256 hex digest, size), spool_upload's shape with the file
+    object for the path; it stays the caller's, open_spooled reads it.
+    """
+    size = upload_size(fileobj)
+    _check_size(size, max_bytes)
+    digest = hashlib.sha256()
+    while True:
+        chunk = fileobj.read(COPY_CHUNK)
+        if not chunk:
+            break
+        digest.update(chunk)
+    fileobj.seek(0)
+    return fileobj, digest.hexdigest(), size
+
+
+def spool_upload(fileobj, max_bytes=0, prefix='ocr_upload_', dir=None):
+    """Copy a file object to a temp file in fixed-size chunks, hashing as it goes.
+
+    For uploads that must outlive the request (documents, batches, jobs) or
+    cross into a process pool; hash_upload serves the rest. A seekable
+    ``fileobj`` over ``max_bytes`` (if set) is refused with
+    UploadTooLargeError before anything is copied, any other as soon as more
+    than that has been read, removing the partial file. Returns (path,
+    sha256 hex digest, size); the caller removes the file.
+    """
+    if fileobj.seekable():
+        _check_size(upload_size(fileobj), max_bytes)
+    spool = _Spool(max_bytes, prefix, dir)
+    try:
+        while True:
+            chunk = fileobj.read(COPY_CHUNK)
+            if not chunk:
+                break
+            spool.write(chunk)
+    except BaseException:
+        spool.discard()
+        raise
+    return spool.finish()
+
+
+async def spool_stream(chunks, max_bytes=0, prefix='ocr_upload_', dir=None):
+    """spool_upload for an async iterator of chunks, e.g. a raw request body
+    (starlette's Request.stream()), so the body is never held in memory.
+
+    Chunks are counted against ``max_bytes`` as they arrive and gathered
+    into COPY_CHUNK-sized writes, which run in the threadpool so a slow
+    disk never stalls the event loop.
+    """
+    spool = await run_in_threadpool(_Spool, max_bytes, prefix, dir)
+    pending, pending_size, received = [], 0, 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            received += len(chunk)
+            _check_size(received, max_bytes)
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= COPY_CHUNK:
+                await run_in_threadpool(spool.write, b''.join(pending))
+                pending, pending_size = [], 0
+        if pending:
+            await run_in_threadpool(spool.write, b''.join(pending))
+    except BaseException:
+        await run_in_threadpool(spool.discard)
+        raise
+    return await run_in_threadpool(spool.finish)
+
+
+def declared_too_large(content_length, max_bytes, overhead=0):
+    """True when a Content-Length header already exceeds the limit"""
+    if not max_bytes or not content_length:
+        return False
+    try:
+        return int(content_length) > max_bytes + overhead
+    except ValueError:
+        return False
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware that caps the request body of upload endpoints.
+
+    Requests to ``paths`` whose Content-Length already exceeds the limit
+    are refused before the app sees them; chunked bodies are counted as they
+    arrive and cut off with a 413 as soon as they pass it, rather than after
+    the multipart parser has spooled all of it. ``path_max_bytes`` gives
+    paths their own limit instead of ``max_bytes`` (e.g. a whole batch of
+    uploads). ``on_reject(path)`` is called for every refusal (metrics).
+    """
+
+    def __init__(self, app, max_bytes, paths, body_factory, on_reject=None, path_max_bytes=None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+        self.path_max_bytes = dict(path_max_bytes or {})
+        self.body_factory = body_factory
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        max_bytes = self.path_max_bytes.get(scope["path"], self.max_bytes)
+        if not max_bytes:
+            await self.app(scope, receive, send)
+            return
+        limit = max_bytes + FORM_OVERHEAD_BYTES
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"").decode()
+        if declared_too_large(content_length, limit):
+            await self._reject(scope, send, int(content_length), max_bytes)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLargeError(too_large_message(received, max_bytes))
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                return  # the app's error response is replaced by the 413 below
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await self._reject(scope, send, received, max_bytes)
+
+    async def _reject(self, scope, send, size, max_bytes):
+        if self.on_reject is not None:
+            self.on_reject(scope["path"])
+        body = self.body_factory(too_large_message(size, max_bytes))
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+@contextlib.contextmanager
+def open_spooled(source):
+    """Read-only memory map of a spooled upload, usable as a file object.
+
+    ``source`` is a spooled file's path, or an upload file object from
+    hash_upload: mapped from its file on disk, or read as it is while it is
+    still in memory. PIL reads the header and pixel data straight from the
+    page cache, so no bytes copy of the whole upload is ever made.
+    Everything decoded from it must be loaded before the block exits.
+    """
+    if not isinstance(source, str):
+        # A SpooledTemporaryFile's BytesIO, or its file once rolled to disk
+        backing = getattr(source, '_file', source)
+        backing.seek(0)
+        if isinstance(backing, io.BytesIO):
+            yield backing
+            return
+        backing.flush()  # the parser's last writes may still be buffered
+        yield from _map_file(backing)
+        return
+    with open(source, 'rb') as f:
+        yield from _map_file(f)
+
+
+def _map_file(f):
+    if os.fstat(f.fileno()).st_size == 0:
+        yield f  # mmap refuses empty files; let the decoder report it
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        yield view
+
+
+def remove_quietly(path):
+    if not isinstance(path, str):
+        return  # an upload hashed in place belongs to the request
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,435 @@
+# utils/job_queue.py
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+logger = logging.getLogger("ocr.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+
+class JobQueue:
+    """Persistent OCR job queue in a local SQLite file.
+
+    Workers ``lease`` the oldest runnable job for ``lease_seconds`` and must
+    ``heartbeat`` to keep it. A job whose lease runs out (the worker process
+    died or hung) is handed to the next worker that asks, up to
+    ``max_attempts`` leases in total, then marked failed. Submissions carry a
+    dedup key; submitting a key that the same tenant already has queued,
+    running or done returns the existing job instead of adding one (its
+    webhook is then added with ``subscribe``). Uploads are kept as files in
+    ``<jobs_dir>/inputs`` until their job finishes.
+
+    Every server process opens its own connection (after fork) and leases in
+    an IMMEDIATE transaction, so processes sharing the file never lease the
+    same job twice.
+    """
+
+    def __init__(self, jobs_dir, lease_seconds=120, max_attempts=3, retention_seconds=86400):
+        self.jobs_dir = jobs_dir
+        self.db_path = os.path.join(jobs_dir, "jobs.sqlite3")
+        self.inputs_dir = os.path.join(jobs_dir, "inputs")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._last_purge = 0.0
+
+        os.makedirs(self.inputs_dir, exist_ok=True)
+        with self._lock:
+            self._connection()
+
+    def _connection(self):
+        """SQLite connection for this process (caller holds the lock)"""
+        if self._db is None or self._db_pid != os.getpid():
+            # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10,
+                                       isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db_pid = os.getpid()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " dedup_key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " input_path TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " lease_owner TEXT,"
+                " lease_expires REAL,"
+                " webhook_url TEXT,"
+                " webhook_status TEXT,"
+                " tenant_id TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(ocr_jobs)")}
+            if "tenant_id" not in columns:
+                # Queue files from before dedup was scoped per tenant
+                self._db.execute("ALTER TABLE ocr_jobs ADD COLUMN tenant_id TEXT")
+            # Webhooks of submissions deduplicated onto an existing job
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_job_webhooks ("
+                " id INTEGER PRIMARY KEY,"
+                " job_id TEXT NOT NULL,"
+                " url TEXT NOT NULL,"
+                " status TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ocr_job_webhooks_job ON ocr_job_webhooks (job_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ocr_jobs_dedup ON ocr_jobs (dedup_key, status)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ocr_jobs_runnable ON ocr_jobs (status, created_at)")
+        return self._db
+
+    def _transaction(self, work):
+        """Run ``work(db)`` inside BEGIN IMMEDIATE ... COMMIT"""
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(db)
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    def submit(self, dedup_key, params, input_bytes=None, webhook_url=None, result=None,
+               input_file=None, tenant_id=None):
+        """Add a job, or return the tenant's live one with the same dedup key.
+
+        Returns (job_id, deduplicated). A deduplicated submission does not
+        store ``webhook_url``; pass it to ``subscribe``. With ``result`` (e.g. a cache hit)
+        the job is stored as already done and no input is kept. The input is
+        ``input_bytes``, or ``input_file``: an upload already spooled to disk
+        (ideally under ``inputs_dir``), which is moved into the queue rather
+        than copied, and removed if it isn't needed.
+        """
+        job_id = uuid.uuid4().hex
+        input_path = None
+        if result is None and input_file is not None:
+            input_path = os.path.join(self.inputs_dir, job_id)
+            shutil.move(input_file, input_path)
+        elif result is None and input_bytes is not None:
+            input_path = os.path.join(self.inputs_dir, job_id)
+            with open(input_path, 'wb') as f:
+                f.write(input_bytes)
+        else:
+            _remove(input_file)
+
+        def insert(db):
+            row = db.execute(
+                "SELECT id FROM ocr_jobs WHERE dedup_key = ? AND tenant_id IS ? AND status != ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (dedup_key, tenant_id, FAILED)
+            ).fetchone()
+            if row is not None:
+                return row["id"], True
+
+            now = time.time()
+            db.execute(
+                "INSERT INTO ocr_jobs (id, dedup_key, status, params, input_path, result,"
+                " webhook_url, tenant_id, created_at, updated_at, finished_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, dedup_key, QUEUED if result is None else DONE,
+                 json.dumps(params, sort_keys=True), input_path,
+                 None if result is None else json.dumps(result, default=str),
+                 webhook_url, tenant_id, now, now, None if result is None else now)
+            )
+            return job_id, False
+
+        try:
+            existing_id, deduplicated = self._transaction(insert)
+        except BaseException:
+            _remove(input_path)
+            raise
+        if deduplicated:
+            _remove(input_path)
+        return existing_id, deduplicated
+
+    def subscribe(self, job_id, url):
+        """Have ``url`` notified too when the job finishes.
+
+        Returns False, without subscribing, when the job has already finished
+        (or is gone): the caller sends that webhook itself. Checked in the
+        same transaction as the insert, so a job finishing meanwhile either
+        sees the subscriber or the caller sees it finished, never neither.
+        """
+        def add(db):
+            row = db.execute("SELECT status FROM ocr_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] in (DONE, FAILED):
+                return False
+            db.execute("INSERT INTO ocr_job_webhooks (job_id, url) VALUES (?, ?)", (job_id, url))
+            return True
+
+        return self._transaction(add)
+
+    def subscribers(self, job_id):
+        """[{'id', 'url', 'status'}] of the webhooks added with ``subscribe``"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, url, status FROM ocr_job_webhooks WHERE job_id = ? ORDER BY id", (job_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_subscriber_status(self, subscriber_id, status):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE ocr_job_webhooks SET status = ? WHERE id = ?", (status, subscriber_id)
+            )
+
+    def lease(self, owner):
+        """Claim the oldest queued job, or one whose lease expired.
+
+        Returns the job dict (with ``params`` decoded) or None. Jobs whose
+        leases have already run out ``max_attempts`` times are failed here.
+        """
+        def claim(db):
+            now = time.time()
+            abandoned = db.execute(
+                "SELECT id, input_path FROM ocr_jobs WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (RUNNING, now, self.max_attempts)
+            ).fetchall()
+            for job in abandoned:
+                logger.warning("❌ Job %s abandoned %d times, giving up", job["id"], self.max_attempts)
+                db.execute(
+                    "UPDATE ocr_jobs SET status = ?, error = ?, input_path = NULL, lease_owner = NULL,"
+                    " lease_expires = NULL, updated_at = ?, finished_at = ? WHERE id = ?",
+                    (FAILED, "Job was abandoned by its worker too many times", now, now, job["id"])
+                )
+                _remove(job["input_path"])
+            row = db.execute(
+                "SELECT * FROM ocr_jobs WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["status"] == RUNNING:
+                logger.warning("♻️ Job %s lease expired (owner %s), retrying", row["id"], row["lease_owner"])
+            db.execute(
+                "UPDATE ocr_jobs SET status = ?, attempts = attempts + 1, lease_owner = ?,"
+                " lease_expires = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, owner, now + self.lease_seconds, now, row["id"])
+            )
+            job = dict(row)
+            job["attempts"] += 1
+            job["params"] = json.loads(job["params"])
+            return job
+
+        job = self._transaction(claim)
+        if job is None:
+            self._maybe_purge()
+        return job
+
+    def _owned_update(self, job_id, owner, sql, args):
+        with self._lock:
+            cursor = self._connection().execute(
+                f"UPDATE ocr_jobs SET {sql} WHERE id = ? AND status = ? AND lease_owner = ?",
+                (*args, job_id, RUNNING, owner)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id, owner):
+        """Extend the lease; False if it was lost (expired and taken over)"""
+        now = time.time()
+        return self._owned_update(job_id, owner, "lease_expires = ?, updated_at = ?",
+                                  (now + self.lease_seconds, now))
+
+    def release(self, job_id, owner, count_attempt=False):
+        """Give the job back to the queue (pool busy, shutting down)"""
+        attempts = "attempts" if count_attempt else "MAX(attempts - 1, 0)"
+        return self._owned_update(
+            job_id, owner,
+            f"status = '{QUEUED}', attempts = {attempts}, lease_owner = NULL, lease_expires = NULL,"
+            " updated_at = ?",
+            (time.time(),)
+        )
+
+    def complete(self, job_id, owner, result):
+        now = time.time()
+        return self._finish(job_id, owner, "status = ?, result = ?, updated_at = ?, finished_at = ?",
+                            (DONE, json.dumps(result, default=str), now, now))
+
+    def fail(self, job_id, owner, error):
+        now = time.time()
+        return self._finish(job_id, owner, "status = ?, error = ?, updated_at = ?, finished_at = ?",
+                            (FAILED, error, now, now))
+
+    def _finish(self, job_id, owner, sql, args):
+        job = self.get(job_id)
+        finished = self._owned_update(
+            job_id, owner, f"{sql}, lease_owner = NULL, lease_expires = NULL, input_path = NULL", args
+        )
+        if finished and job is not None:
+            _remove(job["input_path"])
+        return finished
+
+    def set_webhook_status(self, job_id, status):
+        with self._lock:
+            self._connection().execute(
+                "UPDATE ocr_jobs SET webhook_status = ? WHERE id = ?", (status, job_id)
+            )
+
+    def get(self, job_id):
+        """Job dict with params/result decoded, or None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT * FROM ocr_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _maybe_purge(self):
+        """Drop finished jobs older than the retention period (at most once a minute)"""
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM ocr_jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, now - self.retention_seconds)
+            )
+            self._connection().execute(
+                "DELETE FROM ocr_job_webhooks WHERE job_id NOT IN (SELECT id FROM ocr_jobs)"
+            )
+        if cursor.rowcount:
+            logger.info("🧹 Purged %d finished jobs", cursor.rowcount)
+
+    def stats(self):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) AS n FROM ocr_jobs GROUP BY status"
+            ).fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({row["status"]: row["n"] for row in rows})
+        return {
+            **counts,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+            "db_path": self.db_path
+        }
+
+
+def _remove(path):
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def validate_webhook_url(url, allowed_hosts=()):
+    """Raise ValueError unless ``url`` is http(s) and, when an allowlist is
+    configured, points at one of ``allowed_hosts``.
+
+    The host is resolved (this blocks; call it off the event loop) and must
+    only have public addresses: loopback, private, link-local (cloud
+    metadata), reserved and multicast ones are refused unless the host is
+    listed in ``allowed_hosts`` by name.
+    """
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("webhook_url must be an http(s) URL")
+    if allowed_hosts and parsed.hostname not in allowed_hosts:
+        raise ValueError(f"webhook_url host {parsed.hostname} is not allowed")
+    if parsed.hostname in allowed_hosts:
+        return
+    try:
+        port = parsed.port
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)}
+    except (ValueError, OSError):
+        raise ValueError(f"webhook_url host {parsed.hostname} cannot be resolved")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"webhook_url host {parsed.hostname} is not a public address")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Redirects are reported as errors rather than followed, so a receiver
+    cannot bounce the POST to a host validate_webhook_url would refuse"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_WEBHOOK_OPENER = urllib.request.build_opener(_NoRedirect)
+
+
+def deliver_webhook(url, payload, attempts=3, timeout=10, allowed_hosts=()):
+    """POST ``payload`` as JSON, retrying with backoff; returns a status string.
+
+    The URL is validated again first: its host may resolve elsewhere by the
+    time the job is done than when it was submitted.
+    """
+    try:
+        validate_webhook_url(url, allowed_hosts)
+    except ValueError as e:
+        logger.warning("⚠️ Webhook %s refused: %s", url, e)
+        return f"refused ({e})"
+    body = json.dumps(payload, default=str).encode()
+    status = "not sent"
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(2 ** (attempt - 1))
+        request = urllib.request.Request(
+            url, data=body, method="POST", headers={"Content-Type": "application/json"}
+        )
+        try:
+            with _WEBHOOK_OPENER.open(request, timeout=timeout) as response:
+                return f"delivered ({response.status})"
+        except urllib.error.HTTPError as e:
+            status = f"failed ({e.code})"
+            if e.code < 500:
+                break  # the receiver rejected it; retrying won't help
+        except (urllib.error.URLError, OSError) as e:
+            status = f"failed ({e})"
+    logger.warning("⚠️ Webhook %s %s", url, status)
+    return status
+
+
+def webhook_hosts_from_env():
+    """Hosts webhooks may be sent to, from OCR_JOB_WEBHOOK_HOSTS (unset = any
+    public host). Listed hosts may also be private, e.g. an internal receiver."""
+    hosts = os.environ.get("OCR_JOB_WEBHOOK_HOSTS", "")
+    return tuple(host.strip() for host in hosts.split(",") if host.strip())
+
+
+def create_job_queue_from_env(base_dir):
+    """Job queue from OCR_JOBS_* settings; returns None when disabled"""
+    if os.environ.get("OCR_JOBS_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+
+    return JobQueue(
+        os.environ.get("OCR_JOBS_DIR", os.path.join(base_dir, ".ocr_jobs")),
+        lease_seconds=float(os.environ.get("OCR_JOB_LEASE_SECONDS", "120")),
+        max_attempts=int(os.environ.get("OCR_JOB_MAX_ATTEMPTS", "3")),
+        retention_seconds=float(os.environ.get("OCR_JOB_RETENTION_HOURS", "24")) * 3600
+    )
+
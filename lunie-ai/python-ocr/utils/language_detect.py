@@ -0,0 +1,189 @@
+# utils/language_detect.py
+"""Automatic OCR language detection for language=auto.
+
+A cheap first pass on a downscaled copy of the image picks one language,
+so the full pass runs that single-language EasyOCR reader instead of the
+three-language 'multi' one (or English for everything):
+
+1. Script: Tesseract's orientation and script detection (OSD), when the osd
+   traineddata is installed. A script written in one supported language
+   decides it outright (Cyrillic -> ru, Hangul -> ko, ...).
+2. Latin script, or no OSD: a quick recognition pass with the English
+   model, whose text langdetect assigns to one of the Latin-script
+   languages. Accents the English model drops barely move langdetect's
+   character n-gram scores.
+
+Anything uncertain (little text, low probability, a language or script that
+is not enabled) falls back to the default language, which is what auto
+meant before. LanguageMemo keeps confident answers per (tenant, document)
+so later pages of a document skip detection.
+"""
+import logging
+import os
+from collections import OrderedDict
+
+logger = logging.getLogger("ocr.language")
+
+try:
+    from langdetect import DetectorFactory, LangDetectException, detect_langs
+    # langdetect samples randomly; seeded, the same text always gets the same answer
+    DetectorFactory.seed = 0
+    LANGDETECT_AVAILABLE = True
+except ImportError:
+    LANGDETECT_AVAILABLE = False
+
+AUTO = "auto"
+
+# EasyOCR language code -> Tesseract traineddata name
+TESSERACT_CODES = {
+    "en": "eng", "es": "spa", "fr": "fra", "de": "deu", "it": "ita", "pt": "por",
+    "ru": "rus", "ar": "ara", "ch_sim": "chi_sim", "ch_tra": "chi_tra", "ja": "jpn",
+    "ko": "kor", "hi": "hin"
+}
+# Every language code EasyOCR has a model for (easyocr/config.py)
+EASYOCR_CODES = frozenset((
+    "af", "az", "bs", "cs", "cy", "da", "de", "en", "es", "et", "fr", "ga", "hr", "hu", "id",
+    "is", "it", "ku", "la", "lt", "lv", "mi", "ms", "mt", "nl", "no", "oc", "pi", "pl", "pt",
+    "ro", "rs_latin", "sk", "sl", "sq", "sv", "sw", "tl", "tr", "uz", "vi",
+    "ar", "fa", "ug", "ur",
+    "ru", "rs_cyrillic", "be", "bg", "uk", "mn", "abq", "ady", "kbd", "ava", "dar", "inh",
+    "che", "lbe", "lez", "tab", "tjk",
+    "hi", "mr", "ne", "bh", "mai", "ang", "bho", "mah", "sck", "new", "gom", "sa", "bgc",
+    "bn", "as", "mni",
+    "th", "ch_sim", "ch_tra", "ja", "ko", "ta", "te", "kn"
+))
+# What a request may ask for: an EasyOCR code, a Tesseract name for one of
+# TESSERACT_CODES (read by Tesseract as is, 'eng' by EasyOCR as 'en'),
+# auto, or the English/Spanish/French 'multi' reader
+SUPPORTED_LANGUAGES = EASYOCR_CODES | frozenset(TESSERACT_CODES.values()) | {AUTO, "multi"}
+# Latin-script languages told apart by langdetect (same ISO 639-1 codes)
+LATIN_LANGUAGES = ("en", "es", "fr", "de", "it", "pt")
+LATIN = "Latin"
+# Tesseract OSD script -> the language read for it
+SCRIPT_LANGUAGES = {
+    "Cyrillic": "ru", "Arabic": "ar", "Han": "ch_sim", "Japanese": "ja",
+    "Hangul": "ko", "Devanagari": "hi"
+}
+
+# OSD script confidence below which the script is ignored
+MIN_SCRIPT_CONFIDENCE = 1.0
+# Text shorter than this is not worth a guess
+MIN_TEXT_CHARS = 20
+MIN_PROBABILITY = 0.8
+
+
+class UnsupportedLanguageError(ValueError):
+    """Requested language is not one SUPPORTED_LANGUAGES names"""
+
+
+def check_language(language):
+    """``language`` if it is in SUPPORTED_LANGUAGES, checked before any
+    reader is looked up or built for it (raises UnsupportedLanguageError)"""
+    if language not in SUPPORTED_LANGUAGES:
+        raise UnsupportedLanguageError(
+            f"Unsupported language: {language[:64]!r} (an EasyOCR code such as 'en', 'auto' or 'multi')"
+        )
+    return language
+
+
+def detection_enabled_from_env():
+    """OCR_LANGUAGE_DETECTION=0 makes language=auto read English again"""
+    return os.environ.get("OCR_LANGUAGE_DETECTION", "1").lower() not in ("0", "false", "no")
+
+
+def auto_languages_from_env():
+    """Languages language=auto may pick (OCR_AUTO_LANGUAGES, comma separated
+    EasyOCR codes; default all of TESSERACT_CODES). Each one picked loads its
+    own reader, so this also bounds the readers auto can bring in."""
+    raw = os.environ.get("OCR_AUTO_LANGUAGES", "")
+    languages = [item.strip() for item in raw.split(",") if item.strip()] or list(TESSERACT_CODES)
+    unknown = [language for language in languages if language not in TESSERACT_CODES]
+    if unknown:
+        logger.warning("⚠️ OCR_AUTO_LANGUAGES: no detection for %s, ignored", ", ".join(unknown))
+    return [language for language in languages if language in TESSERACT_CODES]
+
+
+def language_from_text(text, candidates):
+    """(language, probability) langdetect gives ``text`` among ``candidates``;
+    language is None when there is too little text or no confident match"""
+    letters = sum(1 for char in text if char.isalpha())
+    if not LANGDETECT_AVAILABLE or letters < MIN_TEXT_CHARS:
+        return None, 0.0
+    try:
+        guesses = detect_langs(text)
+    except LangDetectException:
+        return None, 0.0
+    for guess in guesses:
+        if guess.lang in candidates:
+            if guess.prob >= MIN_PROBABILITY:
+                return guess.lang, guess.prob
+            return None, guess.prob
+    return None, 0.0
+
+
+def detect_language(read_script, read_text, candidates, default):
+    """Pick the language of one image among ``candidates``.
+
+    ``read_script()`` returns (OSD script, confidence) or (None, 0), and
+    ``read_text()`` the English-model text of the image; either may be None
+    when its engine is missing. Returns {'language', 'source', 'script',
+    'script_confidence', 'probability'}; source is 'osd', 'langdetect' or
+    'default'.
+    """
+    detection = {"language": default, "source": "default", "script": None,
+                 "script_confidence": 0.0, "probability": 0.0}
+    if read_script is not None:
+        script, confidence = read_script()
+        if script and confidence >= MIN_SCRIPT_CONFIDENCE:
+            detection.update(script=script, script_confidence=round(confidence, 2))
+            language = SCRIPT_LANGUAGES.get(script)
+            if language in candidates:
+                detection.update(language=language, source="osd")
+                return detection
+            if script != LATIN:
+                # A script no enabled reader handles: nothing better to offer
+                return detection
+
+    latin = [language for language in candidates if language in LATIN_LANGUAGES]
+    if read_text is not None and latin:
+        language, probability = language_from_text(read_text(), latin)
+        detection["probability"] = round(probability, 3)
+        if language is not None:
+            detection.update(language=language, source="langdetect")
+    return detection
+
+
+class LanguageMemo:
+    """Detected language per (tenant, document), least recently used first
+    out past ``max_entries``. Only touched from the event loop."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max(1, max_entries)
+        self._languages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tenant, document):
+        if document is None:
+            return None
+        key = (tenant, document)
+        language = self._languages.get(key)
+        if language is None:
+            self.misses += 1
+            return None
+        self._languages.move_to_end(key)
+        self.hits += 1
+        return language
+
+    def put(self, tenant, document, detection):
+        """Remember a detection unless it only fell back to the default"""
+        if document is None or not detection or detection.get("source") in ("default", "document"):
+            return
+        self._languages[(tenant, document)] = detection["language"]
+        self._languages.move_to_end((tenant, document))
+        while len(self._languages) > self.max_entries:
+            self._languages.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._languages), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
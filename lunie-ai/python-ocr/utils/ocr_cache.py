@@ -0,0 +1,185 @@
+# utils/ocr_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.responses import dumps, loads
+
+# Bump when a change to the pipeline alters OCR output for the same inputs
+CACHE_SCHEMA_VERSION = 8
+
+
+class OCRResultCache:
+    """Content-addressed OCR result cache.
+
+    Tier 1 is an in-memory LRU bounded by entry count and total size; tier 2
+    is an optional SQLite file that survives restarts. Values are stored as
+    JSON strings in both tiers, so the memory bound is exact.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024,
+                 db_path=None, disk_max_entries=10000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.disk_max_entries = disk_max_entries
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._db = None
+        self._db_pid = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._connection()
+
+    def _connection(self):
+        """SQLite connection for this process (caller holds the lock, or __init__).
+
+        Connections must not cross fork(), so a preloaded server's workers
+        each open their own; WAL mode lets them share the file.
+        """
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            self._db_pid = os.getpid()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def make_key(image_bytes, **params):
+        """Hash of the image bytes plus every parameter that changes the output"""
+        return OCRResultCache.key_for_digest(hashlib.sha256(image_bytes).hexdigest(), **params)
+
+    @staticmethod
+    def key_for_digest(digest, **params):
+        """make_key for an upload whose SHA-256 was computed while it was read"""
+        param_blob = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(
+            f"{CACHE_SCHEMA_VERSION}:{digest}:{param_blob}".encode()
+        ).hexdigest()
+
+    def _remember(self, key, value):
+        """Insert into the memory tier (caller holds the lock)"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+
+        self._memory[key] = value
+        self._memory_bytes += size
+
+        while self._memory and (len(self._memory) > self.max_entries
+                                or self._memory_bytes > self.max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached result dict and the tier it came from, or (None, None)"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return loads(value), "memory"
+
+            if self.db_path:
+                db = self._connection()
+                row = db.execute(
+                    "SELECT value FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE ocr_cache SET last_access = ? WHERE key = ?",
+                        (time.time(), key)
+                    )
+                    db.commit()
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return loads(row[0]), "disk"
+
+            self.misses += 1
+            return None, None
+
+    def put(self, key, result):
+        value = dumps(result).decode()
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, value)
+            self.stores += 1
+
+            if self.db_path:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, value, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                # Keep the disk tier bounded, dropping least recently used rows
+                db.execute(
+                    "DELETE FROM ocr_cache WHERE key IN ("
+                    " SELECT key FROM ocr_cache ORDER BY last_access DESC"
+                    " LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,)
+                )
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            disk_entries = None
+            if self.db_path:
+                disk_entries = self._connection().execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+
+            return {
+                "lookups": lookups,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": disk_entries,
+                "disk_path": self.db_path
+            }
+
+
+def create_cache_from_env(base_dir):
+    """Build the cache from OCR_CACHE_* settings; returns None when disabled"""
+    if os.environ.get("OCR_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+
+    cache_dir = os.environ.get("OCR_CACHE_DIR", os.path.join(base_dir, ".ocr_cache"))
+    return OCRResultCache(
+        max_entries=int(os.environ.get("OCR_CACHE_MEMORY_ENTRIES", "256")),
+        max_bytes=int(os.environ.get("OCR_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        db_path=os.path.join(cache_dir, "ocr_cache.sqlite3") if cache_dir else None,
+        disk_max_entries=int(os.environ.get("OCR_CACHE_DISK_ENTRIES", "10000"))
+    )
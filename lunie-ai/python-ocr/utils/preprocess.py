@@ -0,0 +1,279 @@
+# utils/preprocess.py
+"""Integer NumPy preprocessing for both OCR engines, by enhancement level.
+
+    none    decoded RGB as is
+    light   grayscale + contrast normalization
+    medium  light + deskew
+    heavy   medium + adaptive (integral-image) binarization
+
+Everything runs on uint8 with integer arithmetic. The output is one fresh
+uint8 array per image, modified in place from stage to stage. Wider
+intermediates (the uint16 grayscale accumulator, the integral image and
+window sums) live in per-thread scratch buffers that are reused across
+calls, so a warm worker allocates little more than the output. A thread
+keeps at most SCRATCH_MAX_BYTES of them (OCR_SCRATCH_MAX_BYTES); larger
+buffers are allocated for the call and freed with it.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("ocr.preprocess")
+
+NONE = "none"
+LIGHT = "light"
+MEDIUM = "medium"
+HEAVY = "heavy"
+LEVELS = (NONE, LIGHT, MEDIUM, HEAVY)
+
+# Contrast normalization stretches these percentiles to 0..255
+STRETCH_LOW_PERCENT = 1
+STRETCH_HIGH_PERCENT = 99
+# np.bincount and np.take widen uint8 to intp (8 bytes per pixel), so
+# histograms and lookup tables are applied in row bands of about this size
+BAND_PIXELS = 1 << 16
+# Bradley-Roth binarization: darker than (100 - BINARIZE_PERCENT)% of the
+# local mean is ink; the window is 1/BINARIZE_WINDOW_FRACTION of the width
+BINARIZE_PERCENT = 15
+BINARIZE_WINDOW_FRACTION = 16
+# Deskew searches +-DESKEW_MAX_ANGLE degrees and only rotates when the page
+# is off by at least DESKEW_MIN_ANGLE
+DESKEW_MAX_ANGLE = 8.0
+DESKEW_STEP = 0.5
+DESKEW_FINE_STEP = 0.1
+DESKEW_MIN_ANGLE = 0.3
+DESKEW_SAMPLE_SIDE = 1000
+DESKEW_MAX_INK_PIXELS = 20000
+# Scratch a thread keeps between calls. Enough for a heavy pass on a page at
+# the default OCR_MAX_IMAGE_SIDE; tiled-mode pages use one-off buffers.
+DEFAULT_SCRATCH_MAX_BYTES = 64 * 1024 * 1024
+SCRATCH_MAX_BYTES = int(os.environ.get("OCR_SCRATCH_MAX_BYTES", str(DEFAULT_SCRATCH_MAX_BYTES)))
+# Scratch a heavy pass needs per pixel with int32 sums: two uint16 grayscale
+# buffers, five int32 integral/window buffers and the bool mask
+HEAVY_SCRATCH_BYTES_PER_PIXEL = 2 * 2 + 5 * 4 + 1
+
+_scratch = threading.local()
+
+
+def _buffer(name, shape, dtype):
+    """Reusable per-thread array of ``shape``; contents are undefined.
+
+    One flat buffer per name, grown when needed and viewed at the requested
+    shape, so images of varying sizes don't each leave a buffer behind. A
+    buffer that would take the thread's scratch past SCRATCH_MAX_BYTES is
+    not kept: it is a plain array the caller drops when done.
+    """
+    size = int(np.prod(shape))
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    flat = buffers.get(name)
+    if flat is None or flat.dtype != dtype or flat.size < size:
+        kept = sum(buffer.nbytes for key, buffer in buffers.items() if key != name)
+        if kept + size * np.dtype(dtype).itemsize > SCRATCH_MAX_BYTES:
+            return np.empty(shape, dtype=dtype)
+        flat = buffers[name] = np.empty(size, dtype=dtype)
+    return flat[:size].reshape(shape)
+
+
+def retained_bytes():
+    """Bytes of scratch this thread keeps between calls"""
+    return sum(buffer.nbytes for buffer in getattr(_scratch, 'buffers', {}).values())
+
+
+def oversized(shape):
+    """True when a heavy pass over an image of ``shape`` needs more scratch
+    than a thread keeps, i.e. after it the scratch is worth releasing"""
+    return shape[0] * shape[1] * HEAVY_SCRATCH_BYTES_PER_PIXEL > SCRATCH_MAX_BYTES
+
+
+def release_buffers():
+    """Drop this thread's scratch buffers (e.g. after an unusually large image)"""
+    _scratch.buffers = {}
+
+
+def to_gray(image_array):
+    """uint8 grayscale with integer BT.601 weights (77, 150, 29) / 256.
+
+    Returns a new array; the weighted sum is accumulated in a reused uint16
+    scratch buffer (the largest sum, 256 * 255, fits).
+    """
+    if image_array.ndim == 2:
+        return image_array.copy()
+    acc = _buffer('gray_acc', image_array.shape[:2], np.uint16)
+    term = _buffer('gray_term', image_array.shape[:2], np.uint16)
+    np.multiply(image_array[..., 0], 77, out=acc, dtype=np.uint16)
+    np.multiply(image_array[..., 1], 150, out=term, dtype=np.uint16)
+    acc += term
+    np.multiply(image_array[..., 2], 29, out=term, dtype=np.uint16)
+    acc += term
+    acc >>= 8
+    gray = np.empty(image_array.shape[:2], dtype=np.uint8)
+    np.copyto(gray, acc, casting='unsafe')
+    return gray
+
+
+def _bands(gray):
+    """Views of consecutive rows of ``gray``, about BAND_PIXELS each"""
+    rows = max(1, BAND_PIXELS // max(1, gray.shape[1]))
+    return [gray[top:top + rows] for top in range(0, gray.shape[0], rows)]
+
+
+def histogram(gray):
+    """256-bin histogram of a uint8 image, counted band by band"""
+    counts = np.zeros(256, dtype=np.int64)
+    for band in _bands(gray):
+        counts += np.bincount(band.ravel(), minlength=256)
+    return counts
+
+
+def normalize_contrast(gray):
+    """Stretch the 1st..99th percentile of ``gray`` to 0..255, in place"""
+    cumulative = np.cumsum(histogram(gray))
+    total = int(cumulative[-1])
+    low = int(np.searchsorted(cumulative, total * STRETCH_LOW_PERCENT / 100))
+    high = int(np.searchsorted(cumulative, total * STRETCH_HIGH_PERCENT / 100))
+    if high <= low or (low == 0 and high == 255):
+        return gray
+    levels = np.arange(256, dtype=np.int32)
+    lut = np.clip((levels - low) * 255 // (high - low), 0, 255).astype(np.uint8)
+    # take() widens its indices to intp as well, hence the bands
+    for band in _bands(gray):
+        np.take(lut, band, out=band, mode='clip')
+    return gray
+
+
+def binarize(gray):
+    """Bradley-Roth adaptive threshold of ``gray`` in place (ink 0, paper 255).
+
+    Local means come from an integral image, so the cost is independent of
+    the window size: two cumulative sums and four lookups per pixel. The
+    arithmetic is int32 unless the image is large enough to overflow it.
+    """
+    height, width = gray.shape
+    radius = max(1, width // BINARIZE_WINDOW_FRACTION // 2)
+    window = (2 * radius + 1) ** 2
+    fits_int32 = 255 * (height + 1) * (width + 1) < 2 ** 31 and 255 * window * 100 < 2 ** 31
+    dtype = np.int32 if fits_int32 else np.int64
+
+    integral = _buffer('integral', (height + 1, width + 1), dtype)
+    integral[0] = 0
+    integral[:, 0] = 0
+    inner = integral[1:, 1:]
+    np.cumsum(gray, axis=0, dtype=dtype, out=inner)
+    np.cumsum(inner, axis=1, out=inner)
+
+    # Window edges clamped to the image; sums over rows first, then columns.
+    # mode='clip' (indices are in range anyway) lets take() write to out directly
+    y0 = np.clip(np.arange(height) - radius, 0, height)
+    y1 = np.clip(np.arange(height) + radius + 1, 0, height)
+    x0 = np.clip(np.arange(width) - radius, 0, width)
+    x1 = np.clip(np.arange(width) + radius + 1, 0, width)
+    rows = _buffer('window_rows', (height, width + 1), dtype)
+    rows_low = _buffer('window_rows_low', (height, width + 1), dtype)
+    np.take(integral, y1, axis=0, out=rows, mode='clip')
+    np.take(integral, y0, axis=0, out=rows_low, mode='clip')
+    rows -= rows_low
+    sums = _buffer('window_sums', (height, width), dtype)
+    scaled = _buffer('window_sums_low', (height, width), dtype)
+    np.take(rows, x1, axis=1, out=sums, mode='clip')
+    np.take(rows, x0, axis=1, out=scaled, mode='clip')
+    sums -= scaled
+
+    # Paper where pixel * area * 100 > window sum * (100 - percent)
+    sums *= 100 - BINARIZE_PERCENT
+    np.multiply(gray, ((y1 - y0) * 100).astype(dtype)[:, None], out=scaled)
+    scaled *= (x1 - x0).astype(dtype)[None, :]
+    paper = _buffer('paper', (height, width), np.bool_)
+    np.greater(scaled, sums, out=paper)
+    np.multiply(paper, np.uint8(255), out=gray)
+    return gray
+
+
+def estimate_skew(gray):
+    """Page rotation in degrees (counter-clockwise positive), or 0.0.
+
+    Ink pixels of a subsample are projected onto rows after shearing by
+    each candidate angle; the angle whose row profile is sharpest (largest
+    sum of squared row counts) lines the text up with the rows.
+    """
+    step = max(1, -(-max(gray.shape) // DESKEW_SAMPLE_SIDE))
+    sample = gray[::step, ::step]
+    threshold = (int(sample.min()) + int(sample.max())) // 2
+    ink = sample < threshold
+    if np.count_nonzero(ink) > ink.size // 2:
+        ink = ~ink  # light text on a dark background
+    ys, xs = np.nonzero(ink)
+    if ys.size < 50:
+        return 0.0
+    if ys.size > DESKEW_MAX_INK_PIXELS:
+        keep = slice(None, None, -(-ys.size // DESKEW_MAX_INK_PIXELS))
+        ys, xs = ys[keep], xs[keep]
+    ys = ys.astype(np.float32)
+    xs = xs.astype(np.float32)
+    rows = np.empty(ys.size, dtype=np.float32)
+    bins = np.empty(ys.size, dtype=np.intp)
+
+    def best_angle(angles):
+        scores = []
+        for slope in np.tan(np.radians(angles)):
+            np.multiply(xs, -slope, out=rows)
+            np.add(rows, ys, out=rows)
+            np.rint(rows, out=rows)
+            np.subtract(rows, rows.min(), out=bins, casting='unsafe')
+            counts = np.bincount(bins)
+            scores.append(int(np.dot(counts, counts)))
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = best_angle(np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP))
+    fine = best_angle(np.arange(coarse - DESKEW_STEP, coarse + DESKEW_STEP + DESKEW_FINE_STEP / 2,
+                                DESKEW_FINE_STEP))
+    # Shearing rows down by +a (y grows downwards) straightens a page turned by -a
+    return round(-fine, 2) + 0.0
+
+
+def deskew(gray):
+    """Rotate ``gray`` level; returns (array, angle). A new array only when rotated."""
+    angle = estimate_skew(gray)
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return gray, 0.0
+    background = int(np.argmax(histogram(gray[::4, ::4])))
+    # PIL rotates counter-clockwise for positive angles too. Nearest keeps
+    # the anti-aliased stroke edges and is ~7x faster than bilinear here.
+    rotated = Image.fromarray(gray).rotate(
+        -angle, resample=Image.Resampling.NEAREST, fillcolor=background
+    )
+    return np.array(rotated), angle
+
+
+def preprocess_image(image_array, level=MEDIUM):
+    """Return (processed array, info) for an RGB or grayscale uint8 image.
+
+    The processed array is ``image_array`` itself for level none, otherwise
+    a new 2-D uint8 array. ``info`` records what was done, e.g.
+    {'level': 'medium', 'skew_angle': -2.4}.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown enhancement level: {level}")
+    info = {'level': level}
+    if level == NONE:
+        return image_array, info
+
+    gray = normalize_contrast(to_gray(image_array))
+    if level in (MEDIUM, HEAVY):
+        gray, info['skew_angle'] = deskew(gray)
+    if level == HEAVY:
+        binarize(gray)
+    return gray, info
+
+
+def default_level_from_env():
+    """Level used when a request asks for enhance=true without one"""
+    level = os.environ.get("OCR_ENHANCEMENT_LEVEL", MEDIUM).lower()
+    if level not in LEVELS:
+        logger.warning("⚠️ Unknown OCR_ENHANCEMENT_LEVEL %r, using %s", level, MEDIUM)
+        return MEDIUM
+    return level
@@ -0,0 +1,209 @@
+# utils/reader_pool.py
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("ocr.readers")
+
+# Failed builds remembered for /health; older ones are forgotten past this
+MAX_FAILED = 32
+
+
+def estimate_reader_bytes(reader):
+    """Rough resident size of an EasyOCR reader: its detector + recognizer tensors"""
+    total = 0
+    for name in ("detector", "recognizer"):
+        module = getattr(reader, name, None)
+        if module is None or not hasattr(module, "state_dict"):
+            continue
+        try:
+            for tensor in module.state_dict().values():
+                if hasattr(tensor, "element_size"):
+                    total += tensor.numel() * tensor.element_size()
+        except Exception:
+            pass
+    return total
+
+
+class _Loading:
+    """A reader being built; other callers for the same language wait on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reader = None
+        self.error = None
+        self.started_at = time.time()
+
+
+class ReaderManager:
+    """Thread-safe, bounded cache of EasyOCR readers.
+
+    - Single-flight: concurrent first requests for a language share one build.
+    - LRU eviction once more than ``max_readers`` readers are loaded or their
+      estimated size exceeds ``max_bytes`` (0 disables the size bound).
+    - ``prewarm`` loads languages on a background thread so the server can
+      accept connections immediately; ``status`` reports per-language state.
+    - Only the last ``max_failed`` failed builds are remembered; callers check
+      languages before asking for them (utils/language_detect.py).
+    """
+
+    def __init__(self, factory, max_readers=3, max_bytes=0, size_fn=estimate_reader_bytes,
+                 max_failed=MAX_FAILED):
+        self._factory = factory
+        self._size_fn = size_fn
+        self.max_readers = max(1, max_readers)
+        self.max_bytes = max_bytes
+        self.max_failed = max(1, max_failed)
+
+        self._lock = threading.Lock()
+        self._readers = OrderedDict()  # language -> (reader, size)
+        self._loading = {}             # language -> _Loading
+        self._failed = OrderedDict()   # language -> error message, LRU
+        self._evicted = set()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, language):
+        """Return the reader for ``language``, building it at most once"""
+        with self._lock:
+            entry = self._readers.get(language)
+            if entry is not None:
+                self._readers.move_to_end(language)
+                return entry[0]
+
+            loading = self._loading.get(language)
+            builder = loading is None
+            if builder:
+                loading = _Loading()
+                self._loading[language] = loading
+
+        if not builder:
+            loading.done.wait()
+            if loading.error is not None:
+                raise loading.error
+            return loading.reader
+
+        try:
+            logger.info("🔄 Creating EasyOCR reader for language: %s", language)
+            reader = self._factory(language)
+            size = self._size_fn(reader) if self._size_fn else 0
+        except Exception as e:
+            with self._lock:
+                self._failed[language] = str(e)
+                self._failed.move_to_end(language)
+                while len(self._failed) > self.max_failed:
+                    self._failed.popitem(last=False)
+                del self._loading[language]
+            loading.error = e
+            loading.done.set()
+            logger.error("❌ EasyOCR reader for %s failed to load: %s", language, e)
+            raise
+
+        with self._lock:
+            self._readers[language] = (reader, size)
+            self._failed.pop(language, None)
+            self._evicted.discard(language)
+            del self._loading[language]
+            self.loads += 1
+            self._evict_locked(keep=language)
+
+        loading.reader = reader
+        loading.done.set()
+        logger.info("✅ EasyOCR reader for %s ready in %.1fs", language, time.time() - loading.started_at)
+        return reader
+
+    def _evict_locked(self, keep):
+        def over_budget():
+            if len(self._readers) > self.max_readers:
+                return True
+            if self.max_bytes:
+                return sum(size for _, size in self._readers.values()) > self.max_bytes
+            return False
+
+        while len(self._readers) > 1 and over_budget():
+            language = next(iter(self._readers))
+            if language == keep:
+                break
+            del self._readers[language]
+            self._evicted.add(language)
+            self.evictions += 1
+            logger.info("♻️  Evicted EasyOCR reader for %s", language)
+
+    def peek(self, language):
+        """Return the reader if it is already loaded, without building it"""
+        with self._lock:
+            entry = self._readers.get(language)
+            return entry[0] if entry is not None else None
+
+    def state(self, language):
+        with self._lock:
+            if language in self._readers:
+                return "ready"
+            if language in self._loading:
+                return "loading"
+            if language in self._failed:
+                return "failed"
+            if language in self._evicted:
+                return "evicted"
+            return "not_loaded"
+
+    def prewarm(self, languages, background=True):
+        """Load ``languages`` in order; on a daemon thread unless ``background`` is False"""
+        languages = [lang for lang in languages if lang]
+
+        def load_all():
+            for language in languages:
+                try:
+                    self.get(language)
+                except Exception:
+                    pass  # recorded in status; the next request retries
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name="easyocr-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        with self._lock:
+            languages = {}
+            for language, (_, size) in self._readers.items():
+                languages[language] = {"state": "ready", "estimated_mb": round(size / 1024 / 1024, 1)}
+            for language, loading in self._loading.items():
+                languages[language] = {
+                    "state": "loading",
+                    "loading_for_s": round(time.time() - loading.started_at, 1)
+                }
+            for language, error in self._failed.items():
+                languages.setdefault(language, {"state": "failed", "error": error})
+            for language in self._evicted:
+                languages.setdefault(language, {"state": "evicted"})
+
+            return {
+                "languages": languages,
+                "loaded": len(self._readers),
+                "max_readers": self.max_readers,
+                "estimated_mb": round(sum(size for _, size in self._readers.values()) / 1024 / 1024, 1),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 1) if self.max_bytes else None,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+
+def create_reader_manager_from_env(factory):
+    """Build the manager from OCR_MAX_READERS / OCR_READER_MEMORY_MB"""
+    return ReaderManager(
+        factory,
+        max_readers=int(os.environ.get("OCR_MAX_READERS", "3")),
+        max_bytes=int(os.environ.get("OCR_READER_MEMORY_MB", "0")) * 1024 * 1024
+    )
+
+
+def prewarm_languages_from_env(default="en"):
+    """Languages listed in OCR_PREWARM_LANGUAGES (comma separated)"""
+    raw = os.environ.get("OCR_PREWARM_LANGUAGES", default)
+    return [lang.strip() for lang in raw.split(",") if lang.strip()]
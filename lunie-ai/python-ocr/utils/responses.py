@@ -0,0 +1,243 @@
+# utils/responses.py
+"""OCR response shaping, JSON encoding and compression.
+
+- ResponseShape trims a response to the fields a caller asked for and can
+  drop the chunk copies, leaving [start, end) offsets into ``text``.
+- dumps/loads use orjson when it is installed (several times faster than
+  the json module on large texts), the json module otherwise.
+- CompressionMiddleware compresses JSON and NDJSON responses with zstd
+  (when the zstandard package is installed) or gzip, as the client's
+  Accept-Encoding allows; streamed NDJSON is flushed line by line. It is
+  off unless OCR_RESPONSE_COMPRESSION is set: between processes on one
+  host, compressing costs more time than the bytes it saves.
+"""
+import json
+import logging
+import os
+import zlib
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger("ocr.responses")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Top-level fields of an OCR response a caller can select
+RESPONSE_FIELDS = (
+    "text", "confidence", "word_count", "language", "method_used", "enhanced",
+    "enhancement_level", "post_processed", "chunks", "chunk_offsets", "chunk_count",
+    "regions", "processing_time", "metadata", "cache"
+)
+# Kept whatever is selected: they say whether and which item a line is about
+ALWAYS_FIELDS = ("success", "error", "index", "page", "page_count")
+CHUNK_FORMATS = ("text", "offsets")
+
+
+class ResponseShape:
+    """Which parts of an OCR response to send.
+
+    ``fields`` is a comma-separated subset of RESPONSE_FIELDS (empty: all);
+    chunk_format 'offsets' drops the ``chunks`` copies, since each chunk is
+    text[start:end] for its entry in ``chunk_offsets``; selected chunks come
+    back as ``chunk_offsets`` plus the ``text`` they index into. Raises
+    ValueError for unknown values.
+    """
+
+    def __init__(self, fields=None, chunk_format="text"):
+        chunk_format = (chunk_format or "text").lower()
+        if chunk_format not in CHUNK_FORMATS:
+            raise ValueError(f"chunk_format must be one of: {', '.join(CHUNK_FORMATS)}")
+        selected = {field.strip() for field in (fields or "").split(",") if field.strip()}
+        unknown = selected - set(RESPONSE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} "
+                             f"(choose from: {', '.join(RESPONSE_FIELDS)})")
+        if not selected and chunk_format == "text":
+            self.fields = None
+            return
+        selected = selected or set(RESPONSE_FIELDS)
+        if chunk_format == "offsets" and "chunks" in selected:
+            selected = (selected - {"chunks"}) | {"chunk_offsets", "text"}
+        self.fields = frozenset(selected | set(ALWAYS_FIELDS))
+
+    def apply(self, response):
+        """``response`` limited to the selected fields (itself when nothing is dropped)"""
+        if self.fields is None or not isinstance(response, dict):
+            return response
+        return {key: value for key, value in response.items() if key in self.fields}
+
+
+FULL_RESPONSE = ResponseShape()
+
+
+def dumps(obj):
+    """Compact JSON bytes; unknown types (e.g. numpy scalars) fall back to str()"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+def ndjson_line(obj):
+    return dumps(obj) + b"\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with dumps() instead of the json module"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+COMPRESSIBLE_TYPES = (b"application/json", b"application/x-ndjson", b"text/")
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+
+
+def response_encodings_from_env():
+    """Content codings the server may use, in preference order
+    (OCR_RESPONSE_COMPRESSION, e.g. 'zstd,gzip'; default none)"""
+    raw = os.environ.get("OCR_RESPONSE_COMPRESSION", "none").lower()
+    encodings = []
+    for encoding in (item.strip() for item in raw.split(",")):
+        if encoding == "zstd" and not ZSTD_AVAILABLE:
+            logger.warning("⚠️ OCR_RESPONSE_COMPRESSION: zstandard is not installed, zstd disabled")
+            continue
+        if encoding in ("zstd", "gzip"):
+            encodings.append(encoding)
+        elif encoding and encoding != "none":
+            logger.warning("⚠️ Unknown OCR_RESPONSE_COMPRESSION coding %r ignored", encoding)
+    return encodings
+
+
+def accepted_encoding(accept_encoding, encodings):
+    """First of ``encodings`` the Accept-Encoding header allows, or None"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """One response's gzip or zstd stream"""
+
+    def __init__(self, encoding, gzip_level, zstd_level):
+        if encoding == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits 31: gzip container rather than raw zlib
+            self._stream = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data, more):
+        """Compressed bytes for ``data``; flushed so a streamed line is
+        decodable on arrival, finished when nothing ``more`` follows"""
+        out = self._stream.compress(data)
+        return out + (self._stream.flush(self._sync) if more else self._stream.flush())
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON/NDJSON responses per Accept-Encoding.
+
+    Single-message bodies under ``min_bytes`` are sent as they are; streamed
+    bodies are always compressed, one flushed block per message.
+    """
+
+    def __init__(self, app, encodings, min_bytes=DEFAULT_COMPRESSION_MIN_BYTES,
+                 gzip_level=1, zstd_level=3):
+        self.app = app
+        self.encodings = list(encodings)
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if not self.encodings or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = accepted_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if (b"content-encoding" in headers or message["status"] in (204, 304)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message  # held until the first body shows whether to compress
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                if not more and len(body) < self.min_bytes:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.zstd_level)
+                body = compressor.compress(body, more)
+                headers = [(name, value) for name, value in start.get("headers", [])
+                           if name.lower() != b"content-length"]
+                headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                if not more:
+                    headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": headers})
+            else:
+                body = compressor.compress(body, more)
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
+
+
+def compression_middleware_options_from_env():
+    """CompressionMiddleware keyword arguments from OCR_RESPONSE_COMPRESSION,
+    OCR_COMPRESSION_MIN_BYTES, OCR_GZIP_LEVEL and OCR_ZSTD_LEVEL"""
+    return {
+        "encodings": response_encodings_from_env(),
+        "min_bytes": int(os.environ.get("OCR_COMPRESSION_MIN_BYTES", str(DEFAULT_COMPRESSION_MIN_BYTES))),
+        "gzip_level": int(os.environ.get("OCR_GZIP_LEVEL", "1")),
+        "zstd_level": int(os.environ.get("OCR_ZSTD_LEVEL", "3")),
+    }
@@ -0,0 +1,321 @@
+# utils/scheduler.py
+"""Per-tenant weighted fair queueing in front of the OCR worker pool.
+
+Every job carries a tenant and a priority class (interactive or bulk). The
+scheduler keeps one FIFO per (tenant, class) and only hands jobs to the pool
+when a worker is free, so the pool's own first-come queue never builds up
+behind a bulk import. The next job is the queue head with the smallest
+virtual finish time (self-clocked fair queueing):
+
+    start  = max(virtual time, finish of the flow's previous job)
+    finish = start + cost / (class weight * tenant weight)
+
+so backlogged flows share the workers in proportion to their weights no
+matter how much each one has queued. On top of that:
+
+- bulk jobs never hold more than ``bulk_max_share`` of the workers, and
+  never all of them: with two or more slots at least one is kept for
+  interactive requests while bulk saturates the rest. With a single slot
+  bulk has to use it, so an interactive job may wait for the running bulk
+  job to finish; its class weight then puts it ahead of the bulk backlog
+- a tenant never runs more than ``tenant_max_running`` jobs at once
+- a job that cannot start at once is refused (PoolSaturatedError, i.e. 503
+  + Retry-After) when ``interactive_max_queued`` interactive or
+  ``max_queued`` bulk jobs already wait, or its tenant has
+  ``tenant_max_queued`` waiting. The interactive limit defaults to the
+  pool's max_queue (OCR_MAX_QUEUE), so interactive requests fail fast as
+  they did without the scheduler, while another tenant's bulk backlog
+  never gets one refused.
+
+Only tenants with queued or running work are scheduled. An idle tenant's
+state moves to a bounded list of recent tenants (kept for stats()), and its
+finish tags are remembered only while they are ahead of the virtual time,
+so neither memory nor dispatch cost grows with the number of tenant ids
+ever seen.
+
+All methods run on the event loop thread.
+"""
+import asyncio
+import functools
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from utils.worker_pool import PoolSaturatedError
+
+logger = logging.getLogger("ocr.scheduler")
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+DEFAULT_TENANT = "default"
+# Recent waits kept per tenant and class for the percentiles in stats()
+WAIT_SAMPLES = 512
+# Idle tenants whose counters stats() still shows, most recently active last
+RECENT_TENANTS = 256
+
+
+class _Ticket:
+    __slots__ = ("fn", "args", "cost", "future", "enqueued_at", "finish")
+
+    def __init__(self, fn, args, cost, future, finish):
+        self.fn = fn
+        self.args = args
+        self.cost = cost
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.finish = finish
+
+
+class _Tenant:
+    def __init__(self, name, weight):
+        self.name = name
+        self.weight = weight
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.last_finish = dict.fromkeys(PRIORITIES, 0.0)
+        self.waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self.dispatched = dict.fromkeys(PRIORITIES, 0)
+        self.running = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[max(1, math.ceil(p / 100 * len(sorted_values))) - 1]
+
+
+class FairScheduler:
+    """Weighted fair queue of OCR jobs feeding an OCRWorkerPool.
+
+    ``submit``/``run`` mirror the pool's: submit returns an asyncio future
+    (or raises PoolSaturatedError), run awaits it. ``on_dispatch(priority,
+    wait_seconds)`` is called as each job leaves the queue (metrics).
+    """
+
+    def __init__(self, pool, slots=None, interactive_weight=4.0, bulk_weight=1.0, tenant_weights=None,
+                 bulk_max_share=0.75, tenant_max_running=0, tenant_max_queued=64, max_queued=512,
+                 interactive_max_queued=None, on_dispatch=None):
+        self.pool = pool
+        self.slots = max(1, slots or pool.max_workers)
+        self.class_weights = {INTERACTIVE: interactive_weight, BULK: bulk_weight}
+        self.tenant_weights = dict(tenant_weights or {})
+        # Never every slot while there are two; a single slot has to be shared
+        self.bulk_slots = max(1, min(self.slots - 1, math.floor(self.slots * bulk_max_share)))
+        self.tenant_max_running = tenant_max_running or self.slots
+        self.tenant_max_queued = tenant_max_queued
+        self.class_max_queued = {
+            INTERACTIVE: pool.max_queue if interactive_max_queued is None else interactive_max_queued,
+            BULK: max_queued
+        }
+        self.on_dispatch = on_dispatch
+
+        self._tenants = {}  # tenants with queued or running jobs
+        self._recent = OrderedDict()  # idle tenants, for stats()
+        self._finish_tags = {}  # (tenant, priority) -> finish tag ahead of the virtual time
+        self._finish_tags_limit = 64
+        self._virtual_time = 0.0
+        self._running = dict.fromkeys(PRIORITIES, 0)
+        self._queued = dict.fromkeys(PRIORITIES, 0)
+
+    def _tenant(self, tenant):
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._recent.pop(tenant, None) or _Tenant(tenant, self.tenant_weights.get(tenant, 1.0))
+            for priority in PRIORITIES:
+                state.last_finish[priority] = self._finish_tags.pop((tenant, priority), 0.0)
+            self._tenants[tenant] = state
+        return state
+
+    def _retire(self, state):
+        """Stop tracking ``state`` once it has nothing queued or running"""
+        if state.running or state.queued() or self._tenants.get(state.name) is not state:
+            return
+        del self._tenants[state.name]
+        # A finish tag at or behind the virtual time no longer affects anything
+        for priority in PRIORITIES:
+            if state.last_finish[priority] > self._virtual_time:
+                self._finish_tags[(state.name, priority)] = state.last_finish[priority]
+        if len(self._finish_tags) > self._finish_tags_limit:
+            self._finish_tags = {key: finish for key, finish in self._finish_tags.items()
+                                 if finish > self._virtual_time}
+            self._finish_tags_limit = max(64, 2 * len(self._finish_tags))
+        self._recent[state.name] = state
+        while len(self._recent) > RECENT_TENANTS:
+            self._recent.popitem(last=False)
+
+    def submit(self, tenant, priority, fn, *args, cost=1):
+        """Queue ``fn(*args)`` for ``tenant``; returns an asyncio future.
+
+        ``cost`` is the job's share of work, e.g. the number of images in a
+        micro-batch. Raises PoolSaturatedError when the queue limits are hit.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        tenant = tenant or DEFAULT_TENANT
+        state = self._tenant(tenant)
+        queue = state.queues[priority]
+
+        weight = self.class_weights[priority] * state.weight
+        previous_finish = state.last_finish[priority]
+        finish = max(self._virtual_time, previous_finish) + cost / weight
+        state.last_finish[priority] = finish
+        ticket = _Ticket(fn, args, cost, asyncio.get_running_loop().create_future(), finish)
+        queue.append(ticket)
+        self._queued[priority] += 1
+        self._dispatch()
+
+        # Limits only apply to jobs left waiting: one that found a free
+        # worker is never refused, even with a queue limit of 0
+        if queue and queue[-1] is ticket and (state.queued() > self.tenant_max_queued
+                                              or self._queued[priority] > self.class_max_queued[priority]):
+            queue.pop()
+            self._queued[priority] -= 1
+            state.last_finish[priority] = previous_finish
+            state.rejected += 1
+            self._retire(state)
+            raise PoolSaturatedError(self.pool.retry_after)
+        # A client that goes away stops counting against the limits at once
+        ticket.future.add_done_callback(functools.partial(self._discard, ticket, state, priority))
+        return ticket.future
+
+    def _discard(self, ticket, state, priority, future):
+        queue = state.queues[priority]
+        if future.cancelled() and ticket in queue:
+            queue.remove(ticket)
+            self._queued[priority] -= 1
+            state.cancelled += 1
+        self._retire(state)
+
+    async def run(self, tenant, priority, fn, *args, cost=1):
+        return await self.submit(tenant, priority, fn, *args, cost=cost)
+
+    def _next(self):
+        """(tenant state, priority) whose queue head goes next, or (None, None)"""
+        best, best_finish = (None, None), None
+        bulk_full = self._running[BULK] >= self.bulk_slots
+        for state in self._tenants.values():
+            if state.running >= self.tenant_max_running:
+                continue
+            for priority, queue in state.queues.items():
+                # Clients that went away before their job started
+                while queue and queue[0].future.cancelled():
+                    queue.popleft()
+                    self._queued[priority] -= 1
+                    state.cancelled += 1
+                if not queue or (priority == BULK and bulk_full):
+                    continue
+                if best_finish is None or queue[0].finish < best_finish:
+                    best, best_finish = (state, priority), queue[0].finish
+        return best
+
+    def _dispatch(self):
+        while sum(self._running.values()) < self.slots:
+            state, priority = self._next()
+            if state is None:
+                return
+            ticket = state.queues[priority].popleft()
+            self._queued[priority] -= 1
+            self._virtual_time = ticket.finish
+
+            wait = time.monotonic() - ticket.enqueued_at
+            state.waits[priority].append(wait)
+            state.dispatched[priority] += 1
+            if self.on_dispatch is not None:
+                self.on_dispatch(priority, wait)
+
+            try:
+                inner = self.pool.submit(ticket.fn, *ticket.args)
+            except Exception as e:
+                ticket.future.set_exception(e)
+                self._retire(state)
+                continue
+            state.running += 1
+            self._running[priority] += 1
+            inner.add_done_callback(functools.partial(self._finished, ticket, state, priority))
+
+    def _finished(self, ticket, state, priority, inner):
+        state.running -= 1
+        self._running[priority] -= 1
+        if not ticket.future.done():
+            if inner.cancelled():
+                ticket.future.cancel()
+            elif inner.exception() is not None:
+                ticket.future.set_exception(inner.exception())
+            else:
+                ticket.future.set_result(inner.result())
+        self._dispatch()
+        self._retire(state)
+
+    def stats(self, tenants=True):
+        """Queue depth, running jobs and recent waits, overall and per tenant"""
+        view = {
+            "slots": self.slots,
+            "active_tenants": len(self._tenants),
+            "bulk_slots": self.bulk_slots,
+            "tenant_max_running": self.tenant_max_running,
+            "max_queued": dict(self.class_max_queued),
+            "running": dict(self._running),
+            "queued": dict(self._queued)
+        }
+        if not tenants:
+            return view
+
+        view["tenants"] = {}
+        for name, state in [*self._recent.items(), *self._tenants.items()]:
+            waits = {}
+            for priority in PRIORITIES:
+                samples = sorted(state.waits[priority])
+                if samples:
+                    waits[priority] = {
+                        "p50_ms": round(_percentile(samples, 50) * 1000, 1),
+                        "p95_ms": round(_percentile(samples, 95) * 1000, 1),
+                        "max_ms": round(samples[-1] * 1000, 1)
+                    }
+            view["tenants"][name] = {
+                "weight": state.weight,
+                "running": state.running,
+                "queued": {priority: len(queue) for priority, queue in state.queues.items()},
+                "dispatched": dict(state.dispatched),
+                "rejected": state.rejected,
+                "cancelled": state.cancelled,
+                "wait": waits
+            }
+        return view
+
+
+def tenant_weights_from_env():
+    """OCR_TENANT_WEIGHTS, e.g. 'acme=2,trial=0.5' (unlisted tenants weigh 1)"""
+    weights = {}
+    for item in os.environ.get("OCR_TENANT_WEIGHTS", "").split(","):
+        tenant, _, weight = item.partition("=")
+        if tenant.strip() and weight.strip():
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+def create_scheduler_from_env(pool, on_dispatch=None):
+    """Build the scheduler from OCR_SCHEDULER_SLOTS, OCR_INTERACTIVE_WEIGHT,
+    OCR_BULK_WEIGHT, OCR_TENANT_WEIGHTS, OCR_BULK_MAX_SHARE,
+    OCR_TENANT_MAX_RUNNING, OCR_TENANT_MAX_QUEUED, OCR_SCHEDULER_MAX_QUEUED
+    (bulk) and OCR_INTERACTIVE_MAX_QUEUED (default: the pool's max_queue)"""
+    interactive_max_queued = os.environ.get("OCR_INTERACTIVE_MAX_QUEUED")
+    return FairScheduler(
+        pool,
+        slots=int(os.environ.get("OCR_SCHEDULER_SLOTS", "0")) or None,
+        interactive_weight=float(os.environ.get("OCR_INTERACTIVE_WEIGHT", "4")),
+        bulk_weight=float(os.environ.get("OCR_BULK_WEIGHT", "1")),
+        tenant_weights=tenant_weights_from_env(),
+        bulk_max_share=float(os.environ.get("OCR_BULK_MAX_SHARE", "0.75")),
+        tenant_max_running=int(os.environ.get("OCR_TENANT_MAX_RUNNING", "0")),
+        tenant_max_queued=int(os.environ.get("OCR_TENANT_MAX_QUEUED", "64")),
+        max_queued=int(os.environ.get("OCR_SCHEDULER_MAX_QUEUED", "512")),
+        interactive_max_queued=int(interactive_max_queued) if interactive_max_queued else None,
+        on_dispatch=on_dispatch
+    )
@@ -0,0 +1,86 @@
+# utils/self_test.py
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("ocr.self_test")
+
+
+class SelfTestMonitor:
+    """Runs engine self-tests periodically on a background thread and caches
+    the outcome, so health probes read a result instead of running OCR.
+
+    ``checks`` maps a name to a callable returning ``(ok, status)``: ``ok`` is
+    True/False, or None when the engine is not loaded yet (nothing to test).
+    A check that raises counts as failed.
+    """
+
+    def __init__(self, checks, interval=60.0):
+        self._checks = dict(checks)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._results = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_now(self):
+        """Run every check in the calling thread, store and return the results"""
+        results = {}
+        for name, check in self._checks.items():
+            started = time.perf_counter()
+            try:
+                ok, status = check()
+            except Exception as e:
+                ok, status = False, f"error: {str(e)}"
+            results[name] = {
+                "ok": ok,
+                "status": status,
+                "checked_at": time.time(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+            if ok is False:
+                logger.warning("❌ %s self-test failed: %s", name, status)
+
+        with self._lock:
+            self._results.update(results)
+        return results
+
+    def results(self):
+        """Last cached result per check (empty until the first run)"""
+        with self._lock:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def start(self):
+        """Start the periodic loop; call after fork (threads don't survive it)"""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return None
+
+        def loop():
+            while not self._stop.is_set():
+                self.run_now()
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="ocr-self-test", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self):
+        """Run the next self-test now instead of at the end of the interval"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def create_self_test_from_env(checks):
+    """Monitor refreshed every OCR_SELF_TEST_INTERVAL seconds (0 disables the loop)"""
+    return SelfTestMonitor(checks, interval=float(os.environ.get("OCR_SELF_TEST_INTERVAL", "60")))
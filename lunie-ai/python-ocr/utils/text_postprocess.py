@@ -0,0 +1,167 @@
+# utils/text_postprocess.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger("ocr.postprocess")
+
+# [a-zA-Z] under re.IGNORECASE also matches U+017F and U+212A (they case-fold
+# to 's' and 'k'); spelled out so the rules below can drop the flag
+_LETTER = '[a-zA-Z\u017f\u212a]'
+
+# Common OCR misreads, applied only below LOW_CONFIDENCE_THRESHOLD. These are
+# the original rules (\brn\b, \bvv\b, \b0(?=[a-zA-Z]), \b1(?=[a-zA-Z]),
+# (?<=[a-zA-Z])0\b, (?<=[a-zA-Z])5(?=[a-zA-Z]), \|, all IGNORECASE) rewritten
+# to start with a literal, so the regex engine rejects a branch on its first
+# character instead of evaluating \b or a lookbehind at every position. Each
+# rule matches characters no other rule matches, and no replacement creates
+# or removes a context another rule depends on, so one pass over their
+# alternation gives the same text as applying them one after another.
+DEFAULT_CORRECTIONS = (
+    (r'[rR](?<!\w[rR])[nN]\b', 'm'),
+    (r'[vV](?<!\w[vV])[vV]\b', 'w'),
+    (rf'0(?<!\w0)(?={_LETTER})', 'O'),
+    (rf'1(?<!\w1)(?={_LETTER})', 'l'),
+    (rf'0(?<={_LETTER}0)\b', 'o'),
+    (rf'5(?<={_LETTER}5)(?={_LETTER})', 's'),
+    (r'\|', 'l'),
+)
+# Every character a correction can start with
+CORRECTIONS_GATE = '[rRvV015|]'
+LOW_CONFIDENCE_THRESHOLD = 90
+
+# After whitespace runs are collapsed to single spaces: drop the space before
+# punctuation, then put exactly one space after it. Literal replacements keep
+# both passes in C.
+_SPACE_BEFORE_PUNCT = re.compile(r' (?=[,.!?;:])')
+_NO_SPACE_AFTER_PUNCT = re.compile(r'(?<=[,.!?;:])(?! )')
+
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class TextPostProcessor:
+    """Compiled OCR text clean-up: corrections, whitespace, tenant rules.
+
+    ``replace`` maps literal strings to replacements (one pass, longest key
+    wins); ``patterns`` is a list of (regex, replacement, ignore_case) applied
+    in order. Both run after the built-in clean-up, on normalized text.
+    """
+
+    def __init__(self, corrections=DEFAULT_CORRECTIONS, gate=CORRECTIONS_GATE,
+                 replace=None, patterns=(), version="default"):
+        # The gate lookahead skips positions no branch can start at in one check
+        alternation = '|'.join(f'({pattern})' for pattern, _ in corrections)
+        self._corrections = re.compile(f'(?={gate})(?:{alternation})' if gate else alternation)
+        self._correction_replacements = (None,) + tuple(replacement for _, replacement in corrections)
+
+        self._literal_replacements = dict(replace or {})
+        self._literals = None
+        if self._literal_replacements:
+            keys = sorted(self._literal_replacements, key=len, reverse=True)
+            self._literals = re.compile('|'.join(re.escape(key) for key in keys))
+
+        self._patterns = [
+            (re.compile(pattern, re.IGNORECASE if ignore_case else 0), replacement)
+            for pattern, replacement, ignore_case in patterns
+        ]
+        self.version = version
+
+    def _correct(self, match):
+        return self._correction_replacements[match.lastindex]
+
+    def _literal(self, match):
+        return self._literal_replacements[match.group(0)]
+
+    def __call__(self, text, confidence=0):
+        if not text or not text.strip():
+            return text
+
+        cleaned = text
+        if confidence < LOW_CONFIDENCE_THRESHOLD:
+            cleaned = self._corrections.sub(self._correct, cleaned)
+
+        # str.split() and re's \s use the same Unicode whitespace definition
+        cleaned = ' '.join(cleaned.split())
+        cleaned = _SPACE_BEFORE_PUNCT.sub('', cleaned)
+        cleaned = _NO_SPACE_AFTER_PUNCT.sub(' ', cleaned)
+
+        if self._literals is not None:
+            cleaned = self._literals.sub(self._literal, cleaned)
+        for pattern, replacement in self._patterns:
+            cleaned = pattern.sub(replacement, cleaned)
+
+        return cleaned.strip()
+
+
+def load_tenant_rules(path):
+    """Build a TextPostProcessor from a tenant rules JSON file:
+
+    {"replace": {"Lunie Al": "Lunie AI"},
+     "patterns": [{"pattern": "\\\\binv0ice\\\\b", "replacement": "invoice", "ignore_case": true}]}
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    rules = json.loads(raw)
+
+    patterns = [
+        (rule['pattern'], rule.get('replacement', ''), bool(rule.get('ignore_case', False)))
+        for rule in rules.get('patterns', [])
+    ]
+    return TextPostProcessor(
+        replace=rules.get('replace'),
+        patterns=patterns,
+        version=hashlib.sha256(raw).hexdigest()[:16]
+    )
+
+
+class TenantPostProcessors:
+    """Per-tenant processors loaded from ``<rules_dir>/<tenant_id>.json``.
+
+    Compiled processors are cached and rebuilt when the file's mtime changes.
+    Unknown tenants, and tenants whose file fails to load, get the default.
+    """
+
+    def __init__(self, rules_dir=None):
+        self.rules_dir = rules_dir
+        self.default = TextPostProcessor()
+        self._lock = threading.Lock()
+        self._tenants = {}  # tenant_id -> (mtime, processor)
+
+    def get(self, tenant_id=None):
+        if not tenant_id or not self.rules_dir:
+            return self.default
+        if not TENANT_ID_PATTERN.fullmatch(tenant_id):
+            raise ValueError(f"Invalid tenant_id: {tenant_id!r}")
+
+        path = os.path.join(self.rules_dir, f"{tenant_id}.json")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return self.default
+
+        with self._lock:
+            cached = self._tenants.get(tenant_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            processor = load_tenant_rules(path)
+        except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+            logger.warning("⚠️ Could not load text rules for tenant %s: %s", tenant_id, e)
+            return self.default
+
+        with self._lock:
+            self._tenants[tenant_id] = (mtime, processor)
+        logger.info("📝 Loaded text rules for tenant %s (version %s)", tenant_id, processor.version)
+        return processor
+
+
+def create_postprocessors_from_env(base_dir):
+    """Tenant rules from OCR_TENANT_RULES_DIR (relative to base_dir; unset = none)"""
+    rules_dir = os.environ.get("OCR_TENANT_RULES_DIR")
+    if rules_dir and not os.path.isabs(rules_dir):
+        rules_dir = os.path.join(base_dir, rules_dir)
+    return TenantPostProcessors(rules_dir)
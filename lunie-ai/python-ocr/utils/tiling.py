@@ -0,0 +1,167 @@
+# utils/tiling.py
+"""Split large images into overlapping tiles and merge per-tile OCR regions.
+
+Regions are dicts {'text', 'confidence', 'bbox': [x0, y0, x1, y1]} in
+full-image pixel coordinates.
+"""
+
+# Regions on the same line overlapping by more than this share of the smaller
+# box are the same text seen from two tiles; less than that, they are two
+# halves of a line cut by a seam and get stitched together
+DUPLICATE_OVERLAP = 0.8
+# Boxes sharing this share of the shorter one's height are on the same line
+SAME_LINE_OVERLAP = 0.5
+# A region this close to an interior tile edge was probably cut by it
+CLIP_MARGIN = 2
+
+
+def _tile_starts(length, tile_size, step):
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)  # last tile flush with the edge, same size
+    return starts
+
+
+def plan_tiles(width, height, tile_size=1280, overlap=160):
+    """(x0, y0, x1, y1) tiles covering the image, overlapping by ``overlap`` px"""
+    if not 0 <= overlap < tile_size:
+        raise ValueError("overlap must be >= 0 and smaller than tile_size")
+    step = tile_size - overlap
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in _tile_starts(height, tile_size, step)
+        for x0 in _tile_starts(width, tile_size, step)
+    ]
+
+
+def _box(points, dx, dy):
+    """Axis-aligned box of an EasyOCR quad, shifted into image coordinates"""
+    xs = [float(point[0]) for point in points]
+    ys = [float(point[1]) for point in points]
+    return [min(xs) + dx, min(ys) + dy, max(xs) + dx, max(ys) + dy]
+
+
+def _clipped(box, tile, width, height):
+    x0, y0, x1, y1 = tile
+    return ((x0 > 0 and box[0] <= x0 + CLIP_MARGIN) or
+            (y0 > 0 and box[1] <= y0 + CLIP_MARGIN) or
+            (x1 < width and box[2] >= x1 - CLIP_MARGIN) or
+            (y1 < height and box[3] >= y1 - CLIP_MARGIN))
+
+
+def _overlap_ratio(a, b):
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return width * height / smaller if smaller > 0 else 0.0
+
+
+def _same_line(a, b):
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    shorter = min(a[3] - a[1], b[3] - b[1])
+    return shorter > 0 and height / shorter > SAME_LINE_OVERLAP
+
+
+def stitch_text(left, right):
+    """Join two readings of a line cut by a seam, dropping the words both saw.
+
+    The left reading may end in a word cut at its right edge and the right
+    one start with a word cut at its left edge, so those two positions only
+    need to match as prefix/suffix.
+    """
+    a, b = left.split(), right.split()
+    for k in range(min(len(a), len(b)), 0, -1):
+        pairs = list(zip(a[-k:], b[:k]))
+        if k == 1:
+            x, y = pairs[0]
+            if x == y or y.startswith(x) or x.endswith(y):
+                return ' '.join(a[:-1] + [max(x, y, key=len)] + b[1:])
+            continue
+        if (pairs[0][0].endswith(pairs[0][1]) and pairs[-1][1].startswith(pairs[-1][0])
+                and all(x == y for x, y in pairs[1:-1])):
+            return ' '.join(a[:-k] + [pairs[0][0]] + b[1:])
+    return ' '.join(a + b)
+
+
+def merge_tile_regions(tiles, tile_results, width, height, cell=256):
+    """Merge EasyOCR (bbox, text, confidence) lists, one per tile, into regions.
+
+    Where tiles overlap, the same text is usually found twice. Candidates are
+    visited best first (not cut by a tile edge, then higher confidence, then
+    larger). One that mostly overlaps a kept region from another tile on the
+    same line is dropped; one that only partly overlaps it (a line running
+    across a seam) is stitched onto it. Kept regions are indexed in a coarse
+    grid, so each candidate is only compared with its neighbours.
+    """
+    candidates = []
+    for tile_index, (tile, results) in enumerate(zip(tiles, tile_results)):
+        for points, text, confidence in results:
+            box = _box(points, tile[0], tile[1])
+            candidates.append((_clipped(box, tile, width, height), -float(confidence),
+                               -(box[2] - box[0]) * (box[3] - box[1]), tile_index, box, text))
+    candidates.sort(key=lambda candidate: candidate[:3])
+
+    def cells(box):
+        return [(cx, cy)
+                for cx in range(int(box[0]) // cell, int(box[2]) // cell + 1)
+                for cy in range(int(box[1]) // cell, int(box[3]) // cell + 1)]
+
+    grid = {}
+    kept = []  # [tile_index, box, text, confidence]
+    for clipped, negative_confidence, _, tile_index, box, text in candidates:
+        best, best_ratio = None, 0.0
+        for key in cells(box):
+            for region in grid.get(key, ()):
+                if region[0] == tile_index or not _same_line(box, region[1]):
+                    continue
+                ratio = _overlap_ratio(box, region[1])
+                if ratio > best_ratio:
+                    best, best_ratio = region, ratio
+
+        if best is None:
+            region = [tile_index, box, text, -negative_confidence]
+            kept.append(region)
+        elif best_ratio > DUPLICATE_OVERLAP:
+            continue
+        else:
+            left, right = (best[2], text) if best[1][0] <= box[0] else (text, best[2])
+            best[2] = stitch_text(left, right)
+            best[1] = [min(best[1][0], box[0]), min(best[1][1], box[1]),
+                       max(best[1][2], box[2]), max(best[1][3], box[3])]
+            best[3] = (best[3] - negative_confidence) / 2
+            region = best
+        for key in cells(region[1]):
+            bucket = grid.setdefault(key, [])
+            if not any(other is region for other in bucket):
+                bucket.append(region)
+
+    return [{
+        'text': text,
+        'confidence': confidence,
+        'bbox': [round(value, 1) for value in box]
+    } for _, box, text, confidence in kept]
+
+
+def reading_order(regions):
+    """Group regions into lines (top to bottom), each sorted left to right.
+
+    A region joins the current line when its vertical centre is within half
+    the line's average height of the line's centre.
+    """
+    lines = []
+    for region in sorted(regions, key=lambda r: (r['bbox'][1] + r['bbox'][3]) / 2):
+        x0, y0, x1, y1 = region['bbox']
+        center, size = (y0 + y1) / 2, y1 - y0
+        if lines:
+            line = lines[-1]
+            if abs(center - line['center']) <= line['height'] / 2:
+                count = len(line['regions'])
+                line['center'] = (line['center'] * count + center) / (count + 1)
+                line['height'] = (line['height'] * count + size) / (count + 1)
+                line['regions'].append(region)
+                continue
+        lines.append({'center': center, 'height': size, 'regions': [region]})
+    return [sorted(line['regions'], key=lambda r: r['bbox'][0]) for line in lines]
@@ -0,0 +1,121 @@
+# utils/worker_pool.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from utils.cpu_budget import available_cpus, server_processes
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the OCR pool already holds its maximum number of jobs"""
+
+    def __init__(self, retry_after):
+        super().__init__("OCR worker pool is saturated")
+        self.retry_after = retry_after
+
+
+class OCRWorkerPool:
+    """Bounded executor for blocking OCR work (decode, preprocess, recognize).
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a free worker. Anything beyond that is rejected immediately with
+    ``PoolSaturatedError`` so the caller can answer 503 instead of letting the
+    request hang until the client times out.
+    """
+
+    def __init__(self, mode="thread", max_workers=None, max_queue=8, retry_after=5,
+                 initializer=None, initargs=()):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.mode = mode
+        # Default: half the cores, shared between the server processes
+        self.max_workers = max_workers or max(1, available_cpus() // (2 * server_processes()))
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+
+        if mode == "process":
+            # Each child process runs the initializer (e.g. torch thread pinning)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=initializer,
+                initargs=initargs
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="ocr-worker"
+            )
+
+        self._capacity = self.max_workers + self.max_queue
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self._capacity:
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def submit(self, fn, *args):
+        """Queue ``fn(*args)`` and return an asyncio future for its result.
+
+        Raises ``PoolSaturatedError`` right away when the pool is full.
+        """
+        if not self._acquire():
+            raise PoolSaturatedError(self.retry_after)
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+
+        # Release on completion of the job itself, not of the awaiting request:
+        # a disconnected client must not free a slot that is still busy.
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool, or raise ``PoolSaturatedError``"""
+        return await self.submit(fn, *args)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "running": min(self._in_flight, self.max_workers),
+                "queued": max(0, self._in_flight - self.max_workers),
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def create_pool_from_env(initializer=None, initargs=()):
+    """Build the OCR pool from OCR_EXECUTOR / OCR_POOL_WORKERS / OCR_MAX_QUEUE / OCR_RETRY_AFTER"""
+    workers = os.environ.get("OCR_POOL_WORKERS")
+    return OCRWorkerPool(
+        mode=os.environ.get("OCR_EXECUTOR", "thread").lower(),
+        max_workers=int(workers) if workers else None,
+        max_queue=int(os.environ.get("OCR_MAX_QUEUE", "8")),
+        retry_after=int(os.environ.get("OCR_RETRY_AFTER", "5")),
+        initializer=initializer,
+        initargs=initargs
+    )
@@ -1255,11 +1255,22 @@ else if (file.type === 'application/vnd.openxmlformats-officedocument.spreadshee
 
       console.log('🚀 Sending request to FastAPI OCR...');
 
-      // Call FastAPI OCR service
-      const ocrResponse = await fetch('http://localhost:8002/ocr', {
-        method: 'POST',
-        body: ocrFormData,
-      });
+      // Call FastAPI OCR service (it answers 503 + Retry-After when its queue is full)
+      const maxOcrAttempts = 4;
+      let ocrResponse;
+      for (let attempt = 1; attempt <= maxOcrAttempts; attempt++) {
+        ocrResponse = await fetch('http://localhost:8002/ocr', {
+          method: 'POST',
+          body: ocrFormData,
+        });
+
+        if (ocrResponse.status !== 503 || attempt === maxOcrAttempts) break;
+
+        const retryAfter = parseInt(ocrResponse.headers.get('Retry-After') || '', 10);
+        const delayMs = (Number.isFinite(retryAfter) ? retryAfter : 2 ** attempt) * 1000;
+        console.log(`⏳ OCR service busy, retrying in ${delayMs}ms (attempt ${attempt}/${maxOcrAttempts})`);
+        await new Promise(resolve => setTimeout(resolve, delayMs));
+      }
 
       console.log('📥 FastAPI OCR response status:', ocrResponse.status);
 